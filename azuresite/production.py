@@ -14,6 +14,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',                                 
     'django.middleware.csrf.CsrfViewMiddleware',                                 
     'django.contrib.auth.middleware.AuthenticationMiddleware',                   
+    'learning.middleware.PermissionsCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',                      
     'django.middleware.clickjacking.XFrameOptionsMiddleware',                    
 ]
@@ -26,3 +26,9 @@ from django.utils.translation import gettext_lazy as _
 class LearningConfig(AppConfig):
     name = "learning"
     verbose_name = _("Learning management")
+
+    # noinspection PyMissingOrEmptyDocstring
+    def ready(self):
+        # Connect the signal receivers
+        # noinspection PyUnresolvedReferences
+        import learning.signals  # noqa: F401
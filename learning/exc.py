@@ -112,6 +112,12 @@ class ChangeActivityOnCourseError(LearningError):
     """
 
 
+class CourseActivitiesOrderError(LearningError):
+    """
+    The ordered activities are not exactly the activities of the course
+    """
+
+
 class UserIsAlreadyCollaborator(LearningError):
     """
     The user is already a collaborator on the course
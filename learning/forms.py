@@ -55,6 +55,51 @@ class ActivityPKForm(Form):
     activity = forms.IntegerField(min_value=1, required=True)
 
 
+class IntegerListField(forms.Field):
+    """
+    A field for a list of integers, given as several values of the same parameter.
+    """
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        "invalid": _("Enter a list of whole numbers."),
+    }
+
+    # noinspection PyMissingOrEmptyDocstring
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [int(item) for item in value]
+        except (TypeError, ValueError):
+            raise ValidationError(self.error_messages["invalid"], code="invalid")
+
+
+class ActivityPKListForm(Form):
+    """
+    A form to process and validate the “activities” POST values, an ordered list of activity PKs.
+    """
+    activities = IntegerListField(required=True)
+
+
+class ObjectiveValidationsForm(Form):
+    """
+    A form to process and validate the “validated” and “not_validated” POST values, the PKs of the entity objectives to
+    validate and those whose validation to remove.
+    """
+    validated = IntegerListField(required=False)
+    not_validated = IntegerListField(required=False)
+
+    # noinspection PyMissingOrEmptyDocstring
+    def clean(self):
+        cleaned_data = super().clean()
+        validated, not_validated = cleaned_data.get("validated", []), cleaned_data.get("not_validated", [])
+        if not validated and not not_validated:
+            raise ValidationError(_("Select at least one objective to validate or to disclaim."))
+        if set(validated) & set(not_validated):
+            raise ValidationError(_("An objective cannot be both validated and disclaimed."))
+        return cleaned_data
+
+
 class CustomClassesOnFormMixin(Form):
     custom_classes = ["form-control"]
 
@@ -0,0 +1,142 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from collections import defaultdict
+from typing import Dict, List
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from learning.models import Activity, BasicModelMixin, Course, MaterializedPermission, RegistrationOnCourse, Resource
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the MaterializedPermission table, or verify it against the permissions computed by “_get_user_perms_mask”.
+
+    The rebuild stores the permissions of authors, collaborators and students. Permissions of other users are stored
+    the first time they are needed.
+    """
+    help = "Rebuild the materialized permissions table, or verify it against the live permission rules."
+
+    # noinspection PyMissingOrEmptyDocstring
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Do not rebuild, only check that every stored permission matches the live permission rules."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="The number of objects or rows loaded at once (default: 500)."
+        )
+
+    # noinspection PyMissingOrEmptyDocstring
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("The batch size must be a positive integer.")
+        if options["verify"]:
+            self.verify(options["batch_size"])
+        else:
+            self.rebuild(options["batch_size"])
+
+    def rebuild(self, batch_size: int) -> None:
+        """
+        Empty the table, then store the permissions of the users related to each course, activity and resource.
+
+        :param batch_size: the number of objects loaded at once
+        :type batch_size: int
+        """
+        with transaction.atomic():
+            MaterializedPermission.objects.all().delete()
+            for model in (Course, Activity, Resource):
+                nb_rows = 0
+                object_ids = list(model.objects.order_by("pk").values_list("pk", flat=True))
+                for start in range(0, len(object_ids), batch_size):
+                    nb_rows += self._rebuild_batch(model, object_ids[start:start + batch_size])
+                self.stdout.write("{}: {} permissions stored for {} objects.".format(
+                    model.__name__, nb_rows, len(object_ids)
+                ))
+        self.stdout.write(self.style.SUCCESS("Materialized permissions rebuilt."))
+
+    # noinspection PyMethodMayBeStatic
+    def _rebuild_batch(self, model: type, object_ids: List[int]) -> int:
+        objects = model.objects.in_bulk(object_ids)
+        objects_for_users: Dict[int, List[BasicModelMixin]] = defaultdict(list)
+        for an_object in objects.values():
+            objects_for_users[an_object.author_id].append(an_object)
+        related_name = model.__name__.lower()
+        # noinspection PyUnresolvedReferences
+        related_users = list(model.collaborators.through.objects.filter(
+            **{"{}__in".format(related_name): object_ids}
+        ).order_by().values_list("{}_id".format(related_name), "collaborator_id"))
+        if model is Course:
+            related_users += RegistrationOnCourse.objects.filter(course__in=object_ids) \
+                .order_by().values_list("course_id", "student_id")
+        for object_id, user_id in related_users:
+            objects_for_users[user_id].append(objects[object_id])
+
+        content_type = ContentType.objects.get_for_model(model)
+        users = get_user_model().objects.in_bulk(list(objects_for_users.keys()))
+        rows = [
+            MaterializedPermission(user=users[user_id], content_type=content_type, object_id=an_object.pk, permissions=mask)
+            for user_id, user_objects in objects_for_users.items()
+            for an_object, mask in model._bulk_get_user_perms_mask(list(set(user_objects)), users[user_id]).items()
+        ]
+        MaterializedPermission.objects.bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
+
+    def verify(self, batch_size: int) -> None:
+        """
+        Compare every stored permission with the permission computed by “_get_user_perms_mask”.
+
+        :param batch_size: the number of rows loaded at once
+        :type batch_size: int
+        :raises CommandError: when stored permissions are wrong
+        """
+        nb_rows, nb_errors = 0, 0
+        row_ids = list(MaterializedPermission.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(row_ids), batch_size):
+            rows = MaterializedPermission.objects.filter(pk__in=row_ids[start:start + batch_size]) \
+                .select_related("user", "content_type")
+            objects_ids_by_model = defaultdict(set)
+            for row in rows:
+                objects_ids_by_model[row.content_type.model_class()].add(row.object_id)
+            objects = {
+                model: model.objects.in_bulk(list(object_ids)) for model, object_ids in objects_ids_by_model.items()
+            }
+            for row in rows:
+                nb_rows += 1
+                an_object = objects[row.content_type.model_class()].get(row.object_id)
+                if an_object is None:
+                    nb_errors += 1
+                    self.stderr.write("{} n°{} does not exist anymore, but permissions are stored for {}.".format(
+                        row.content_type.name, row.object_id, row.user
+                    ))
+                elif an_object._get_user_perms_mask(row.user) != row.permissions:
+                    nb_errors += 1
+                    self.stderr.write("Wrong permissions stored for {} on {} “{}”.".format(
+                        row.user, row.content_type.name, an_object
+                    ))
+        if nb_errors:
+            raise CommandError("{} of {} materialized permissions are wrong. Run this command without --verify to "
+                               "rebuild them.".format(nb_errors, nb_rows))
+        self.stdout.write(self.style.SUCCESS("{} materialized permissions verified.".format(nb_rows)))
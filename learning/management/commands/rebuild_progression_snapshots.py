@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from learning.models import Course, ProgressionSnapshot
+
+
+class Command(BaseCommand):
+    """
+    Recompute the progression snapshots of every course, and report those that drifted from the validations actually
+    stored. Courses are processed by batches, which can run in parallel threads.
+    """
+    help = "Repair the progression snapshots of all courses, reporting those that drifted."
+
+    # noinspection PyMissingOrEmptyDocstring
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Do not repair, only report the snapshots that drifted."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="The number of courses processed in a batch (default: 100)."
+        )
+        parser.add_argument(
+            "--jobs", type=int, default=1,
+            help="The number of batches processed in parallel (default: 1)."
+        )
+
+    # noinspection PyMissingOrEmptyDocstring
+    def handle(self, *args, **options):
+        batch_size, jobs, fix = options["batch_size"], options["jobs"], not options["verify"]
+        if batch_size <= 0 or jobs <= 0:
+            raise CommandError("The batch size and the number of jobs must be positive integers.")
+        course_ids = list(Course.objects.order_by("pk").values_list("pk", flat=True))
+        batches = [course_ids[start:start + batch_size] for start in range(0, len(course_ids), batch_size)]
+        if jobs == 1:
+            results = [self._repair_batch(batch, fix) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(lambda batch: self._repair_batch_in_thread(batch, fix), batches))
+
+        nb_drifts, nb_drifted_courses = 0, sum(len(drifts) for drifts in results)
+        for drifts in results:
+            for course_id, nb_course_drifts in drifts.items():
+                nb_drifts += nb_course_drifts
+                self.stderr.write("Course n°{}: {} progression snapshots drifted.".format(course_id, nb_course_drifts))
+        if not fix and nb_drifts:
+            raise CommandError("{} progression snapshots drifted in {} of {} courses checked. Run this command without "
+                               "--verify to repair them.".format(nb_drifts, nb_drifted_courses, len(course_ids)))
+        self.stdout.write(self.style.SUCCESS("{} progression snapshots {} in {} of {} courses checked.".format(
+            nb_drifts, "repaired" if fix else "drifted", nb_drifted_courses, len(course_ids)
+        )))
+
+    # noinspection PyMethodMayBeStatic
+    def _repair_batch(self, course_ids: List[int], fix: bool) -> Dict[int, int]:
+        drifts = {course_id: ProgressionSnapshot.objects.repair(course_id, fix) for course_id in course_ids}
+        return {course_id: nb_drifts for course_id, nb_drifts in drifts.items() if nb_drifts}
+
+    def _repair_batch_in_thread(self, course_ids: List[int], fix: bool) -> Dict[int, int]:
+        try:
+            return self._repair_batch(course_ids, fix)
+        finally:
+            # Each thread opens its own database connections
+            connections.close_all()
@@ -0,0 +1,43 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from learning.models import INDEXED_TEXT_FIELDS, IndexedText
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the IndexedText table from the objective abilities and the course, activity and resource names.
+    """
+    help = "Rebuild the index of objective abilities and course, activity and resource names."
+
+    # noinspection PyMissingOrEmptyDocstring
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            IndexedText.objects.all().delete()
+            for model in INDEXED_TEXT_FIELDS:
+                nb_objects = 0
+                for an_object in model.objects.order_by("pk").iterator():
+                    IndexedText.objects.index(an_object)
+                    nb_objects += 1
+                self.stdout.write("{}: {} texts indexed.".format(model.__name__, nb_objects))
+        self.stdout.write(self.style.SUCCESS("Text index rebuilt."))
@@ -0,0 +1,37 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from learning.permissions import permissions_cache
+
+
+class PermissionsCacheMiddleware:
+    """
+    Memoize object permissions for the duration of a request. A single page often checks several permissions on the
+    same object (view, change, view_collaborators, etc.), this ensures they are computed only once.
+
+    .. note:: Add it after “django.contrib.auth.middleware.AuthenticationMiddleware” in the MIDDLEWARE setting.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permissions_cache():
+            return self.get_response(request)
@@ -4,11 +4,12 @@ import os
 from django.conf import settings
 from django.db import migrations
 
-from learning.models import Resource, resource_attachment_upload_to_callback
+from learning.models import resource_attachment_upload_to_callback
 
 
 def rename_resource_attachments(apps, schema_editor):
-    for resource in Resource.objects.all():
+    # The historical model is used, as the current one may have fields that do not exist yet
+    for resource in apps.get_model("learning", "Resource").objects.all():
         if resource.attachment:
             new_file_path = resource_attachment_upload_to_callback(
                 resource, os.path.basename(resource.attachment.name)
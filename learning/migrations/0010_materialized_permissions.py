@@ -0,0 +1,39 @@
+# Generated by Django 3.1 on 2026-10-17 00:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('learning', '0009_auto_20210131_1513'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedPermission',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object identifier')),
+                ('permissions', models.PositiveBigIntegerField(verbose_name='Permissions')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='Object type')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'materialized permission',
+                'verbose_name_plural': 'materialized permissions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='materializedpermission',
+            index=models.Index(fields=['content_type', 'object_id'], name='learning_ma_content_788406_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='materializedpermission',
+            unique_together={('user', 'content_type', 'object_id')},
+        ),
+    ]
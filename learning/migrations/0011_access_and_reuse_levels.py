@@ -0,0 +1,64 @@
+# Generated by Django 3.1 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+# The weights of the enumeration literals when this migration was written, by model and field. They are copied here so
+# that the backfill does not depend on the current enumerations.
+REUSE_LEVELS = {"NO_RESTRICTION": 0, "ONLY_AUTHOR": 1, "NON_REUSABLE": 2}
+ORDINAL_FIELDS = {
+    "course": {
+        "access": {"PUBLIC": 0, "STUDENTS_ONLY": 1, "COLLABORATORS_ONLY": 2, "PRIVATE": 3},
+    },
+    "activity": {
+        "access": {"PUBLIC": 0, "EXISTING_COURSES": 1, "COLLABORATORS_ONLY": 2, "PRIVATE": 3},
+        "reuse": REUSE_LEVELS,
+    },
+    "resource": {
+        "access": {"PUBLIC": 0, "EXISTING_ACTIVITIES": 1, "COLLABORATORS_ONLY": 2, "PRIVATE": 3},
+        "reuse": REUSE_LEVELS,
+    },
+}
+
+
+def fill_levels(apps, schema_editor):
+    for model_name, ordinal_fields in ORDINAL_FIELDS.items():
+        model = apps.get_model("learning", model_name)
+        for field_name, levels in ordinal_fields.items():
+            for name, weight in levels.items():
+                model.objects.filter(**{field_name: name}).update(**{"{}_level".format(field_name): weight})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0010_materialized_permissions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='access_level',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='The weight of the activity access, kept in sync with it to filter by range', verbose_name='Access level'),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='reuse_level',
+            field=models.PositiveSmallIntegerField(db_index=True, default=1, editable=False, help_text='The weight of the activity reuse, kept in sync with it to filter by range', verbose_name='Reuse level'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='access_level',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='The weight of the course access, kept in sync with it to filter by range', verbose_name='Access level'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='access_level',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='The weight of the resource access, kept in sync with it to filter by range', verbose_name='Access level'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='reuse_level',
+            field=models.PositiveSmallIntegerField(db_index=True, default=1, editable=False, help_text='The weight of the resource reuse, kept in sync with it to filter by range', verbose_name='Reuse level'),
+        ),
+        migrations.RunPython(fill_levels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1 on 2026-10-17 02:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('learning', '0011_access_and_reuse_levels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressionSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('levels', models.JSONField(default=dict, help_text='The validated and total numbers of entity objectives, by taxonomy level', verbose_name='Levels')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Last updated the…')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progression_snapshots', to='learning.course', verbose_name='Course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progression_snapshots', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'verbose_name': 'progression snapshot',
+                'verbose_name_plural': 'progression snapshots',
+                'unique_together': {('course', 'student')},
+            },
+        ),
+    ]
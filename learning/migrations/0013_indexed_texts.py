@@ -0,0 +1,78 @@
+# Generated by Django 3.1 on 2026-10-17 01:25
+
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The text helpers of learning.models when this migration was written. They are copied here so that the backfill does
+# not depend on the current code.
+def fold_text(text):
+    return "".join(c for c in unicodedata.normalize("NFD", text.lower()) if unicodedata.category(c) != "Mn")
+
+
+def get_trigrams(folded_text):
+    return {folded_text[i:i + 3] for i in range(len(folded_text) - 2)}
+
+
+INDEXED_TEXT_FIELDS = {
+    "objective": "ability",
+    "course": "name",
+    "activity": "name",
+    "resource": "name",
+}
+
+
+def index_texts(apps, schema_editor):
+    content_type_model = apps.get_model("contenttypes", "ContentType")
+    indexed_text_model = apps.get_model("learning", "IndexedText")
+    trigram_model = apps.get_model("learning", "IndexedTextTrigram")
+    for model_name, field_name in INDEXED_TEXT_FIELDS.items():
+        content_type, created = content_type_model.objects.get_or_create(app_label="learning", model=model_name)
+        for object_id, text in apps.get_model("learning", model_name).objects.values_list("pk", field_name):
+            indexed_text = indexed_text_model.objects.create(
+                content_type=content_type, object_id=object_id, folded_text=fold_text(text)
+            )
+            trigram_model.objects.bulk_create([
+                trigram_model(text=indexed_text, trigram=trigram) for trigram in get_trigrams(indexed_text.folded_text)
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('learning', '0012_progression_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedText',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object identifier')),
+                ('folded_text', models.TextField(help_text='The text of the object, lowered and without accents', verbose_name='Folded text')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='Object type')),
+            ],
+            options={
+                'verbose_name': 'indexed text',
+                'verbose_name_plural': 'indexed texts',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexedTextTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3, verbose_name='Trigram')),
+                ('text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='learning.indexedtext', verbose_name='Indexed text')),
+            ],
+            options={
+                'verbose_name': 'indexed text trigram',
+                'verbose_name_plural': 'indexed text trigrams',
+                'unique_together': {('trigram', 'text')},
+            },
+        ),
+        migrations.RunPython(index_texts, migrations.RunPython.noop),
+    ]
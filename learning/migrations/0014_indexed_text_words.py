@@ -0,0 +1,48 @@
+# Generated by Django 3.1 on 2026-10-17 01:30
+
+import collections
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The tokenizer of learning.models when this migration was written. It is copied here so that the backfill does not
+# depend on the current code.
+def get_words(folded_text):
+    return collections.Counter(re.findall(r"\w+", folded_text))
+
+
+def index_words(apps, schema_editor):
+    indexed_text_model = apps.get_model("learning", "IndexedText")
+    word_model = apps.get_model("learning", "IndexedTextWord")
+    for indexed_text in indexed_text_model.objects.all():
+        word_model.objects.bulk_create([
+            word_model(text=indexed_text, word=word, occurrences=occurrences)
+            for word, occurrences in get_words(indexed_text.folded_text).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0013_indexed_texts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedTextWord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=255, verbose_name='Word')),
+                ('occurrences', models.PositiveIntegerField(verbose_name='Occurrences')),
+                ('text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='words', to='learning.indexedtext', verbose_name='Indexed text')),
+            ],
+            options={
+                'verbose_name': 'indexed text word',
+                'verbose_name_plural': 'indexed text words',
+                'unique_together': {('word', 'text')},
+            },
+        ),
+        migrations.RunPython(index_words, migrations.RunPython.noop),
+    ]
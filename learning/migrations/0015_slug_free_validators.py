@@ -0,0 +1,129 @@
+# Generated by Django 3.1 on 2026-10-17 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+ENTITY_OBJECTIVES = ("course", "activity", "resource")
+
+
+def copy_validations(apps, schema_editor):
+    """
+    Copy validations into the new tables, keeping the first validation of an entity objective by a student.
+    """
+    for entity in ENTITY_OBJECTIVES:
+        old_model = apps.get_model("learning", "{}ObjectiveValidator".format(entity.capitalize()))
+        new_model = apps.get_model("learning", "New{}ObjectiveValidator".format(entity.capitalize()))
+        entity_objective_id = "{}_objective_id".format(entity)
+        copied = set()
+        validations = []
+        for validation in old_model.objects.order_by("validated", "pk").values(
+            entity_objective_id, "student_id", "validated"
+        ).iterator():
+            key = (validation[entity_objective_id], validation["student_id"])
+            if key not in copied:
+                copied.add(key)
+                validations.append(new_model(**validation))
+        new_model.objects.bulk_create(validations, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('learning', '0014_indexed_text_words'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewCourseObjectiveValidator',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('validated', models.DateTimeField(verbose_name='Validated the…')),
+                ('course_objective', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_objective_validator', to='learning.courseobjective', verbose_name='Course objective')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_objective_validator', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'unique_together': {('course_objective', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='NewActivityObjectiveValidator',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('validated', models.DateTimeField(verbose_name='Validated the…')),
+                ('activity_objective', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_objective_validator', to='learning.activityobjective', verbose_name='Activity objective')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_objective_validator', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'unique_together': {('activity_objective', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='NewResourceObjectiveValidator',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('validated', models.DateTimeField(verbose_name='Validated the…')),
+                ('resource_objective', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_objective_validator', to='learning.resourceobjective', verbose_name='Resource objective')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_objective_validator', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'unique_together': {('resource_objective', 'student')},
+            },
+        ),
+        migrations.RunPython(copy_validations),
+        migrations.AlterField(
+            model_name='courseobjective',
+            name='validators',
+            field=models.ManyToManyField(blank=True, help_text='Student who validated the course_objective', related_name='course_objectives', through='learning.NewCourseObjectiveValidator', to=settings.AUTH_USER_MODEL, verbose_name='Validators'),
+        ),
+        migrations.AlterField(
+            model_name='activityobjective',
+            name='validators',
+            field=models.ManyToManyField(blank=True, help_text='Student who validated the course_objective', related_name='activity_objectives', through='learning.NewActivityObjectiveValidator', to=settings.AUTH_USER_MODEL, verbose_name='Validators'),
+        ),
+        migrations.AlterField(
+            model_name='resourceobjective',
+            name='validators',
+            field=models.ManyToManyField(blank=True, help_text='Student who validated the course_objective', related_name='resource_objectives', through='learning.NewResourceObjectiveValidator', to=settings.AUTH_USER_MODEL, verbose_name='Validators'),
+        ),
+        migrations.DeleteModel(
+            name='CourseObjectiveValidator',
+        ),
+        migrations.DeleteModel(
+            name='ActivityObjectiveValidator',
+        ),
+        migrations.DeleteModel(
+            name='ResourceObjectiveValidator',
+        ),
+        migrations.DeleteModel(
+            name='ObjectiveValidatorMixin',
+        ),
+        migrations.RenameModel(
+            old_name='NewCourseObjectiveValidator',
+            new_name='CourseObjectiveValidator',
+        ),
+        migrations.RenameModel(
+            old_name='NewActivityObjectiveValidator',
+            new_name='ActivityObjectiveValidator',
+        ),
+        migrations.RenameModel(
+            old_name='NewResourceObjectiveValidator',
+            new_name='ResourceObjectiveValidator',
+        ),
+        migrations.AlterField(
+            model_name='courseobjectivevalidator',
+            name='validated',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Validated the…'),
+        ),
+        migrations.AlterField(
+            model_name='activityobjectivevalidator',
+            name='validated',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Validated the…'),
+        ),
+        migrations.AlterField(
+            model_name='resourceobjectivevalidator',
+            name='validated',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Validated the…'),
+        ),
+    ]
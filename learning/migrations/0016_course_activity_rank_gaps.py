@@ -0,0 +1,46 @@
+# Generated by Django 3.1 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+RANK_GAP = 1024
+
+
+def spread_ranks(apps, schema_editor):
+    course_activity_model = apps.get_model("learning", "CourseActivity")
+    course_activities, course_id, position = [], None, 0
+    for course_activity in course_activity_model.objects.order_by("course", "rank", "pk").iterator():
+        position = position + 1 if course_activity.course_id == course_id else 1
+        course_id = course_activity.course_id
+        course_activity.rank = position * RANK_GAP
+        course_activities.append(course_activity)
+    course_activity_model.objects.bulk_update(course_activities, ["rank"], batch_size=500)
+
+
+def gather_ranks(apps, schema_editor):
+    course_activity_model = apps.get_model("learning", "CourseActivity")
+    course_activities, course_id, position = [], None, 0
+    for course_activity in course_activity_model.objects.order_by("course", "rank", "pk").iterator():
+        position = position + 1 if course_activity.course_id == course_id else 1
+        course_id = course_activity.course_id
+        course_activity.rank = position
+        course_activities.append(course_activity)
+    course_activity_model.objects.bulk_update(course_activities, ["rank"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0015_slug_free_validators'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='courseactivity',
+            options={'ordering': ['rank', 'pk'], 'verbose_name': 'course activity', 'verbose_name_plural': 'course activities'},
+        ),
+        migrations.AddIndex(
+            model_name='courseactivity',
+            index=models.Index(fields=['course', 'rank'], name='learning_co_course__30c6d2_idx'),
+        ),
+        migrations.RunPython(spread_ranks, gather_ranks),
+    ]
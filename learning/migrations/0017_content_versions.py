@@ -0,0 +1,29 @@
+# Generated by Django 3.1 on 2026-10-17 02:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('learning', '0016_course_activity_rank_gaps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object identifier')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Version')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='Object type')),
+            ],
+            options={
+                'verbose_name': 'content version',
+                'verbose_name_plural': 'content versions',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
@@ -28,18 +28,27 @@
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 #
 import abc
+import collections
 import itertools
+import math
 import os
+import re
+import threading
 import unicodedata
+from contextvars import ContextVar
 from enum import Enum
-from typing import Generator, List, Tuple, Set
+from typing import Callable, Dict, FrozenSet, Generator, List, NamedTuple, Optional, Tuple, Set, Type
 
 from django.conf import global_settings, settings
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Max, QuerySet, Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, IntegerField, Max, OuterRef, QuerySet, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _, gettext_noop, get_language
 from django.utils.translation import pgettext_lazy
@@ -47,7 +56,7 @@ from taggit.managers import TaggableManager
 
 import learning.exc
 from learning import logger
-from learning.permissions import ObjectPermissionManagerMixin
+from learning.permissions import ObjectPermissionManagerMixin, invalidate_permissions_cache
 
 # Translate course, activity or resource in order to use them dynamically
 gettext_noop("course")
@@ -73,6 +82,51 @@ def get_max_upload_size() -> int:
     return upload_size
 
 
+def get_suggested_objectives_limit() -> int:
+    """
+    Get the maximum number of objectives suggested when adding an objective on a course, an activity or a resource.
+    By default, it uses the “LEARNING_SUGGESTED_OBJECTIVES_LIMIT” settings. Otherwise, it sets a default value.
+
+    :return: the maximum number of suggested objectives
+    :rtype: int
+    """
+    try:
+        limit = settings.LEARNING_SUGGESTED_OBJECTIVES_LIMIT
+    except AttributeError:
+        limit = 20
+    return limit
+
+
+def get_course_tree_cache_size() -> int:
+    """
+    Get the maximum number of course tree snapshots kept in the memory of each process. By default, it uses the
+    “LEARNING_COURSE_TREE_CACHE_SIZE” settings. Otherwise, it sets a default value. 0 disables the process cache.
+
+    :return: the maximum number of course tree snapshots kept in memory
+    :rtype: int
+    """
+    try:
+        size = settings.LEARNING_COURSE_TREE_CACHE_SIZE
+    except AttributeError:
+        size = 128
+    return size
+
+
+def get_course_tree_cache_alias() -> Optional[str]:
+    """
+    Get the Django cache in which course tree snapshots are shared between processes. By default, it uses the
+    “LEARNING_COURSE_TREE_CACHE” settings. Otherwise, snapshots are only kept in the memory of each process.
+
+    :return: the alias of the cache in “CACHES”, or None
+    :rtype: Optional[str]
+    """
+    try:
+        alias = settings.LEARNING_COURSE_TREE_CACHE
+    except AttributeError:
+        alias = None
+    return alias
+
+
 def get_translated_languages() -> List[Tuple[str, str]]:
     """
     Get the list of languages supported by Django, translated in the current locale.
@@ -88,12 +142,21 @@ def get_translated_languages() -> List[Tuple[str, str]]:
     return languages
 
 
+# The number of digits of the largest counter generate_slug_for_model looks for with a single query
+SLUG_COUNTER_MAX_DIGITS = 9
+
+# The number of times a slug is generated again when another object got it while saving
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+
 def generate_slug_for_model(model, instance: "models.Model") -> str:
     """
     Generate a slug value for a specific instance. It is made to avoid duplicates, as slugs are unique. \
     In case of two instance having the same slug_value, hence the same slug, a counter is added at the end \
     of the slug.
 
+    .. note:: Slugs that could collide are loaded with a single query, then the first free counter is found in memory.
+
     :param model: the concrete model of the instance
     :type model: class
     :param instance: an instance of a ObjectWithSlugMixin
@@ -104,16 +167,51 @@ def generate_slug_for_model(model, instance: "models.Model") -> str:
     max_length = getattr(model, "_meta").get_field("slug").max_length
     slug = instance.slug = original_slug = slugify(instance.slug_generator())[:max_length]
 
+    # Slugs with a counter are truncated to keep their length: load all those that share their shortest prefix
+    prefix = original_slug[:max_length - SLUG_COUNTER_MAX_DIGITS - 1]
+    if prefix == original_slug:
+        prefix += "-"
+    # noinspection PyUnresolvedReferences
+    used_slugs = set(model.objects.filter(
+        Q(slug=original_slug) | Q(slug__startswith=prefix)
+    ).exclude(pk=instance.id).values_list("slug", flat=True))
+
     # If necessary, add an index (1, 2, etc.) to the slug field if another Resource exists
     # with the same slug
     for counter in itertools.count(1):
-        # noinspection PyUnresolvedReferences
-        if not model.objects.filter(slug=slug).exclude(pk=instance.id).exists():
+        if slug not in used_slugs:
             break  # The slug is not used by another resource
         slug = "{slug}-{counter}".format(slug=original_slug[:max_length - len(str(counter)) - 1], counter=counter)
     return slug
 
 
+def save_with_unique_slug(model, instance: "models.Model", save: Callable[..., None], *args) -> None:
+    """
+    Generate the slug of an instance, then save it. The instance is saved in a savepoint: if another object got the
+    same slug in the meantime, the unique constraint fails and a new slug is generated.
+
+    :param model: the concrete model of the instance
+    :type model: class
+    :param instance: an instance of a ObjectWithSlugMixin
+    :type instance: ObjectWithSlugMixin
+    :param save: the function that saves the instance, once its slug is set
+    :type save: Callable[..., None]
+    :param args: the arguments of the save function
+    :raises IntegrityError: when saving fails for another reason, or when no free slug was found
+    """
+    for attempt in range(1, SLUG_ALLOCATION_ATTEMPTS + 1):
+        instance.slug = generate_slug_for_model(model, instance)
+        try:
+            with transaction.atomic():
+                save(*args)
+            return
+        except IntegrityError:
+            # noinspection PyUnresolvedReferences
+            if attempt == SLUG_ALLOCATION_ATTEMPTS or \
+                    not model.objects.filter(slug=instance.slug).exclude(pk=instance.id).exists():
+                raise
+
+
 class OrderedEnum(Enum):
     """
     Special enumeration which can has ordered elements. Each literal has a weight which is used to compare with others.
@@ -270,6 +368,64 @@ class TaxonomyLevel(OrderedEnum):
         return super().value[1]
 
 
+def get_taxonomy_level_name(stored_level) -> str:
+    """
+    Get the name of a taxonomy level stored in an entity objective. Levels are stored either as literal names, or as
+    literals converted to strings (“TaxonomyLevel.KNOWLEDGE”). Entity objectives that were not reloaded may also hold
+    the literal itself.
+
+    :param stored_level: the taxonomy level, as stored in the database or as a literal
+    :type stored_level: Union[str, TaxonomyLevel]
+    :return: the name of the taxonomy level literal
+    :rtype: str
+    """
+    if isinstance(stored_level, TaxonomyLevel):
+        return stored_level.name
+    return stored_level.split(".", 1)[1] if stored_level.startswith("{}.".format(TaxonomyLevel.__name__)) \
+        else stored_level
+
+
+def fold_text(text: str) -> str:
+    """
+    Fold a text for accent and case insensitive comparisons: it is lowered, then decomposed into its canonical form
+    without the combining marks.
+
+    :param text: the text to fold
+    :type text: str
+    :return: the folded text
+    :rtype: str
+    """
+    return "".join(c for c in unicodedata.normalize("NFD", text.lower()) if unicodedata.category(c) != "Mn")
+
+
+# The length of the n-grams stored in the text index
+TRIGRAM_LENGTH = 3
+
+
+def get_trigrams(folded_text: str) -> Set[str]:
+    """
+    Get the distinct trigrams of a folded text. A text shorter than a trigram has none.
+
+    :param folded_text: the folded text
+    :type folded_text: str
+    :return: the trigrams of the text
+    :rtype: Set[str]
+    """
+    return {folded_text[i:i + TRIGRAM_LENGTH] for i in range(len(folded_text) - TRIGRAM_LENGTH + 1)}
+
+
+def get_words(folded_text: str) -> Dict[str, int]:
+    """
+    Count the words of a folded text.
+
+    :param folded_text: the folded text
+    :type folded_text: str
+    :return: the number of occurrences of each word of the text
+    :rtype: Dict[str, int]
+    """
+    return collections.Counter(re.findall(r"\w+", folded_text))
+
+
 class ObjectWithSlugMixin:
     """
     This class is obsolete but required because referenced in migrations.
@@ -303,55 +459,184 @@ PERMISSIONS_FOR_ROLE = {
     ]
 }
 
+# Every simple permission a user can get on a course, an activity or a resource. The position of a permission in this
+# tuple is its bit in permission bitmasks, which are stored in materialized permissions: new permissions must be
+# appended, never inserted nor removed.
+SIMPLE_PERMISSIONS = (
+    "view", "view_hidden", "view_similar", "add", "change", "delete", "change_privacy",
+    "view_students", "add_student", "change_student", "delete_student",
+    "view_collaborators", "add_collaborator", "change_collaborator", "delete_collaborator",
+    "add_objective", "view_objective", "delete_objective", "change_objective",
+    "view_usage", "toggle_important_question",
+)
+
+
+# The permissions authors get on their courses, activities and resources.
+AUTHOR_PERMISSIONS = [
+    # Basic CRUD actions
+    "view", "delete", "add", "change",
+    # Extra access for objects
+    "view_similar",
+    # Collaborators permissions
+    "add_collaborator", "delete_collaborator", "change_collaborator", "view_collaborators",
+    # Objective permissions
+    "add_objective", "view_objective", "delete_objective", "change_objective"
+]
+
+
+def materialized_permissions_enabled() -> bool:
+    """
+    Whether permissions on courses, activities and resources are stored in the MaterializedPermission table. This is
+    given by the “LEARNING_MATERIALIZED_PERMISSIONS” settings, and is disabled by default.
+
+    .. note:: When enabling it on an existing database, run the “rebuild_permissions” management command first.
 
-class ObjectiveManager(models.Manager):
+    :return: True if permissions are read from and stored into the MaterializedPermission table
+    :rtype: bool
     """
-    The manager that manage objectives
+    try:
+        return bool(settings.LEARNING_MATERIALIZED_PERMISSIONS)
+    except AttributeError:
+        return False
+
+
+class MembershipCacheMixin:
+    """
+    Test whether a user is related to an object through a many-to-many field, like collaborators, students or
+    validators, without loading the users: the primary keys of the related users are loaded once for each instance.
+    Mutators forget them, and so do the signal receivers of “learning.signals” when a related manager or a link
+    instance is used directly.
     """
 
-    def most_relevant_objective_for_model(self, basic_model_mixin_object) -> QuerySet:
+    def _get_member_ids(self, field_name: str) -> FrozenSet[int]:
         """
-        This method search all objectives in the database that can deal with the course/activity/resource passed in
-        parameter
-        todo: Improving the research algorithm. Refine searches
-        :param basic_model_mixin_object: BasicModelMixin instance
-        :return QuerySet(): A query-set that contains all most relevant course_objective
+        :param field_name: the name of the many-to-many field
+        :type field_name: str
+        :return: the primary keys of the users related through the field, loaded with one query the first time
+        :rtype: FrozenSet[int]
+        """
+        member_ids = self.__dict__.setdefault("_member_ids", dict())
+        if field_name not in member_ids:
+            member_ids[field_name] = frozenset(
+                getattr(self, field_name).order_by().values_list("pk", flat=True)
+            ) if self.pk is not None else frozenset()
+        return member_ids[field_name]
+
+    def _is_member(self, field_name: str, user: get_user_model()) -> bool:
+        """
+        :param field_name: the name of the many-to-many field
+        :type field_name: str
+        :param user: the user to look for, it can be anonymous
+        :type user: get_user_model()
+        :return: True if the user is related to this object through the field
+        :rtype: bool
         """
-        # A list that contains all primary keys of relevant objectives
-        objectives_primary_keys_list = []
+        return getattr(user, "pk", None) is not None and user.pk in self._get_member_ids(field_name)
 
-        def handle_objective_research(target_object):
-            objective_filtered_by_tags_in_common_with_other_entity = \
-                [obj.course_objective for obj in target_object.objects.all()
-                 if any(''.join(
-                    (c for c in unicodedata.normalize('NFD', name.lower())
-                     if unicodedata.category(c) != 'Mn')) in ''.join(
-                    (c for c in unicodedata.normalize('NFD', obj.related_entity.name.lower())
-                     if unicodedata.category(c) != 'Mn'))
-                        for name in basic_model_mixin_object.tags.names())]
-            return objective_filtered_by_tags_in_common_with_other_entity
+    def forget_members(self, *field_names: str) -> None:
+        """
+        Forget the related users loaded on this instance, so that they are loaded again when needed.
 
-        if basic_model_mixin_object.tags.all().count() > 0:
-            objective_filtered_by_tags_in_ability = \
-                [obj for obj in Objective.objects.all()
-                 if any(''.join((c for c in unicodedata.normalize('NFD', name.lower())
-                                 if unicodedata.category(c) != 'Mn')) in ''.join(
-                    (c for c in unicodedata.normalize('NFD', obj.ability.lower())
-                     if unicodedata.category(c) != 'Mn'))
-                        for name in basic_model_mixin_object.tags.names())]
+        :param field_names: the names of the many-to-many fields to forget, all of them when none is given
+        :type field_names: str
+        """
+        member_ids = self.__dict__.get("_member_ids", dict())
+        for field_name in field_names or list(member_ids.keys()):
+            member_ids.pop(field_name, None)
 
-            objectives_filtered = \
-                objective_filtered_by_tags_in_ability \
-                + handle_objective_research(CourseObjective) \
-                + handle_objective_research(ActivityObjective) \
-                + handle_objective_research(ResourceObjective)
 
-            objectives_primary_keys_list = [pk.id for pk in objectives_filtered]
+class ObjectiveManager(models.Manager):
+    """
+    The manager that manage objectives
+    """
 
-        return self.filter(pk__in=objectives_primary_keys_list)
+    def most_relevant_objective_for_model(self, basic_model_mixin_object) -> QuerySet:
+        """
+        This method search all objectives in the database that can deal with the course/activity/resource passed in
+        parameter: objectives whose ability, or the name of a course, activity or resource they are linked to, contains
+        one of the object tags, regardless of accents and case.
 
+        Texts are looked up in the IndexedText table, which is kept current by signals (see learning.signals).
 
-class Objective(models.Model):
+        :param basic_model_mixin_object: BasicModelMixin instance
+        :return QuerySet(): A query-set that contains all most relevant course_objective
+        """
+        query = Q()
+        for tag in {fold_text(name) for name in basic_model_mixin_object.tags.names()}:
+            query |= Q(pk__in=IndexedText.objects.matching(Objective, tag))
+            for entity_objective_model, entity_model, field_name in (
+                (CourseObjective, Course, "course"),
+                (ActivityObjective, Activity, "activity"),
+                (ResourceObjective, Resource, "resource"),
+            ):
+                query |= Q(pk__in=entity_objective_model.objects.filter(
+                    **{"{}__in".format(field_name): IndexedText.objects.matching(entity_model, tag)}
+                ).values("objective"))
+        return self.filter(query) if query else self.none()
+
+    def suggested_objectives_for_model(self, basic_model_mixin_object, limit: Optional[int] = None) -> List['Objective']:
+        """
+        Rank the most relevant objectives for a course, an activity or a resource, by the cosine similarity of their
+        TF-IDF vectors with the tags, name and description of the object. The words of an objective are those of its
+        ability, and of the names of the courses, activities and resources it is linked to.
+
+        Word counts are read from the text index, document frequencies are counted when ranking, so that scores never
+        rely on stale statistics.
+
+        :param basic_model_mixin_object: the course, activity or resource on which an objective is to be added
+        :type basic_model_mixin_object: BasicModelMixin
+        :param limit: the maximum number of objectives, by default the “LEARNING_SUGGESTED_OBJECTIVES_LIMIT” settings
+        :type limit: Optional[int]
+        :return: the most relevant objectives, the best one first
+        :rtype: List[Objective]
+        """
+        candidates = self.most_relevant_objective_for_model(basic_model_mixin_object)
+        objectives = list(candidates)
+        if not objectives:
+            return objectives
+
+        # The texts that describe each objective: its ability, and the names of the entities it is linked to
+        objective_content_type = ContentType.objects.get_for_model(Objective)
+        texts_of_objectives = {objective.pk: [(objective_content_type.pk, objective.pk)] for objective in objectives}
+        text_lookups = Q(content_type=objective_content_type, object_id__in=candidates.values("pk"))
+        for entity_objective_model, entity_model, field_name in (
+            (CourseObjective, Course, "course"),
+            (ActivityObjective, Activity, "activity"),
+            (ResourceObjective, Resource, "resource"),
+        ):
+            entity_content_type = ContentType.objects.get_for_model(entity_model)
+            entity_objectives = entity_objective_model.objects.filter(objective__in=candidates.values("pk"))
+            for objective_id, entity_id in entity_objectives.values_list("objective_id", "{}_id".format(field_name)):
+                texts_of_objectives[objective_id].append((entity_content_type.pk, entity_id))
+            text_lookups |= Q(content_type=entity_content_type, object_id__in=entity_objectives.values(field_name))
+        word_counts = IndexedText.objects.get_word_counts(text_lookups)
+
+        query_counts = get_words(fold_text(" ".join(itertools.chain(
+            basic_model_mixin_object.tags.names(),
+            [basic_model_mixin_object.name, basic_model_mixin_object.description]
+        ))))
+        idf = IndexedText.objects.get_inverse_document_frequencies(text_lookups, query_counts.keys())
+
+        def get_vector(counts: Dict[str, int]) -> Dict[str, float]:
+            return {word: count * idf.get(word, 0) for word, count in counts.items()}
+
+        query_vector = get_vector(query_counts)
+        query_norm = math.sqrt(sum(weight ** 2 for weight in query_vector.values()))
+        scores = dict()
+        for objective in objectives:
+            counts = collections.Counter()
+            for text_key in texts_of_objectives[objective.pk]:
+                counts.update(word_counts.get(text_key, dict()))
+            vector = get_vector(counts)
+            norm = math.sqrt(sum(weight ** 2 for weight in vector.values()))
+            dot_product = sum(weight * vector.get(word, 0) for word, weight in query_vector.items())
+            scores[objective] = dot_product / (norm * query_norm) if norm and query_norm else 0
+
+        objectives.sort(key=lambda an_objective: (-scores[an_objective], an_objective.ability, an_objective.pk))
+        return objectives[:get_suggested_objectives_limit() if limit is None else limit]
+
+
+class Objective(MembershipCacheMixin, models.Model):
     """
     The course_objective is an object which contains an ability.
     This object follow the student progression
@@ -401,12 +686,13 @@ class Objective(models.Model):
 
         :raises learning.exc.ObjectiveIsAlreadyValidated: when the student already validated this course_objective.
         """
-        student_already_validated = student in self.validators.all()
+        student_already_validated = self.has_validator(student)
         if student_already_validated:
             raise learning.exc.ObjectiveIsAlreadyValidated(
                 _("The student {student} has already validated this course_objective.") % {"student": student}
             )
         self.validations.create(student=student)
+        self.forget_members("validators")
 
     def remove_validator(self, student: get_user_model()) -> None:
         """
@@ -417,13 +703,25 @@ class Objective(models.Model):
 
         :raises learning.exc.ObjectiveIsNotValidated: when the student did not validate the course_objective.
         """
-        student_did_not_already_validate = student in self.validators.all()
+        student_did_not_already_validate = self.has_validator(student)
         if not student_did_not_already_validate:
             raise learning.exc.ObjectiveIsNotValidated(
                 _("The student %(student)s has not validated this course_objective yet.It cannot be removed "
                   "from students that validated the course_objective.") % {"student": student}
             )
         self.validations.filter(student=student).delete()
+        self.forget_members("validators")
+
+    def has_validator(self, student: get_user_model()) -> bool:
+        """
+        Check whether a student validated the objective, without loading the validators.
+
+        :param student: the student, it can be anonymous
+        :type student: get_user_model()
+        :return: True if the student validated the objective
+        :rtype: bool
+        """
+        return self._is_member("validators", student)
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None) -> None:
         """
@@ -434,8 +732,7 @@ class Objective(models.Model):
             raise learning.exc.ObjectiveAlreadyExists(
                 _("The course_objective that you are trying to create already exists.")
             )
-        self.slug = generate_slug_for_model(Objective, self)
-        super().save(force_insert, force_update, using, update_fields)
+        save_with_unique_slug(Objective, self, super().save, force_insert, force_update, using, update_fields)
 
     def __str__(self):
         return self.ability
@@ -477,8 +774,9 @@ class ValidationOnObjective(models.Model):
         """
         save() method is overridden to generate the slug field.
         """
-        self.slug = generate_slug_for_model(ValidationOnObjective, self)
-        super().save(force_insert, force_update, using, update_fields)
+        save_with_unique_slug(
+            ValidationOnObjective, self, super().save, force_insert, force_update, using, update_fields
+        )
 
 
 # noinspection PyAbstractClass
@@ -513,6 +811,50 @@ class BasicModelManager(models.Manager):
         :rtype: QuerySet
         """
 
+    @abc.abstractmethod
+    def _visible_to_q(self, user: get_user_model()) -> Q:
+        """
+        The access rules of the BasicModel, as a Q expression that selects instances the user can view.
+
+        :param user: the user for which to express the access rules
+        :type user: get_user_model()
+        :return: the Q expression matching the instances the user can view
+        :rtype: Q
+        """
+
+    def _author_or_collaborator_q(self, user: get_user_model(), max_access: OrderedEnum) -> Q:
+        """
+        The Q expression that selects instances written by the user or on which the user collaborates, while the
+        access of the instance still allows collaborators to view it.
+
+        :param user: the author or collaborator
+        :type user: get_user_model()
+        :param max_access: the most restrictive access for which collaborators can still view the instance
+        :type max_access: OrderedEnum
+        :return: the Q expression matching instances written by the user or on which the user collaborates
+        :rtype: Q
+        """
+        related_name = self.model.__name__.lower()
+        return Q(author=user) | Q(
+            access_level__lte=max_access.weight,
+            pk__in=self.model.collaborators.through.objects.filter(collaborator=user).order_by().values(related_name)
+        )
+
+    def visible_to(self, user: get_user_model(), **kwargs) -> QuerySet:
+        """
+        Get all objects the user can view, the access rules being evaluated by the database. This is equivalent to
+        filtering all objects on their “view” permission, but allows filtering and pagination to happen in SQL.
+
+        :param user: the user for which to get visible objects, it can be anonymous
+        :type user: get_user_model()
+        :param kwargs: kwargs that can contain a key “query” to filter name and description
+        :type kwargs: dict
+        :return: all objects visible by the user
+        :rtype: QuerySet
+        """
+        qs = super().get_queryset().filter(self._visible_to_q(user))
+        return self._filter_with_query(qs, kwargs.get("query", ""))
+
     # noinspection PyMethodMayBeStatic
     def _filter_with_query(self, queryset: QuerySet, query: str) -> QuerySet:
         """
@@ -527,7 +869,7 @@ class BasicModelManager(models.Manager):
         :return: a new queryset based on the original but filtered using the query parameter
         :rtype: QuerySet
         """
-        if queryset and query:
+        if query:
             queryset = queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
         return queryset
 
@@ -594,10 +936,15 @@ class BasicModelManager(models.Manager):
         return super().get_queryset().filter(favourite_for=user, students=user)
 
 
-class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
+class BasicModelMixin(MembershipCacheMixin, ObjectPermissionManagerMixin, models.Model):
     """
     This is the basic model used in Course, Resource and Activity. This groups fields in common.
     """
+    simple_permissions = SIMPLE_PERMISSIONS
+
+    # The ordered enumeration of each enumeration field that has an ordinal column named “<field>_level”. The ordinal
+    # columns store the weights of the enumeration literals, so that accesses can be filtered by range in SQL.
+    ordinal_fields: Dict[str, Type[OrderedEnum]] = dict()
 
     @property
     @abc.abstractmethod
@@ -656,6 +1003,26 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
     # noinspection PyArgumentEqualDefault
     updated = models.DateTimeField(auto_now_add=False, auto_now=True, verbose_name=_("Last updated the…"))
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        save() method is overridden to keep the ordinal columns in sync with their enumeration fields, and to forget
+        the permissions computed in the current request, as the author, access or state may have changed.
+
+        .. caution:: “QuerySet.update” does not call this method: update the ordinal columns along with the enumeration
+                     fields when using it.
+        """
+        for field_name, enum in self.ordinal_fields.items():
+            literal = getattr(self, field_name)
+            if not isinstance(literal, enum):
+                literal = enum[literal]
+            setattr(self, "{}_level".format(field_name), literal.weight)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            update_fields |= {"{}_level".format(field_name) for field_name in self.ordinal_fields
+                              if field_name in update_fields}
+        super().save(force_insert, force_update, using, update_fields)
+        invalidate_permissions_cache()
+
     def slug_generator(self) -> str:
         """
         Get the slug generator for this entity. It is the attribute that will be used to generate the object slug.
@@ -716,7 +1083,7 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
         :return: the newly created collaborator instance
         :rtype: ObjectCollaboratorMixin
         """
-        user_is_collaborator = collaborator in self.collaborators.all()
+        user_is_collaborator = self.has_collaborator(collaborator)
         user_is_author = collaborator == self.author
         if user_is_author:
             raise learning.exc.UserIsAlreadyAuthor(
@@ -730,7 +1097,10 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
                   "Maybe you just want to change its role?")
                 % {"object": _(self.__class__.__name__.lower()), "user": collaborator}
             )
-        return self.object_collaborators.create(collaborator=collaborator, role=role.name)
+        object_collaborator = self.object_collaborators.create(collaborator=collaborator, role=role.name)
+        self.forget_members("collaborators")
+        invalidate_permissions_cache()
+        return object_collaborator
 
     def remove_collaborator(self, collaborator: get_user_model()) -> None:
         """
@@ -741,13 +1111,26 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
         :param collaborator: the collaborator to remove from the object
         :type collaborator: get_user_model()
         """
-        user_is_collaborator = collaborator in self.collaborators.all()
+        user_is_collaborator = self.has_collaborator(collaborator)
         if not user_is_collaborator:
             raise learning.exc.UserNotCollaboratorError(
                 _("The user “%(user)s” is not already a collaborator on this %(object)s.")
                 % {"object": _(self.__class__.__name__.lower()), "user": collaborator}
             )
         self.object_collaborators.filter(collaborator=collaborator).delete()
+        self.forget_members("collaborators")
+        invalidate_permissions_cache()
+
+    def has_collaborator(self, user: get_user_model()) -> bool:
+        """
+        Check whether a user collaborates on the object, without loading the collaborators.
+
+        :param user: the user, it can be anonymous
+        :type user: get_user_model()
+        :return: True if the user collaborates on the object, whatever their role
+        :rtype: bool
+        """
+        return self._is_member("collaborators", user)
 
     def change_collaborator_role(self, collaborator: get_user_model(), role: CollaboratorRole) -> None:
         """
@@ -760,7 +1143,7 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
         :param role: the new role for the collaborator
         :type role: CollaboratorRole
         """
-        user_is_collaborator = collaborator in self.collaborators.all()
+        user_is_collaborator = self.has_collaborator(collaborator)
         if not user_is_collaborator:
             raise learning.exc.UserNotCollaboratorError(
                 _("The user “%(user)s” does not collaborates on this %(object)s. "
@@ -768,21 +1151,96 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
                 % {"object": _(self.__class__.__name__.lower()), "user": collaborator}
             )
         self.object_collaborators.filter(collaborator=collaborator).update(role=role.name)
+        # Updating the role does not send any signal
+        if materialized_permissions_enabled():
+            MaterializedPermission.objects.forget_user(collaborator.pk)
+        invalidate_permissions_cache()
+
+    def _load_user_perms_mask(self, user: get_user_model()) -> int:
+        if materialized_permissions_enabled() and getattr(user, "pk", None) is not None:
+            return MaterializedPermission.objects.load([self], user)[self]
+        return super()._load_user_perms_mask(user)
+
+    @classmethod
+    def _bulk_load_user_perms_mask(cls, objects: List["BasicModelMixin"],
+                                   user: get_user_model()) -> Dict["BasicModelMixin", int]:
+        if materialized_permissions_enabled() and getattr(user, "pk", None) is not None:
+            return MaterializedPermission.objects.load(objects, user)
+        return super()._bulk_load_user_perms_mask(objects, user)
+
+    def get_collaborator_role(self, user: get_user_model()) -> Optional[str]:
+        """
+        Get the role of a user on this object.
+
+        :param user: the user for which to get the role, it can be anonymous
+        :type user: get_user_model()
+        :return: the role name, or None if the user does not collaborate on this object
+        :rtype: Optional[str]
+        """
+        return self._get_collaborator_role(user)
+
+    def _get_collaborator_role(self, user: get_user_model()) -> Optional[str]:
+        """
+        Get the role of a user on this object.
+
+        :param user: the user for which to get the role
+        :type user: get_user_model()
+        :return: the role name, or None if the user does not collaborate on this object
+        :rtype: Optional[str]
+        """
+        if getattr(user, "pk", None) is None:
+            return None
+        return self.object_collaborators.filter(collaborator=user).order_by().values_list("role", flat=True).first()
+
+    @classmethod
+    def _get_collaborator_roles(cls, objects: List["BasicModelMixin"], user: get_user_model()) -> Dict[int, str]:
+        """
+        Get the role of a user on many objects of this type, using a single query.
+
+        :param objects: the objects on which to get the role
+        :type objects: List[BasicModelMixin]
+        :param user: the user for which to get the roles
+        :type user: get_user_model()
+        :return: the role names, indexed by the primary key of objects on which the user collaborates
+        :rtype: Dict[int, str]
+        """
+        if getattr(user, "pk", None) is None:
+            return dict()
+        related_name = cls.__name__.lower()
+        # noinspection PyUnresolvedReferences
+        return dict(
+            cls.collaborators.through.objects.filter(
+                **{"{}__in".format(related_name): objects, "collaborator": user}
+            ).order_by().values_list("{}_id".format(related_name), "role")
+        )
 
     def _get_user_perms(self, user: get_user_model()) -> Set[str]:
-        permissions = set()
-        if user == self.author:
-            permissions.update([
-                # Basic CRUD actions
-                "view", "delete", "add", "change",
-                # Extra access for objects
-                "view_similar",
-                # Collaborators permissions
-                "add_collaborator", "delete_collaborator", "change_collaborator", "view_collaborators",
-                # Objective permissions
-                "add_objective", "view_objective", "delete_objective", "change_objective"
-            ])
-        return permissions
+        return self._decode_perms(self._get_user_perms_mask(user))
+
+    def _get_user_perms_mask(self, user: get_user_model()) -> int:
+        return self._get_author_perms_mask(user)
+
+    def _is_author(self, user: get_user_model()) -> bool:
+        """
+        Check whether the user wrote this object, without querying the database.
+
+        :param user: the user to check, it can be anonymous
+        :type user: get_user_model()
+        :return: True if the user is the author of this object
+        :rtype: bool
+        """
+        return getattr(user, "pk", None) is not None and user.pk == self.author_id
+
+    def _get_author_perms_mask(self, user: get_user_model()) -> int:
+        """
+        Get the permissions a user has on this object as its author.
+
+        :param user: the user for which to get permissions
+        :type user: get_user_model()
+        :return: the author permissions bitmask if the user is the author of this object, 0 otherwise
+        :rtype: int
+        """
+        return AUTHOR_PERMISSIONS_MASK if self._is_author(user) else 0
 
     def clean(self) -> None:
         """
@@ -837,6 +1295,15 @@ class BasicModelMixin(ObjectPermissionManagerMixin, models.Model):
         abstract = True
 
 
+# Bitmasks of the permissions given by roles and authorship, computed once for all BasicModelMixin subclasses
+PERMISSION_MASKS_FOR_ROLE = {
+    role: BasicModelMixin._encode_perms(permissions) for role, permissions in PERMISSIONS_FOR_ROLE.items()
+}
+AUTHOR_PERMISSIONS_MASK = BasicModelMixin._encode_perms(AUTHOR_PERMISSIONS)
+VIEW_PERMISSION_MASK = BasicModelMixin._encode_perms(["view"])
+USAGE_PERMISSIONS_MASK = BasicModelMixin._encode_perms(["view_usage", "toggle_important_question"])
+
+
 def extract_all_included_objects(base_object: BasicModelMixin) -> Generator[BasicModelMixin, None, None]:
     """
     This generator return iteratively every included objects, whatever the depth is.
@@ -846,6 +1313,10 @@ def extract_all_included_objects(base_object: BasicModelMixin) -> Generator[Basi
     :return: a generator of included objects
     :rtype: Generator[BasicModelMixin, None, None]
     """
+    if isinstance(base_object, Course):
+        # The whole content of a course is loaded at once, instead of one query for each activity
+        yield from CourseTree.load(base_object).included_objects
+        return
     for an_object in base_object.linked_objects:
         for linked_object in extract_all_included_objects(an_object):
             yield linked_object
@@ -898,8 +1369,21 @@ class ResourceManager(BasicModelManager):
     # noinspection PyMissingOrEmptyDocstring
     def public(self, **kwargs) -> QuerySet:
         return self._filter_with_query(
-            super().get_queryset().filter(access=ResourceAccess.PUBLIC.name), kwargs.get("query", "")
+            super().get_queryset().filter(access_level=ResourceAccess.PUBLIC.weight), kwargs.get("query", "")
+        )
+
+    # noinspection PyMissingOrEmptyDocstring
+    def _visible_to_q(self, user: get_user_model()) -> Q:
+        # Resources are visible to those who can view one of the activities that use them
+        visible = Q(access_level=ResourceAccess.PUBLIC.weight) | Q(
+            access_level=ResourceAccess.EXISTING_ACTIVITIES.weight,
+            pk__in=Activity.resources.through.objects.filter(
+                activity__in=Activity.objects.visible_to(user).order_by().values("pk")
+            ).values("resource")
         )
+        if getattr(user, "pk", None) is not None:
+            visible |= self._author_or_collaborator_q(user, ResourceAccess.COLLABORATORS_ONLY)
+        return visible
 
     def recommendations_for(self, user: get_user_model(), **kwargs) -> QuerySet:
         """
@@ -917,7 +1401,7 @@ class ResourceManager(BasicModelManager):
         """
         qs = super().get_queryset() \
             .exclude(Q(author=user) | Q(collaborators=user)) \
-            .filter(Q(reuse=ResourceReuse.NO_RESTRICTION.name) & Q(access=ResourceAccess.PUBLIC.name))
+            .filter(reuse_level=ResourceReuse.NO_RESTRICTION.weight, access_level=ResourceAccess.PUBLIC.weight)
         return self._filter_with_query(qs, kwargs.get("query", ""))
 
     def reusable(self, activity: "Activity", user: get_user_model(), **kwargs) -> QuerySet:
@@ -933,11 +1417,11 @@ class ResourceManager(BasicModelManager):
         """
         qs = super().get_queryset().exclude(
             activities=activity
-        ).exclude(
-            reuse=ResourceReuse.NON_REUSABLE.name
-        ).exclude(
-            Q(reuse=ResourceReuse.ONLY_AUTHOR.name) & ~Q(author=user)
-            # Resources that can be reused by their author
+        ).filter(
+            # Resources that can be reused by anyone, or by their author
+            Q(reuse_level__lt=ResourceReuse.ONLY_AUTHOR.weight) | Q(
+                reuse_level__lt=ResourceReuse.NON_REUSABLE.weight, author=user
+            )
         )
         return self._filter_with_query(qs, kwargs.get("query", ""))
 
@@ -958,6 +1442,8 @@ class Resource(BasicModelMixin):
     """
     The resource object: this object may contained an attached resource which include educative material.
     """
+    ordinal_fields = {"access": ResourceAccess, "reuse": ResourceReuse}
+
     type = models.CharField(
         max_length=10,
         choices=[(rtype.name, rtype.value) for rtype in ResourceType],
@@ -1012,6 +1498,20 @@ class Resource(BasicModelMixin):
         help_text=_("Whether you want the resource to be reusable in an activity created by other users."
                     " Resources can be fully reusable, only by you or not reusable")
     )
+    access_level = models.PositiveSmallIntegerField(
+        default=ResourceAccess.PUBLIC.weight,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Access level"),
+        help_text=_("The weight of the resource access, kept in sync with it to filter by range")
+    )
+    reuse_level = models.PositiveSmallIntegerField(
+        default=ResourceReuse.ONLY_AUTHOR.weight,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Reuse level"),
+        help_text=_("The weight of the resource reuse, kept in sync with it to filter by range")
+    )
     attachment = models.FileField(
         blank=True, null=True,
         verbose_name=_("File"),
@@ -1048,12 +1548,12 @@ class Resource(BasicModelMixin):
         return self.resource_objectives
 
     @property
-    def linked_objects(self) -> None:
+    def linked_objects(self) -> Generator[BasicModelMixin, None, None]:
         """
         A resource does not have any linked object.
-        :return: None
+        :return: an empty generator
         """
-        yield
+        yield from ()
 
     def is_reusable(self, for_activity=None) -> bool:
         """
@@ -1128,16 +1628,21 @@ class Resource(BasicModelMixin):
         """
         save() method is overridden to generate the slug field.
         """
-        self.slug = generate_slug_for_model(Resource, self)
+        parent_save = super().save
 
-        # This code ensures that it is possible to use resource id in the upload_to function
-        if not self.id and self.attachment:
-            saved_attachment = self.attachment
-            self.attachment = None
-            super().save(force_insert, force_update, using, update_fields)
-            self.attachment = saved_attachment  # calling save(…) once again will allow upload_to to know id
+        def save_resource():
+            # This code ensures that it is possible to use resource id in the upload_to function
+            if not self.id and self.attachment:
+                saved_attachment = self.attachment
+                self.attachment = None
+                try:
+                    parent_save(force_insert, force_update, using, update_fields)
+                finally:
+                    self.attachment = saved_attachment  # calling save(…) once again will allow upload_to to know id
 
-        super().save(force_insert, force_update, using, update_fields)
+            parent_save(force_insert, force_update, using, update_fields)
+
+        save_with_unique_slug(Resource, self, save_resource)
 
     def delete(self, using=None, keep_parents=False):
         """
@@ -1153,21 +1658,57 @@ class Resource(BasicModelMixin):
                 )
         return super().delete()
 
-    def _get_user_perms(self, user: get_user_model()) -> Set[str]:
-        permissions = super()._get_user_perms(user)
-        if self.author == user:
-            permissions.update(["view_usage", "toggle_important_question"])
-        if self.access == ResourceAccess.PUBLIC.name:
-            permissions.update(["view"])
+    def _get_user_perms_mask(self, user: get_user_model()) -> int:
+        visible_in_activities = False
         if self.access == ResourceAccess.EXISTING_ACTIVITIES.name:
-            activities_with_this_resource = Activity.objects.filter(resources=self).all()
-            for activity in activities_with_this_resource:
-                # If able to see one of the linked course, it’s ok to view the activity
-                if "view_activity" in activity.get_user_perms(user):
-                    permissions.update(["view"])
-                    break
-        if user in self.collaborators.all() and ResourceAccess[self.access] <= ResourceAccess.COLLABORATORS_ONLY:
-            permissions.update(PERMISSIONS_FOR_ROLE.get(self.object_collaborators.get(collaborator=user).role, set()))
+            # If able to see one of the linked activities, it’s ok to view the resource
+            visible_in_activities = Activity.objects.visible_to(user).filter(resources=self).exists()
+        return self._compute_user_perms_mask(user, self._get_collaborator_role(user), visible_in_activities)
+
+    @classmethod
+    def _bulk_get_user_perms_mask(cls, resources: List["Resource"], user: get_user_model()) -> Dict["Resource", int]:
+        roles = cls._get_collaborator_roles(resources, user)
+        visible_in_activities = set()
+        resources_in_activities = [
+            resource for resource in resources if resource.access == ResourceAccess.EXISTING_ACTIVITIES.name
+        ]
+        if resources_in_activities:
+            # noinspection PyUnresolvedReferences
+            visible_in_activities = set(
+                Activity.resources.through.objects.filter(
+                    resource__in=resources_in_activities,
+                    activity__in=Activity.objects.visible_to(user).order_by().values("pk")
+                ).values_list("resource_id", flat=True)
+            )
+        return {
+            resource: resource._compute_user_perms_mask(
+                user, roles.get(resource.pk), resource.pk in visible_in_activities
+            )
+            for resource in resources
+        }
+
+    def _compute_user_perms_mask(self, user: get_user_model(), role: Optional[str], visible_in_activities: bool) -> int:
+        """
+        Compute the permissions bitmask of a user on this resource, once the related data is known.
+
+        :param user: the user for which to compute permissions
+        :type user: get_user_model()
+        :param role: the role of the user on the resource, None if the user does not collaborate on it
+        :type role: Optional[str]
+        :param visible_in_activities: whether the user can view one of the activities that use this resource
+        :type visible_in_activities: bool
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        permissions = self._get_author_perms_mask(user)
+        if permissions:
+            permissions |= USAGE_PERMISSIONS_MASK
+        if self.access == ResourceAccess.PUBLIC.name:
+            permissions |= VIEW_PERMISSION_MASK
+        if self.access == ResourceAccess.EXISTING_ACTIVITIES.name and visible_in_activities:
+            permissions |= VIEW_PERMISSION_MASK
+        if role is not None and ResourceAccess[self.access] <= ResourceAccess.COLLABORATORS_ONLY:
+            permissions |= PERMISSION_MASKS_FOR_ROLE.get(role, 0)
         return permissions
 
     def __str__(self):
@@ -1187,9 +1728,22 @@ class ActivityManager(BasicModelManager):
     # noinspection PyMissingOrEmptyDocstring
     def public(self, **kwargs) -> QuerySet:
         return self._filter_with_query(
-            super().get_queryset().filter(access=ActivityAccess.PUBLIC.name), kwargs.get("query", "")
+            super().get_queryset().filter(access_level=ActivityAccess.PUBLIC.weight), kwargs.get("query", "")
         )
 
+    # noinspection PyMissingOrEmptyDocstring
+    def _visible_to_q(self, user: get_user_model()) -> Q:
+        # Activities are visible to those who can view one of the courses that use them
+        visible = Q(access_level=ActivityAccess.PUBLIC.weight) | Q(
+            access_level=ActivityAccess.EXISTING_COURSES.weight,
+            pk__in=CourseActivity.objects.filter(
+                course__in=Course.objects.visible_to(user).order_by().values("pk")
+            ).order_by().values("activity")
+        )
+        if getattr(user, "pk", None) is not None:
+            visible |= self._author_or_collaborator_q(user, ActivityAccess.COLLABORATORS_ONLY)
+        return visible
+
     def recommendations_for(self, user: get_user_model(), **kwargs) -> QuerySet:
         """
         Get all activities opened for registration and recommended for a user
@@ -1205,8 +1759,8 @@ class ActivityManager(BasicModelManager):
         :rtype: QuerySet
         """
         qs = super().get_queryset() \
-            .exclude(Q(students=user) | Q(author=user) | Q(collaborators=user)) \
-            .filter(Q(state=ActivityReuse.NO_RESTRICTION.name) & Q(access=ActivityAccess.PUBLIC.name))
+            .exclude(Q(author=user) | Q(collaborators=user)) \
+            .filter(reuse_level=ActivityReuse.NO_RESTRICTION.weight, access_level=ActivityAccess.PUBLIC.weight)
         return self._filter_with_query(qs, kwargs.get("query", ""))
 
     def reusable(self, course: "Course", user: get_user_model(), **kwargs) -> QuerySet:
@@ -1225,12 +1779,11 @@ class ActivityManager(BasicModelManager):
         qs = super().get_queryset().exclude(
             # activities already linked with the course
             course_activities__course=course
-        ).exclude(
-            # activities that are not reusable
-            reuse=ActivityReuse.NON_REUSABLE.name,
-        ).exclude(
-            # activities that can only be reused by their respective authors
-            Q(reuse=ActivityReuse.ONLY_AUTHOR.name) & ~Q(author=user)
+        ).filter(
+            # activities that can be reused by anyone, or only by their respective authors
+            Q(reuse_level__lt=ActivityReuse.ONLY_AUTHOR.weight) | Q(
+                reuse_level__lt=ActivityReuse.NON_REUSABLE.weight, author=user
+            )
         )
         return self._filter_with_query(qs, kwargs.get("query", ""))
 
@@ -1239,6 +1792,8 @@ class Activity(BasicModelMixin):
     """
     The activity object: it is aggregated in courses and aggregates resources.
     """
+    ordinal_fields = {"access": ActivityAccess, "reuse": ActivityReuse}
+
     access = models.CharField(
         max_length=20,
         choices=[(access.name, access.value) for access in ActivityAccess],
@@ -1256,6 +1811,20 @@ class Activity(BasicModelMixin):
             "Whether you want the activity to be reusable in courses made by other users."
             " Activities can be fully reusable, only by you or not reusable")
     )
+    access_level = models.PositiveSmallIntegerField(
+        default=ActivityAccess.PUBLIC.weight,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Access level"),
+        help_text=_("The weight of the activity access, kept in sync with it to filter by range")
+    )
+    reuse_level = models.PositiveSmallIntegerField(
+        default=ActivityReuse.ONLY_AUTHOR.weight,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Reuse level"),
+        help_text=_("The weight of the activity reuse, kept in sync with it to filter by range")
+    )
     author = models.ForeignKey(
         get_user_model(),
         on_delete=models.CASCADE,
@@ -1395,24 +1964,56 @@ class Activity(BasicModelMixin):
         """
         save() method is overridden to generate the slug field.
         """
-        self.slug = generate_slug_for_model(Activity, self)
-        super().save(force_insert, force_update, using, update_fields)
+        save_with_unique_slug(Activity, self, super().save, force_insert, force_update, using, update_fields)
 
-    def _get_user_perms(self, user: get_user_model()) -> Set[str]:
-        permissions = super()._get_user_perms(user)
-        if self.author == user:
-            permissions.update(["view_usage", "toggle_important_question"])
-        if self.access == ActivityAccess.PUBLIC.name:
-            permissions.update(["view"])
+    def _get_user_perms_mask(self, user: get_user_model()) -> int:
+        visible_in_courses = False
         if self.access == ActivityAccess.EXISTING_COURSES.name:
-            courses_with_this_activity = Course.objects.filter(course_activities__activity=self).all()
-            for course in courses_with_this_activity:
-                # If able to see one of the linked course, it’s ok to view the activity
-                if "view_course" in course.get_user_perms(user):
-                    permissions.update(["view"])
-                    break
-        if user in self.collaborators.all() and ActivityAccess[self.access] <= ActivityAccess.COLLABORATORS_ONLY:
-            permissions.update(PERMISSIONS_FOR_ROLE.get(self.object_collaborators.get(collaborator=user).role, set()))
+            # If able to see one of the linked course, it’s ok to view the activity
+            visible_in_courses = Course.objects.visible_to(user).filter(course_activities__activity=self).exists()
+        return self._compute_user_perms_mask(user, self._get_collaborator_role(user), visible_in_courses)
+
+    @classmethod
+    def _bulk_get_user_perms_mask(cls, activities: List["Activity"], user: get_user_model()) -> Dict["Activity", int]:
+        roles = cls._get_collaborator_roles(activities, user)
+        visible_in_courses = set()
+        activities_in_courses = [
+            activity for activity in activities if activity.access == ActivityAccess.EXISTING_COURSES.name
+        ]
+        if activities_in_courses:
+            visible_in_courses = set(
+                CourseActivity.objects.filter(
+                    activity__in=activities_in_courses,
+                    course__in=Course.objects.visible_to(user).order_by().values("pk")
+                ).values_list("activity_id", flat=True)
+            )
+        return {
+            activity: activity._compute_user_perms_mask(user, roles.get(activity.pk), activity.pk in visible_in_courses)
+            for activity in activities
+        }
+
+    def _compute_user_perms_mask(self, user: get_user_model(), role: Optional[str], visible_in_courses: bool) -> int:
+        """
+        Compute the permissions bitmask of a user on this activity, once the related data is known.
+
+        :param user: the user for which to compute permissions
+        :type user: get_user_model()
+        :param role: the role of the user on the activity, None if the user does not collaborate on it
+        :type role: Optional[str]
+        :param visible_in_courses: whether the user can view one of the courses that use this activity
+        :type visible_in_courses: bool
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        permissions = self._get_author_perms_mask(user)
+        if permissions:
+            permissions |= USAGE_PERMISSIONS_MASK
+        if self.access == ActivityAccess.PUBLIC.name:
+            permissions |= VIEW_PERMISSION_MASK
+        if self.access == ActivityAccess.EXISTING_COURSES.name and visible_in_courses:
+            permissions |= VIEW_PERMISSION_MASK
+        if role is not None and ActivityAccess[self.access] <= ActivityAccess.COLLABORATORS_ONLY:
+            permissions |= PERMISSION_MASKS_FOR_ROLE.get(role, 0)
         return permissions
 
     def __str__(self):
@@ -1424,22 +2025,100 @@ class Activity(BasicModelMixin):
         verbose_name_plural = pgettext_lazy("Activity verbose name (plural form)", "activities")
 
 
+class CourseQuerySet(QuerySet):
+    """
+    The Course specific QuerySet, so that user specific data can be added to any selection of courses.
+    """
+
+    def with_user_context(self, user: get_user_model()) -> "CourseQuerySet":
+        """
+        Annotate each course with the relation a user has with it, so that list pages do not run queries for each
+        course. Courses are annotated with:
+
+        * is_favourite: whether the user set the course as a favourite
+        * is_student: whether the user is registered on the course
+        * collaborator_role: the name of the role of the user on the course, None if the user does not collaborate
+        * student_count and activity_count: the number of students and activities of the course
+        * context_user_id: the primary key of the user, None if anonymous
+
+        “Course.has_student”, “Course.has_collaborator”, “Course.is_favourite_for” and the permissions of the user
+        are then read from these annotations.
+
+        :param user: the user for which to annotate courses, it can be anonymous
+        :type user: get_user_model()
+        :return: the annotated courses
+        :rtype: CourseQuerySet
+        """
+        user_id = getattr(user, "pk", None)
+        counts = {
+            "student_count": Coalesce(Subquery(
+                RegistrationOnCourse.objects.filter(course=OuterRef("pk")).order_by().values("course")
+                .annotate(count=Count("pk")).values("count"), output_field=IntegerField()
+            ), 0),
+            "activity_count": Coalesce(Subquery(
+                CourseActivity.objects.filter(course=OuterRef("pk")).order_by().values("course")
+                .annotate(count=Count("pk")).values("count"), output_field=IntegerField()
+            ), 0),
+        }
+        if user_id is None:
+            return self.annotate(
+                is_favourite=Value(False, output_field=models.BooleanField()),
+                is_student=Value(False, output_field=models.BooleanField()),
+                collaborator_role=Value(None, output_field=models.CharField()),
+                context_user_id=Value(None, output_field=IntegerField()),
+                **counts
+            )
+        return self.annotate(
+            is_favourite=Exists(Course.objects.filter(pk=OuterRef("pk"), favourite_for=user_id)),
+            is_student=Exists(RegistrationOnCourse.objects.filter(course=OuterRef("pk"), student=user_id)),
+            collaborator_role=Subquery(
+                CourseCollaborator.objects.filter(course=OuterRef("pk"), collaborator=user_id).values("role")[:1]
+            ),
+            context_user_id=Value(user_id, output_field=IntegerField()),
+            **counts
+        )
+
+
 class CourseManager(BasicModelManager):
     """
-    The Course specific Model Manager.
+    The Course specific Model Manager. Its querysets are CourseQuerySet instances.
     """
+    _queryset_class = CourseQuerySet
+
+    def with_user_context(self, user: get_user_model()) -> CourseQuerySet:
+        """
+        Get all courses, annotated with the relation a user has with each of them.
+
+        .. seealso:: CourseQuerySet.with_user_context
+
+        :param user: the user for which to annotate courses, it can be anonymous
+        :type user: get_user_model()
+        :return: the annotated courses
+        :rtype: CourseQuerySet
+        """
+        return self.get_queryset().with_user_context(user)
 
     # noinspection PyMissingOrEmptyDocstring
     def public(self, **kwargs) -> QuerySet:
         return self._filter_with_query(
-            super().get_queryset().filter(access=CourseAccess.PUBLIC.name), kwargs.get("query", "")
+            super().get_queryset().filter(access_level=CourseAccess.PUBLIC.weight), kwargs.get("query", "")
         )
 
+    # noinspection PyMissingOrEmptyDocstring
+    def _visible_to_q(self, user: get_user_model()) -> Q:
+        visible = Q(access_level=CourseAccess.PUBLIC.weight)
+        if getattr(user, "pk", None) is not None:
+            visible |= self._author_or_collaborator_q(user, CourseAccess.COLLABORATORS_ONLY) | Q(
+                access_level__lte=CourseAccess.STUDENTS_ONLY.weight,
+                pk__in=RegistrationOnCourse.objects.filter(student=user).order_by().values("course")
+            )
+        return visible
+
     # noinspection PyMissingOrEmptyDocstring
     def public_without_followed_by_without_taught_by(self, student: get_user_model(), teacher: get_user_model(),
                                                      **kwargs) -> QuerySet:
         return self._filter_with_query(
-            super().get_queryset().filter(access=CourseAccess.PUBLIC.name).exclude(students=student).exclude(
+            super().get_queryset().filter(access_level=CourseAccess.PUBLIC.weight).exclude(students=student).exclude(
                 Q(author=teacher) | Q(collaborators=teacher)), kwargs.get("query", "")
         )
 
@@ -1459,9 +2138,32 @@ class CourseManager(BasicModelManager):
         """
         qs = super().get_queryset() \
             .exclude(Q(students=user) | Q(author=user) | Q(collaborators=user)) \
-            .filter(Q(state=CourseState.PUBLISHED.name) & Q(access=CourseAccess.PUBLIC.name))
+            .filter(state=CourseState.PUBLISHED.name, access_level=CourseAccess.PUBLIC.weight)
         return self._filter_with_query(qs, kwargs.get("query", ""))
 
+    def including_objective(self, objective: "Objective", user: Optional[get_user_model()] = None) -> QuerySet:
+        """
+        Get all courses that include an objective, directly or through their activities and resources. This is the
+        reverse of “Course.get_all_objectives”, selected with a single query.
+
+        :param objective: the objective to look for
+        :type objective: Objective
+        :param user: if given, only the courses this user can view are selected, it can be anonymous
+        :type user: Optional[get_user_model()]
+        :return: the courses that include the objective
+        :rtype: QuerySet
+        """
+        qs = super().get_queryset().filter(
+            Q(pk__in=CourseObjective.objects.filter(objective=objective).values("course"))
+            | Q(pk__in=CourseActivity.objects.filter(
+                activity__in=ActivityObjective.objects.filter(objective=objective).values("activity")
+            ).values("course"))
+            | Q(pk__in=CourseActivity.objects.filter(
+                activity__resources__in=ResourceObjective.objects.filter(objective=objective).values("resource")
+            ).values("course"))
+        )
+        return qs if user is None else qs.filter(self._visible_to_q(user))
+
     def followed_by(self, student: get_user_model(), **kwargs) -> QuerySet:
         """
         Get all courses followed by the student
@@ -1494,6 +2196,7 @@ class Course(BasicModelMixin):
     """
     The course, that contains activities, which are course “chapters”.
     """
+    ordinal_fields = {"access": CourseAccess}
 
     state = models.CharField(
         max_length=20,
@@ -1515,6 +2218,13 @@ class Course(BasicModelMixin):
         blank=False,
         null=False
     )
+    access_level = models.PositiveSmallIntegerField(
+        default=CourseAccess.PUBLIC.weight,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Access level"),
+        help_text=_("The weight of the course access, kept in sync with it to filter by range")
+    )
     registration_enabled = models.BooleanField(
         default=False,
         verbose_name=_("Registration enabled"),
@@ -1586,12 +2296,12 @@ class Course(BasicModelMixin):
     def clean(self):
         super().clean()
         if self.id:
-            if self.author in self.students.all():
+            if self.has_student(self.author):
                 raise ValidationError(
                     _("%(user)s is already the author of the course. The user %(user)s cannot be added as a "
                       "student.") % {"user": self.author}
                 )
-            if self.author in self.collaborators.all():
+            if self.has_collaborator(self.author):
                 raise ValidationError(
                     _("%(user)s is already the author of the course. The user %(user)s cannot be added as a "
                       "collaborator.") % {"user": self.author}
@@ -1634,9 +2344,9 @@ class Course(BasicModelMixin):
         :return: True if registration is possible
         :rtype bool
         """
-        user_is_collaborator = user in self.collaborators.all()
+        user_is_collaborator = self.has_collaborator(user)
         user_is_author = user == self.author
-        user_is_student = user in self.students.all()
+        user_is_student = self.has_student(user)
         if user_is_collaborator:
             raise learning.exc.UserIsAlreadyCollaborator(
                 _("%(user)s cannot register on this course. %(user)s is already "
@@ -1672,6 +2382,8 @@ class Course(BasicModelMixin):
         if self.__check_student_registration(student):
             # noinspection PyUnresolvedReferences
             self.registrations.create(student=student, self_registration=True)
+            self.forget_members("students")
+            invalidate_permissions_cache()
 
     def register_student(self, student: get_user_model(), registration_locked=True):
         """
@@ -1690,6 +2402,8 @@ class Course(BasicModelMixin):
         if self.__check_student_registration(student):
             # noinspection PyUnresolvedReferences
             self.registrations.create(student=student, registration_locked=registration_locked)
+            self.forget_members("students")
+            invalidate_permissions_cache()
 
     def __check_student_unsubscription(self, user: get_user_model()) -> bool:
         """
@@ -1704,7 +2418,7 @@ class Course(BasicModelMixin):
         :return: True if registration is possible
         :rtype bool
         """
-        user_is_student = user in self.students.all()
+        user_is_student = self.has_student(user)
         if not user_is_student:
             raise learning.exc.UserIsNotStudent(
                 _("User “%(user)s is not a student registered on this course. Thus %(user)s cannot be unregistered.")
@@ -1727,13 +2441,15 @@ class Course(BasicModelMixin):
                 _("Nobody can unregister from this course. Registration is disabled or the course is no longer "
                   "published.")
             )
-        if student in self.students.all() and self.registrations.get(student=student).registration_locked:
+        if self.has_student(student) and self.registrations.get(student=student).registration_locked:
             raise learning.exc.RegistrationDisabledError(
                 _("You cannot unregister from this course. Registration is locked for you.")
             )
         if self.__check_student_unsubscription(student):
             # noinspection PyUnresolvedReferences
             self.registrations.get(student=student).delete()
+            self.forget_members("students")
+            invalidate_permissions_cache()
 
     def unsubscribe_student(self, user: get_user_model()):
         """
@@ -1747,6 +2463,8 @@ class Course(BasicModelMixin):
         if self.__check_student_unsubscription(user):
             # noinspection PyUnresolvedReferences
             self.registrations.get(student=user).delete()
+            self.forget_members("students")
+            invalidate_permissions_cache()
 
     def add_collaborator(self, collaborator: get_user_model(), role: CollaboratorRole):
         """
@@ -1761,7 +2479,7 @@ class Course(BasicModelMixin):
         :param role: the role of the collaborator on the course
         :type role: CollaboratorRole
         """
-        user_is_student = collaborator in self.students.all()
+        user_is_student = self.has_student(collaborator)
         if user_is_student:
             raise learning.exc.UserIsAlreadyStudent(
                 _("%(user)s is already registered on this course.") % {"user": collaborator}
@@ -1776,39 +2494,126 @@ class Course(BasicModelMixin):
         :return: the Generator of Activity objects linked to this course.
         :rtype: Generator of CourseActivity
         """
-        for course_activity in self.course_activities.all():
+        for course_activity in self.course_activities.select_related("activity"):
             yield course_activity.activity
 
+    def _lock_course_activities(self) -> None:
+        """
+        Lock the course until the end of the current transaction, so that concurrent changes of its activities are
+        made one after the other.
+        """
+        list(Course.objects.select_for_update().filter(pk=self.pk).order_by().values_list("pk", flat=True))
+
     def reorder_course_activities(self):
         """
-        Reorder the course activities, this means updating the “rank” field in order to ensure consistency.
+        Reorder the course activities, this means updating the “rank” field in order to ensure consistency: ranks are
+        spread again, “CourseActivity.RANK_GAP” apart. Activities whose rank is already right are not updated, the
+        others are updated at once.
         """
-        ranked_activities = self.course_activities.all()
+        with transaction.atomic():
+            self._lock_course_activities()
+            CourseActivity.spread_ranks(list(self.course_activities.all()))
 
-        # Check if course activities are ordered correctly
-        in_order, rank_counter = True, 1
-        for ranked_course_activity in ranked_activities:
-            if not in_order:
-                break
-            if not ranked_course_activity.rank == rank_counter:
-                in_order = False
-            else:
-                rank_counter += 1
+    def order_activities(self, activity_ids: List[int]) -> None:
+        """
+        Set the order of all the activities of this course at once. Ranks are spread again in the given order, the
+        activities whose rank changes are updated at once.
 
-        # If not, reorder them manually
-        if not in_order:
-            new_rank = 1
-            for course_activity in ranked_activities:
-                course_activity.rank = new_rank
-                course_activity.save()
-                new_rank += 1
+        :raises ChangeActivityOnCourseError: when changing activity on the course is not possible
+        :raises CourseActivitiesOrderError: when the list does not contain every activity of the course exactly once
 
-    def add_activity(self, activity):
+        :param activity_ids: the primary keys of all the activities of the course, in their new order
+        :type activity_ids: List[int]
         """
-        Add an activity on this course.
+        if self.read_only:
+            raise learning.exc.ChangeActivityOnCourseError(
+                _("This course is read only. It is not possible to move activities."))
+        with transaction.atomic():
+            self._lock_course_activities()
+            course_activities = {
+                course_activity.activity_id: course_activity for course_activity in self.course_activities.all()
+            }
+            if len(activity_ids) != len(course_activities) or set(activity_ids) != course_activities.keys():
+                raise learning.exc.CourseActivitiesOrderError(
+                    _("The new order must contain every activity of the course exactly once.")
+                )
+            CourseActivity.spread_ranks([course_activities[activity_id] for activity_id in activity_ids])
 
-        .. note:: You do not need to save the activity before calling this method. It the resource can be added, it will
-         be saved anyway.
+    def move_activity(self, activity: "Activity", position: int) -> "CourseActivity":
+        """
+        Move an activity of this course to another position. Only the rank of the activity changes, it is set between
+        the ranks of its new neighbours. When there is no room left between them, ranks of all activities are spread
+        again first.
+
+        :raises ChangeActivityOnCourseError: when changing activity on the course is not possible
+        :raises ActivityIsNotLinkedWithThisCourseError: when activity is not linked with the course
+
+        :param activity: the activity to move
+        :type activity: Activity
+        :param position: the new position of the activity, starting at 1. It is bounded to the existing positions.
+        :type position: int
+        :return: the moved course activity
+        :rtype: CourseActivity
+        """
+        if self.read_only:
+            raise learning.exc.ChangeActivityOnCourseError(
+                _("This course is read only. It is not possible to move activities."))
+        with transaction.atomic():
+            self._lock_course_activities()
+            try:
+                course_activity = self.course_activities.get(activity=activity)
+            except CourseActivity.DoesNotExist:
+                raise learning.exc.ActivityIsNotLinkedWithThisCourseError(
+                    _("“%(activity)s is not linked with this course. Hence, it cannot be moved.")
+                    % {"activity": activity}
+                )
+            other_ranks = list(self.course_activities.exclude(pk=course_activity.pk).values_list("rank", flat=True))
+            position = min(max(position, 1), len(other_ranks) + 1)
+            rank = CourseActivity.get_rank_between(other_ranks, position)
+            if rank is None:
+                self.reorder_course_activities()
+                other_ranks = list(
+                    self.course_activities.exclude(pk=course_activity.pk).values_list("rank", flat=True)
+                )
+                rank = CourseActivity.get_rank_between(other_ranks, position)
+            course_activity.rank = rank
+            course_activity.save(update_fields=["rank"])
+        return course_activity
+
+    def move_activity_up(self, activity: "Activity") -> Optional[int]:
+        """
+        Move an activity of this course one position up. Its position is read and changed while the course is locked,
+        so that concurrent moves cannot make it skip a position.
+
+        :raises ChangeActivityOnCourseError: when changing activity on the course is not possible
+        :raises ActivityIsNotLinkedWithThisCourseError: when activity is not linked with the course
+
+        :param activity: the activity to move
+        :type activity: Activity
+        :return: the new position of the activity, starting at 1, or None if it already was the first one
+        :rtype: Optional[int]
+        """
+        with transaction.atomic():
+            self._lock_course_activities()
+            try:
+                course_activity = self.course_activities.get(activity=activity)
+            except CourseActivity.DoesNotExist:
+                raise learning.exc.ActivityIsNotLinkedWithThisCourseError(
+                    _("“%(activity)s is not linked with this course. Hence, it cannot be moved.")
+                    % {"activity": activity}
+                )
+            position = self.course_activities.filter(rank__lt=course_activity.rank).count() + 1
+            if position == 1:
+                return None
+            self.move_activity(activity, position - 1)
+        return position - 1
+
+    def add_activity(self, activity):
+        """
+        Add an activity on this course.
+
+        .. note:: You do not need to save the activity before calling this method. It the resource can be added, it will
+         be saved anyway.
 
         :raises ChangeActivityOnCourseError: when changing activity on the course is not possible
         :raises ActivityAlreadyOnCourseError: when activity is already linked with the course
@@ -1828,13 +2633,13 @@ class Course(BasicModelMixin):
                 % {"activity": activity}
             )
         if activity.is_reusable(for_course=self):
-            # TODO: rewrite this block. This is not well written and understanding is quite hard
-            last_rank = CourseActivity.objects.filter(course=self).aggregate(Max("rank")).get("rank__max", 0)
             activity.save()
-            CourseActivity.objects.create(
-                course=self, activity=activity, rank=1 if last_rank is None else last_rank + 1
-            )
-            self.reorder_course_activities()
+            with transaction.atomic():
+                self._lock_course_activities()
+                last_rank = self.course_activities.aggregate(Max("rank")).get("rank__max")
+                CourseActivity.objects.create(
+                    course=self, activity=activity, rank=(last_rank or 0) + CourseActivity.RANK_GAP
+                )
 
     def remove_activity(self, activity: Activity):
         """
@@ -1855,7 +2660,6 @@ class Course(BasicModelMixin):
                 % {"activity": activity}
             )
         CourseActivity.objects.filter(course=self, activity=activity).get().delete()
-        self.reorder_course_activities()
 
     @property
     def read_only(self) -> bool:
@@ -1871,46 +2675,146 @@ class Course(BasicModelMixin):
         """
         save() method is overridden to generate the slug field.
         """
-        self.slug = generate_slug_for_model(Course, self)
-        super().save(force_insert, force_update, using, update_fields)
+        save_with_unique_slug(Course, self, super().save, force_insert, force_update, using, update_fields)
 
-    def _get_user_perms(self, user: get_user_model()) -> Set[str]:
-        permissions = super()._get_user_perms(user)
+    def _has_user_context(self, user: get_user_model()) -> bool:
+        """
+        :param user: the user, it can be anonymous
+        :type user: get_user_model()
+        :return: True if this course was annotated for the user by “CourseQuerySet.with_user_context”
+        :rtype: bool
+        """
+        return getattr(user, "pk", None) is not None and self.__dict__.get("context_user_id") == user.pk
+
+    def forget_members(self, *field_names: str) -> None:
+        # The annotations of the user context are outdated as well
+        self.__dict__.pop("context_user_id", None)
+        super().forget_members(*field_names)
+
+    def has_student(self, user: get_user_model()) -> bool:
+        """
+        Check whether a user is registered on the course, without loading the students.
+
+        :param user: the user, it can be anonymous
+        :type user: get_user_model()
+        :return: True if the user is a student of the course
+        :rtype: bool
+        """
+        if self._has_user_context(user):
+            return self.is_student
+        return self._is_member("students", user)
+
+    # noinspection PyMissingOrEmptyDocstring
+    def has_collaborator(self, user: get_user_model()) -> bool:
+        if self._has_user_context(user):
+            return self.collaborator_role is not None
+        return super().has_collaborator(user)
+
+    def _get_collaborator_role(self, user: get_user_model()) -> Optional[str]:
+        if self._has_user_context(user):
+            return self.collaborator_role
+        return super()._get_collaborator_role(user)
+
+    def is_favourite_for(self, user: get_user_model()) -> bool:
+        """
+        Check whether a user set the course as a favourite.
+
+        :param user: the user, it can be anonymous
+        :type user: get_user_model()
+        :return: True if the course is a favourite of the user
+        :rtype: bool
+        """
+        if self._has_user_context(user):
+            return self.is_favourite
+        return getattr(user, "pk", None) is not None and self.favourite_for.filter(pk=user.pk).exists()
+
+    @property
+    def nb_activities(self) -> int:
+        """
+        :return: the number of activities of the course, annotated by “CourseQuerySet.with_user_context” if possible
+        :rtype: int
+        """
+        activity_count = self.__dict__.get("activity_count")
+        return self.course_activities.count() if activity_count is None else activity_count
+
+    @property
+    def nb_students(self) -> int:
+        """
+        :return: the number of students of the course, annotated by “CourseQuerySet.with_user_context” if possible
+        :rtype: int
+        """
+        student_count = self.__dict__.get("student_count")
+        return self.registrations.count() if student_count is None else student_count
+
+    def _get_user_perms_mask(self, user: get_user_model()) -> int:
+        return self._compute_user_perms_mask(user, self._get_collaborator_role(user), self.has_student(user))
+
+    @classmethod
+    def _bulk_get_user_perms_mask(cls, courses: List["Course"], user: get_user_model()) -> Dict["Course", int]:
+        roles = cls._get_collaborator_roles(courses, user)
+        registered_on = set()
+        if getattr(user, "pk", None) is not None:
+            registered_on = set(
+                RegistrationOnCourse.objects.filter(course__in=courses, student=user)
+                .values_list("course_id", flat=True)
+            )
+        return {
+            course: course._compute_user_perms_mask(user, roles.get(course.pk), course.pk in registered_on)
+            for course in courses
+        }
+
+    def _compute_user_perms_mask(self, user: get_user_model(), role: Optional[str], is_student: bool) -> int:
+        """
+        Compute the permissions bitmask of a user on this course, once the related data is known.
+
+        :param user: the user for which to compute permissions
+        :type user: get_user_model()
+        :param role: the role of the user on the course, None if the user does not collaborate on it
+        :type role: Optional[str]
+        :param is_student: whether the user is registered on the course
+        :type is_student: bool
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        permissions = self._get_author_perms_mask(user)
         # Public access means everyone can view it
         if self.access == CourseAccess.PUBLIC.name:
-            permissions.update(["view"])
+            permissions |= VIEW_PERMISSION_MASK
         # Being author of a course implies you have the owner permissions
-        if user == self.author:
-            permissions.update(PERMISSIONS_FOR_ROLE.get(CollaboratorRole.OWNER.name, set()))
+        if self._is_author(user):
+            permissions |= PERMISSION_MASKS_FOR_ROLE[CollaboratorRole.OWNER.name]
         # Being a student with students only access or lower implies you have the students permissions
-        if user in self.students.all() and CourseAccess[self.access] <= CourseAccess.STUDENTS_ONLY:
-            permissions.update(PERMISSIONS_FOR_ROLE.get("students", set()))
+        if is_student and CourseAccess[self.access] <= CourseAccess.STUDENTS_ONLY:
+            permissions |= PERMISSION_MASKS_FOR_ROLE["students"]
         # Being a collaborator with collaborators only access or lower implies you have the collaborators permissions
-        if user in self.collaborators.all() and CourseAccess[self.access] <= CourseAccess.COLLABORATORS_ONLY:
-            permissions.update(PERMISSIONS_FOR_ROLE.get(self.object_collaborators.get(collaborator=user).role, set()))
+        if role is not None and CourseAccess[self.access] <= CourseAccess.COLLABORATORS_ONLY:
+            permissions |= PERMISSION_MASKS_FOR_ROLE.get(role, 0)
         return permissions
 
-    def get_all_objectives(self) -> set:
+    def get_all_objectives(self) -> QuerySet:
         """
         This method return all the objectives which are attached to the courses. This include:
         Course objectives
         Course activities objectives
         Course activities resources objectives
         This method is used for the progression
-        :return: set() which contains all the Objective (object) in the course
-        A set is used because it needs to remove occurrences
-        """
-        all_objectives_in_the_course = set()
-        for objective in self.objectives.all():
-            all_objectives_in_the_course.add(objective)
-        for course_activity in self.activities:
-            for objective in course_activity.objectives.all():
-                all_objectives_in_the_course.add(objective)
-            for activity_resource in course_activity.resources.all():
-                for objective in activity_resource.objectives.all():
-                    all_objectives_in_the_course.add(objective)
 
-        return all_objectives_in_the_course
+        .. note:: The objectives are selected with a single query, whatever the number of activities and resources. \
+                  Each objective appears once, and the queryset can be used like the set it used to be (iteration, \
+                  “in”, “len”).
+
+        :return: all the objectives in the course, in its activities and in their resources
+        :rtype: QuerySet
+        """
+        return Objective.objects.filter(
+            Q(pk__in=CourseObjective.objects.filter(course=self).values("objective"))
+            | Q(pk__in=ActivityObjective.objects.filter(
+                activity__course_activities__course=self
+            ).values("objective"))
+            | Q(pk__in=ResourceObjective.objects.filter(
+                resource__activities__course_activities__course=self
+            ).values("objective"))
+        )
 
     def __str__(self):
         return self.name
@@ -1922,6 +2826,14 @@ class Course(BasicModelMixin):
 
 
 class CourseActivity(models.Model):
+    """
+    The link between a course and one of its activities. Activities are sorted by rank: ranks are not positions,
+    they leave gaps so that an activity can be added or moved by changing its own rank only.
+    """
+
+    # The gap between the ranks of consecutive activities, when they are spread
+    RANK_GAP = 1024
+
     rank = models.PositiveIntegerField(verbose_name=_("Rank"))
     course = models.ForeignKey(
         Course,
@@ -1936,13 +2848,50 @@ class CourseActivity(models.Model):
         verbose_name=_("Activity")
     )
 
+    @staticmethod
+    def spread_ranks(course_activities: List["CourseActivity"]) -> None:
+        """
+        Spread the ranks of the activities of a course, “RANK_GAP” apart, in the given order. Only the course
+        activities whose rank changes are updated, at once.
+
+        :param course_activities: all the course activities of a course, in order
+        :type course_activities: List[CourseActivity]
+        """
+        changed_course_activities = []
+        for position, course_activity in enumerate(course_activities, start=1):
+            if course_activity.rank != position * CourseActivity.RANK_GAP:
+                course_activity.rank = position * CourseActivity.RANK_GAP
+                changed_course_activities.append(course_activity)
+        CourseActivity.objects.bulk_update(changed_course_activities, ["rank"])
+        # Bulk updates do not send signals
+        ContentVersion.objects.bump(Course, {course_activity.course_id for course_activity in changed_course_activities})
+
+    @staticmethod
+    def get_rank_between(ranks: List[int], position: int) -> Optional[int]:
+        """
+        Get a rank that puts an activity at a position among other activities.
+
+        :param ranks: the sorted ranks of the other activities
+        :type ranks: List[int]
+        :param position: the position of the activity, starting at 1, at most one more than the number of ranks
+        :type position: int
+        :return: a rank between the previous and the next ranks, or None if there is no room left between them
+        :rtype: Optional[int]
+        """
+        previous_rank = ranks[position - 2] if position > 1 else 0
+        if position > len(ranks):
+            return previous_rank + CourseActivity.RANK_GAP
+        next_rank = ranks[position - 1]
+        return (previous_rank + next_rank) // 2 if next_rank - previous_rank > 1 else None
+
     def __str__(self):
-        return _("“%(activity)s”, n°%(rank)d on “%(course)s”") % {"activity": self.activity, "rank": self.rank,
-                                                                  "course": self.course}
+        # Ranks are sort keys with gaps, not positions: they are not shown
+        return _("“%(activity)s” on “%(course)s”") % {"activity": self.activity, "course": self.course}
 
     class Meta:
         unique_together = ("activity", "course")
-        ordering = ["rank"]
+        ordering = ["rank", "pk"]
+        indexes = [models.Index(fields=["course", "rank"])]
         verbose_name = pgettext_lazy("Course activity verbose name (singular form)", "course activity")
         verbose_name_plural = pgettext_lazy("Course activity verbose name (plural form)", "course activities")
 
@@ -1993,7 +2942,7 @@ class RegistrationOnCourse(models.Model):
                 _("%(user)s is already the author of this course. %(user)s cannot be "
                   "registered as a student.") % {"user": self.student}
             )
-        if self.student in self.course.collaborators.all():
+        if self.course.has_collaborator(self.student):
             raise ValidationError(
                 _("%(user)s cannot register on this course. %(user)s is already "
                   "a collaborator on this course, a user cannot be both.") % {"user": self.student}
@@ -2006,51 +2955,223 @@ class RegistrationOnCourse(models.Model):
         verbose_name_plural = pgettext_lazy("Course registration verbose name (plural form)", "course registrations")
 
 
+# Set while validations of reusable entity objectives are added or removed in bulk. Progression snapshots are then
+# updated at once, instead of once for each validation by signal receivers.
+_validations_changed_in_bulk: ContextVar[bool] = ContextVar("validations_changed_in_bulk", default=False)
+
+
+def validations_changed_in_bulk() -> bool:
+    """
+    Whether validations of entity objectives are currently added or removed in bulk, by
+    “add_validator_object_objective” or “remove_validator_object_objective”.
+
+    :return: True if progression snapshots are updated once the validations are changed
+    :rtype: bool
+    """
+    return _validations_changed_in_bulk.get()
+
+
+def get_entity_objective_validator_models() -> List[Tuple[Type["EntityObjective"], Type[models.Model], str]]:
+    """
+    :return: the entity objective models, with the model of their validations and the name of its entity objective
+             foreign key
+    :rtype: List[Tuple[Type[EntityObjective], Type[models.Model], str]]
+    """
+    return [
+        (CourseObjective, CourseObjectiveValidator, "course_objective"),
+        (ActivityObjective, ActivityObjectiveValidator, "activity_objective"),
+        (ResourceObjective, ResourceObjectiveValidator, "resource_objective"),
+    ]
+
+
+def _create_validations(validator_model: Type[models.Model], validated_field: str, student: get_user_model(),
+                        entity_objectives: List["EntityObjective"]) -> List["EntityObjective"]:
+    """
+    Insert the validations of a student on entity objectives of the same kind. The rows are inserted at once, unless
+    some of them were inserted in the meantime by another request: the rows are then inserted one at a time, skipping
+    those that already exist.
+
+    :param validator_model: the model of the validations
+    :type validator_model: Type[models.Model]
+    :param validated_field: the name of the entity objective foreign key of the validations
+    :type validated_field: str
+    :param student: the student who validates the entity objectives
+    :type student: get_user_model()
+    :param entity_objectives: the entity objectives to validate
+    :type entity_objectives: List[EntityObjective]
+    :return: the entity objectives whose validation was actually inserted
+    :rtype: List[EntityObjective]
+    """
+    if not entity_objectives:
+        return []
+    try:
+        with transaction.atomic():
+            validator_model.objects.bulk_create([
+                validator_model(student=student, **{validated_field: entity_objective})
+                for entity_objective in entity_objectives
+            ])
+        return entity_objectives
+    except IntegrityError:
+        created = []
+        for entity_objective in entity_objectives:
+            try:
+                with transaction.atomic():
+                    validator_model.objects.bulk_create([
+                        validator_model(student=student, **{validated_field: entity_objective})
+                    ])
+                created.append(entity_objective)
+            except IntegrityError:
+                pass
+        return created
+
+
+def _delete_validations(validator_model: Type[models.Model], validated_field: str, student: get_user_model(),
+                        entity_objectives: List["EntityObjective"]) -> List["EntityObjective"]:
+    """
+    Delete the validations of a student on entity objectives of the same kind. The rows are locked before they are
+    deleted, so that validations deleted in the meantime by another request are not counted twice.
+
+    .. note:: This must be called in a transaction.
+
+    :param validator_model: the model of the validations
+    :type validator_model: Type[models.Model]
+    :param validated_field: the name of the entity objective foreign key of the validations
+    :type validated_field: str
+    :param student: the student whose validations are removed
+    :type student: get_user_model()
+    :param entity_objectives: the entity objectives whose validation to remove
+    :type entity_objectives: List[EntityObjective]
+    :return: the entity objectives whose validation was actually deleted
+    :rtype: List[EntityObjective]
+    """
+    if not entity_objectives:
+        return []
+    rows = dict(validator_model.objects.select_for_update().filter(
+        student=student, **{"{}__in".format(validated_field): entity_objectives}
+    ).values_list("pk", "{}_id".format(validated_field)))
+    validator_model.objects.filter(pk__in=rows).delete()
+    deleted_ids = set(rows.values())
+    return [entity_objective for entity_objective in entity_objectives if entity_objective.pk in deleted_ids]
+
+
 def add_validator_object_objective(student: get_user_model(), objective: Objective):
     """
-    This method add the validation on course_objective for the EntityObjectives with validation reusable
+    This method add the validation on course_objective for the EntityObjectives with validation reusable. The
+    validations are inserted at once for each kind of entity objective, whatever the number of entities that reuse the
+    objective.
+
     :param student: The student that you want to add validation
     :param objective: The course_objective concerned
     :return:
     """
     # Add the student in course_objective student  if this is his first course_objective validation (Objective class)
-    if student not in objective.validators.all():
+    if not objective.validations.filter(student=student).exists():
         objective.add_validator(student)
     # Update all ObjectObjective student list
-    for course_objective in CourseObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student not in course_objective.validators.all():
-            course_objective.add_validator(student)
-    for activity_objective in ActivityObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student not in activity_objective.validators.all():
-            activity_objective.add_validator(student)
-    for resource_objective in ResourceObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student not in resource_objective.validators.all():
-            resource_objective.add_validator(student)
+    with transaction.atomic():
+        validated_entity_objectives = []
+        for entity_objective_model, validator_model, validated_field in get_entity_objective_validator_models():
+            entity_objectives = list(entity_objective_model.objects.filter(
+                objective=objective, objective_reusable=True
+            ).exclude(validators=student))
+            validated_entity_objectives += _create_validations(
+                validator_model, validated_field, student, entity_objectives
+            )
+        ProgressionSnapshot.objects.record_validations(validated_entity_objectives, student.pk, 1)
 
 
 def remove_validator_object_objective(student: get_user_model(), objective: Objective):
     """
-    This method remove the validation on course_objective for the EntityObjectives with validation reusable
+    This method remove the validation on course_objective for the EntityObjectives with validation reusable. The
+    validations are deleted at once for each kind of entity objective, whatever the number of entities that reuse the
+    objective.
+
     :param student: The student that you want to remove validation
     :param objective: The course_objective concerned
     :return:
     """
     # Remove the validation if validation is reusable
-    for course_objective in CourseObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student in course_objective.validators.all():
-            course_objective.remove_validator(student)
-    for activity_objective in ActivityObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student in activity_objective.validators.all():
-            activity_objective.remove_validator(student)
-    for resource_objective in ResourceObjective.objects.filter(objective=objective, objective_reusable=True):
-        if student in resource_objective.validators.all():
-            resource_objective.remove_validator(student)
+    with transaction.atomic():
+        invalidated_entity_objectives = []
+        token = _validations_changed_in_bulk.set(True)
+        try:
+            for entity_objective_model, validator_model, validated_field in get_entity_objective_validator_models():
+                entity_objectives = list(entity_objective_model.objects.filter(
+                    objective=objective, objective_reusable=True, validators=student
+                ))
+                invalidated_entity_objectives += _delete_validations(
+                    validator_model, validated_field, student, entity_objectives
+                )
+        finally:
+            _validations_changed_in_bulk.reset(token)
+        ProgressionSnapshot.objects.record_validations(invalidated_entity_objectives, student.pk, -1)
 
     # Remove the course_objective validation if no one object course_objective has been validated
     objective.remove_validator(student)
 
 
-class EntityObjective(ObjectPermissionManagerMixin, models.Model):
+def change_validations(student: get_user_model(), validations: Dict["EntityObjective", bool]) -> None:
+    """
+    Validate some entity objectives and remove the validation of others, at once, in a single transaction. Like
+    “EntityObjective.change_validation”, the validations of reusable objectives are propagated. The number of queries
+    depends on the number of reusable objectives changed, but not on the number of entity objectives.
+
+    :param student: the student who validates or disclaims the entity objectives
+    :type student: get_user_model()
+    :param validations: whether each entity objective must be validated by the student
+    :type validations: Dict[EntityObjective, bool]
+    """
+    with transaction.atomic():
+        validated_entity_objectives, invalidated_entity_objectives = [], []
+        token = _validations_changed_in_bulk.set(True)
+        try:
+            for entity_objective_model, validator_model, validated_field in get_entity_objective_validator_models():
+                model_validations = {
+                    entity_objective.pk: (entity_objective, validated)
+                    for entity_objective, validated in validations.items()
+                    if isinstance(entity_objective, entity_objective_model)
+                }
+                if not model_validations:
+                    continue
+                already_validated = set(validator_model.objects.filter(
+                    student=student, **{"{}__in".format(validated_field): list(model_validations)}
+                ).values_list("{}_id".format(validated_field), flat=True))
+                to_validate = [
+                    entity_objective for pk, (entity_objective, validated) in model_validations.items()
+                    if validated and pk not in already_validated
+                ]
+                to_invalidate = [
+                    entity_objective for pk, (entity_objective, validated) in model_validations.items()
+                    if not validated and pk in already_validated
+                ]
+                validated_entity_objectives += _create_validations(
+                    validator_model, validated_field, student, to_validate
+                )
+                invalidated_entity_objectives += _delete_validations(
+                    validator_model, validated_field, student, to_invalidate
+                )
+        finally:
+            _validations_changed_in_bulk.reset(token)
+        ProgressionSnapshot.objects.record_validations(validated_entity_objectives, student.pk, 1)
+        ProgressionSnapshot.objects.record_validations(invalidated_entity_objectives, student.pk, -1)
+
+        # Propagate the validations of reusable objectives, once for each objective
+        reusable_objective_ids = {
+            entity_objective.objective_id
+            for entity_objective in validated_entity_objectives + invalidated_entity_objectives
+            if entity_objective.objective_reusable
+        }
+        if reusable_objective_ids:
+            objectives = Objective.objects.in_bulk(reusable_objective_ids)
+            for objective_id in {entity_objective.objective_id for entity_objective in invalidated_entity_objectives
+                                 if entity_objective.objective_reusable}:
+                remove_validator_object_objective(student, objectives[objective_id])
+            for objective_id in {entity_objective.objective_id for entity_objective in validated_entity_objectives
+                                 if entity_objective.objective_reusable}:
+                add_validator_object_objective(student, objectives[objective_id])
+
+
+class EntityObjective(MembershipCacheMixin, ObjectPermissionManagerMixin, models.Model):
     """
     This is an abstract class which will complete the association between an course_objective and a BasicModelMixin
     (Course,Activity,Resource)
@@ -2084,6 +3205,31 @@ class EntityObjective(ObjectPermissionManagerMixin, models.Model):
     def related_entity(self):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_course_ids(self) -> List[int]:
+        """
+        Get the courses that include this entity objective, directly or through their activities. A course is listed
+        once for each of its activities that include the entity.
+
+        :return: the primary keys of the courses that include the entity objective
+        :rtype: List[int]
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def get_course_ids_by_entity_objective(cls, entity_objectives: List["EntityObjective"]) -> Dict[int, List[int]]:
+        """
+        Get the courses that include some entity objectives, like “get_course_ids” does for one of them, in at most
+        one query.
+
+        :param entity_objectives: entity objectives of this model
+        :type entity_objectives: List[EntityObjective]
+        :return: the primary keys of the courses that include each entity objective, by entity objective primary key
+        :rtype: Dict[int, List[int]]
+        """
+        raise NotImplementedError
+
     def change_validation(self, student: get_user_model()) -> None:
         """
         Toggle the validation status of this entity. If the entity course_objective is already validated, reverse the
@@ -2092,7 +3238,7 @@ class EntityObjective(ObjectPermissionManagerMixin, models.Model):
         :param student: the student for which the switch should be made
         :type student: get_user_model()
         """
-        student_already_validated = student in self.validators.all()
+        student_already_validated = self.has_validator(student)
         if student_already_validated:
             self.remove_validator(student)
             if self.objective_reusable:
@@ -2103,16 +3249,29 @@ class EntityObjective(ObjectPermissionManagerMixin, models.Model):
                 add_validator_object_objective(student, self.objective)
 
     def add_validator(self, validator: get_user_model()):
-        already_validate = validator in self.validators.all()
+        already_validate = self.has_validator(validator)
         if already_validate:
             raise learning.exc.ObjectiveAlreadyValidated()
         self.object_validator.create(student=validator)
+        self.forget_members("validators")
 
     def remove_validator(self, validator: get_user_model()):
-        already_validate = validator in self.validators.all()
+        already_validate = self.has_validator(validator)
         if not already_validate:
             raise learning.exc.ObjectiveNotValidated()
         self.object_validator.filter(student=validator).delete()
+        self.forget_members("validators")
+
+    def has_validator(self, student: get_user_model()) -> bool:
+        """
+        Check whether a student validated this objective on the entity, without loading the validators.
+
+        :param student: the student, it can be anonymous
+        :type student: get_user_model()
+        :return: True if the student validated this objective on the entity
+        :rtype: bool
+        """
+        return self._is_member("validators", student)
 
     class Meta:
         abstract = True
@@ -2158,6 +3317,15 @@ class CourseObjective(EntityObjective):
     def related_entity(self) -> BasicModelMixin:
         return self.course
 
+    # noinspection PyMissingOrEmptyDocstring
+    def get_course_ids(self) -> List[int]:
+        return [self.course_id]
+
+    # noinspection PyMissingOrEmptyDocstring
+    @classmethod
+    def get_course_ids_by_entity_objective(cls, entity_objectives: List[EntityObjective]) -> Dict[int, List[int]]:
+        return {entity_objective.pk: [entity_objective.course_id] for entity_objective in entity_objectives}
+
 
 class ActivityObjective(EntityObjective):
     """
@@ -2195,6 +3363,24 @@ class ActivityObjective(EntityObjective):
     def related_entity(self) -> BasicModelMixin:
         return self.activity
 
+    # noinspection PyMissingOrEmptyDocstring
+    def get_course_ids(self) -> List[int]:
+        return list(CourseActivity.objects.filter(activity=self.activity_id).values_list("course_id", flat=True))
+
+    # noinspection PyMissingOrEmptyDocstring
+    @classmethod
+    def get_course_ids_by_entity_objective(cls, entity_objectives: List[EntityObjective]) -> Dict[int, List[int]]:
+        course_ids_by_activity = collections.defaultdict(list)
+        if entity_objectives:
+            for activity_id, course_id in CourseActivity.objects.filter(
+                    activity__in={entity_objective.activity_id for entity_objective in entity_objectives}
+            ).order_by().values_list("activity_id", "course_id"):
+                course_ids_by_activity[activity_id].append(course_id)
+        return {
+            entity_objective.pk: course_ids_by_activity[entity_objective.activity_id]
+            for entity_objective in entity_objectives
+        }
+
 
 class ResourceObjective(EntityObjective):
     """
@@ -2232,18 +3418,35 @@ class ResourceObjective(EntityObjective):
     def related_entity(self) -> BasicModelMixin:
         return self.resource
 
+    # noinspection PyMissingOrEmptyDocstring
+    def get_course_ids(self) -> List[int]:
+        return list(
+            CourseActivity.objects.filter(activity__resources=self.resource_id).values_list("course_id", flat=True)
+        )
+
+    # noinspection PyMissingOrEmptyDocstring
+    @classmethod
+    def get_course_ids_by_entity_objective(cls, entity_objectives: List[EntityObjective]) -> Dict[int, List[int]]:
+        course_ids_by_resource = collections.defaultdict(list)
+        if entity_objectives:
+            for resource_id, course_id in CourseActivity.objects.filter(
+                    activity__resources__in={entity_objective.resource_id for entity_objective in entity_objectives}
+            ).order_by().values_list("activity__resources", "course_id"):
+                course_ids_by_resource[resource_id].append(course_id)
+        return {
+            entity_objective.pk: course_ids_by_resource[entity_objective.resource_id]
+            for entity_objective in entity_objectives
+        }
+
 
 class ObjectiveValidatorMixin(models.Model):
-    slug = models.SlugField(unique=True)
+    """
+    The validation of an entity objective by a student. A student validates an entity objective once.
+    """
     validated = models.DateTimeField(auto_now_add=True, auto_now=False, verbose_name=_("Validated the…"))
 
-    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        """
-        save() method is overridden to generate the slug field.
-        :return:
-        """
-        self.slug = generate_slug_for_model(self.__class__, self)
-        super().save(force_insert, force_update, using, update_fields)
+    class Meta:
+        abstract = True
 
 
 class CourseObjectiveValidator(ObjectiveValidatorMixin):
@@ -2260,9 +3463,8 @@ class CourseObjectiveValidator(ObjectiveValidatorMixin):
         verbose_name=_("Student"),
     )
 
-    def slug_generator(self):
-        return f"{self.course_objective.objective.ability}-{str(self.student)}-" \
-               f"{self.course_objective.related_entity.name}"
+    class Meta:
+        unique_together = ("course_objective", "student")
 
 
 class ActivityObjectiveValidator(ObjectiveValidatorMixin):
@@ -2282,9 +3484,8 @@ class ActivityObjectiveValidator(ObjectiveValidatorMixin):
         verbose_name=_("Student"),
     )
 
-    def slug_generator(self):
-        return f"{self.activity_objective.objective.ability}-{str(self.student)}-" \
-               f"{self.activity_objective.related_entity.name}"
+    class Meta:
+        unique_together = ("activity_objective", "student")
 
 
 class ResourceObjectiveValidator(ObjectiveValidatorMixin):
@@ -2304,9 +3505,8 @@ class ResourceObjectiveValidator(ObjectiveValidatorMixin):
         verbose_name=_("Student"),
     )
 
-    def slug_generator(self):
-        return f"{self.resource_objective.objective.ability}-{str(self.student)}-" \
-               f"{self.resource_objective.related_entity.name}"
+    class Meta:
+        unique_together = ("resource_objective", "student")
 
 
 class ObjectCollaboratorMixin(models.Model):
@@ -2393,7 +3593,7 @@ class CourseCollaborator(ObjectCollaboratorMixin):
     # noinspection PyMissingOrEmptyDocstring
     def clean(self):
         super().clean()
-        if self.collaborator in self.course.students.all():
+        if self.course.has_student(self.collaborator):
             raise ValidationError(
                 _("%(user)s cannot be added as a collaborator on this course. %(user)s is already "
                   "a student, a user cannot be both.") % {"user": self.collaborator}
@@ -2466,11 +3666,276 @@ class ResourceCollaborator(ObjectCollaboratorMixin):
                                             "resource collaborators")
 
 
+class MaterializedPermissionManager(models.Manager):
+    """
+    The manager of materialized permissions, which loads, stores and forgets them.
+    """
+
+    def load(self, objects: List[BasicModelMixin], user: get_user_model()) -> Dict[BasicModelMixin, int]:
+        """
+        Get the permissions bitmask of a user on objects of the same type. Permissions are read from the table, those
+        that are not stored yet are computed and stored.
+
+        :param objects: the objects on which to get permissions, all of the same type
+        :type objects: List[BasicModelMixin]
+        :param user: the user for which to get permissions, it cannot be anonymous
+        :type user: get_user_model()
+        :return: the permissions bitmask of the user, for each object
+        :rtype: Dict[BasicModelMixin, int]
+        """
+        if not objects:
+            return dict()
+        model = type(objects[0])
+        content_type = ContentType.objects.get_for_model(model)
+        stored = dict(
+            self.filter(
+                user=user, content_type=content_type, object_id__in=[an_object.pk for an_object in objects]
+            ).values_list("object_id", "permissions")
+        )
+        permissions = {an_object: stored[an_object.pk] for an_object in objects if an_object.pk in stored}
+        missing_objects = [an_object for an_object in objects if an_object.pk not in stored]
+        if missing_objects:
+            computed = model._bulk_get_user_perms_mask(missing_objects, user)
+            self.bulk_create([
+                MaterializedPermission(user=user, content_type=content_type, object_id=an_object.pk, permissions=mask)
+                for an_object, mask in computed.items()
+            ], ignore_conflicts=True)
+            permissions.update(computed)
+        return permissions
+
+    def forget_user(self, user_pk: int) -> None:
+        """
+        Forget every permission stored for a user. As permissions cascade from courses to activities and resources, a
+        change in the collaborations or registrations of the user can change any of them.
+
+        :param user_pk: the primary key of the user
+        :type user_pk: int
+        """
+        self.filter(user_id=user_pk).delete()
+
+    def forget_objects(self, model: type, object_ids) -> None:
+        """
+        Forget the permissions stored for some objects of the same type.
+
+        :param model: the type of the objects: Course, Activity or Resource
+        :type model: type
+        :param object_ids: the primary keys of the objects, as an iterable or a queryset of values
+        """
+        self.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids).delete()
+
+    def forget_object(self, an_object: BasicModelMixin) -> None:
+        """
+        Forget the permissions stored for an object and for the objects whose permissions depend on it: activities
+        of a course, and resources of those activities.
+
+        :param an_object: the object whose permissions changed
+        :type an_object: BasicModelMixin
+        """
+        self.forget_objects(type(an_object), [an_object.pk])
+        activities = None
+        if isinstance(an_object, Course):
+            activities = CourseActivity.objects.filter(course=an_object).order_by().values("activity")
+            self.forget_objects(Activity, activities)
+        if isinstance(an_object, Activity):
+            activities = [an_object.pk]
+        if activities is not None:
+            # noinspection PyUnresolvedReferences
+            self.forget_objects(
+                Resource, Activity.resources.through.objects.filter(activity__in=activities).values("resource")
+            )
+
+
+class MaterializedPermission(models.Model):
+    """
+    The simple permissions of a user on a course, an activity or a resource, stored as a bitmask. This is a
+    denormalized copy of what “_get_user_perms_mask” computes, kept current by the signals in “learning.signals”.
+
+    .. note:: This is only used when the “LEARNING_MATERIALIZED_PERMISSIONS” settings is enabled.
+    """
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("User")
+    )
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Object type")
+    )
+    object_id = models.PositiveIntegerField(verbose_name=_("Object identifier"))
+    permissions = models.PositiveBigIntegerField(verbose_name=_("Permissions"))
+
+    objects = MaterializedPermissionManager()
+
+    def __str__(self):
+        return _("Permissions of %(user)s on %(object_type)s n°%(object_id)d") % {
+            "user": self.user,
+            "object_type": self.content_type,
+            "object_id": self.object_id
+        }
+
+    class Meta:
+        unique_together = ("user", "content_type", "object_id")
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+        verbose_name = pgettext_lazy("Materialized permission verbose name (singular form)", "materialized permission")
+        verbose_name_plural = pgettext_lazy(
+            "Materialized permission verbose name (plural form)", "materialized permissions"
+        )
+
+
+def get_content_inclusions() -> List[Tuple[type, type, str, type, str]]:
+    """
+    Get how learning objects include each other, which is the reverse of “linked_objects”: an objective is included in
+    the courses, activities and resources that use it, a resource in its activities and an activity in its courses.
+    Inclusions are sorted from the most included objects to the least included ones.
+
+    :return: for each inclusion, the included model, the link model, the foreign key of the included object in the link
+             model, the including model and the foreign key of the including object in the link model
+    :rtype: List[Tuple[type, type, str, type, str]]
+    """
+    return [
+        (Objective, CourseObjective, "objective_id", Course, "course_id"),
+        (Objective, ActivityObjective, "objective_id", Activity, "activity_id"),
+        (Objective, ResourceObjective, "objective_id", Resource, "resource_id"),
+        (Resource, Activity.resources.through, "resource_id", Activity, "activity_id"),
+        (Activity, CourseActivity, "activity_id", Course, "course_id"),
+    ]
+
+
+class ContentVersionManager(models.Manager):
+    """
+    The manager of content versions, which reads and bumps them. Versions are stored in the database, so that they are
+    shared by all the processes that serve the application.
+    """
+
+    def get_versions(self, model: type, object_ids) -> Dict[int, int]:
+        """
+        Get the content versions of some objects of the same type, with one query.
+
+        :param model: the type of the objects
+        :type model: type
+        :param object_ids: the primary keys of the objects
+        :return: the content version of each object, 0 when its content never changed
+        :rtype: Dict[int, int]
+        """
+        object_ids = set(object_ids)
+        versions = dict.fromkeys(object_ids, 0)
+        versions.update(self.filter(
+            content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids
+        ).values_list("object_id", "version"))
+        return versions
+
+    def get_version(self, an_object: models.Model) -> int:
+        """
+        Get the content version of an object.
+
+        :param an_object: the object
+        :type an_object: models.Model
+        :return: the content version of the object, 0 when its content never changed
+        :rtype: int
+        """
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(type(an_object)), object_id=an_object.pk
+        ).values_list("version", flat=True).first() or 0
+
+    @staticmethod
+    def get_including_object_ids(model: type, object_ids) -> Dict[type, Set[int]]:
+        """
+        Get some objects of the same type along with every object that includes them, directly or not. It runs one
+        query for each inclusion of “get_content_inclusions” that concerns the objects.
+
+        :param model: the type of the objects
+        :type model: type
+        :param object_ids: the primary keys of the objects
+        :return: the primary keys of the objects and of the objects including them, for each type
+        :rtype: Dict[type, Set[int]]
+        """
+        object_ids_by_model: Dict[type, Set[int]] = collections.defaultdict(set)
+        object_ids_by_model[model].update(object_ids)
+        for included_model, link_model, included_field, including_model, including_field in get_content_inclusions():
+            included_ids = object_ids_by_model.get(included_model)
+            if included_ids:
+                object_ids_by_model[including_model].update(link_model.objects.filter(
+                    **{"{}__in".format(included_field): included_ids}
+                ).order_by().values_list(including_field, flat=True))
+        return {model: object_ids for model, object_ids in object_ids_by_model.items() if object_ids}
+
+    def bump(self, model: type, object_ids) -> None:
+        """
+        Increment the content version of some objects of the same type, and of every object that includes them: a
+        change on a resource bumps the versions of the activities and courses that include it. Versions are only
+        changed by the database, so that concurrent bumps are never lost.
+
+        :param model: the type of the objects
+        :type model: type
+        :param object_ids: the primary keys of the objects, as an iterable or a queryset of values
+        """
+        object_ids_by_model = self.get_including_object_ids(model, object_ids)
+        if not object_ids_by_model:
+            return
+        with transaction.atomic():
+            for versioned_model, versioned_ids in object_ids_by_model.items():
+                content_type = ContentType.objects.get_for_model(versioned_model)
+                self.bulk_create([
+                    ContentVersion(content_type=content_type, object_id=object_id, version=0)
+                    for object_id in versioned_ids
+                ], ignore_conflicts=True)
+                self.filter(content_type=content_type, object_id__in=versioned_ids).update(
+                    version=models.F("version") + 1
+                )
+
+    def forget(self, an_object: models.Model) -> None:
+        """
+        Forget the content version of a deleted object.
+
+        :param an_object: the deleted object
+        :type an_object: models.Model
+        """
+        self.filter(content_type=ContentType.objects.get_for_model(type(an_object)), object_id=an_object.pk).delete()
+
+
+class ContentVersion(models.Model):
+    """
+    A counter incremented each time the content of a course, an activity, a resource or an objective changes: its own
+    fields, its collaborators, its objectives, or any object it includes. For a course, this also covers the ranks of
+    its activities. The counters are kept current by the signals in “learning.signals”. Caches built from the content of
+    an object, like course tree snapshots, use its version as a key instead of expiring after some time.
+    """
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Object type")
+    )
+    object_id = models.PositiveIntegerField(verbose_name=_("Object identifier"))
+    version = models.PositiveBigIntegerField(default=0, verbose_name=_("Version"))
+
+    objects = ContentVersionManager()
+
+    def __str__(self):
+        return _("Version %(version)d of %(object_type)s n°%(object_id)d") % {
+            "version": self.version,
+            "object_type": self.content_type,
+            "object_id": self.object_id
+        }
+
+    class Meta:
+        unique_together = ("content_type", "object_id")
+        verbose_name = pgettext_lazy("Content version verbose name (singular form)", "content version")
+        verbose_name_plural = pgettext_lazy("Content version verbose name (plural form)", "content versions")
+
+
 def get_progression_on_course_for_user(course: Course, student: get_user_model()) -> dict:
     """
     This method return a dict which contains progression information for a student given.
     This could be exported as json or used in rest-API
     todo: Order the course_objective in the Bloom taxonomy order. Maybe use the Enum indexes
+
+    .. note:: The progression is computed from three queries, one for each kind of entity objective (on the course, \
+              on its activities and on their resources), whatever the number of objectives in the course.
+
     :param course: Course
     :param student: get_user_model()
     :return: dict()
@@ -2485,76 +3950,66 @@ def get_progression_on_course_for_user(course: Course, student: get_user_model()
     # Information for an course_objective
     objective_taxonomy_information = dict()
 
-    # Iterating on objectives in course. get_all_objectives() gives all objectives on course (activities and
-    # resources included)
-    for objective in course.get_all_objectives():
+    # The entity objectives of the course, of its activities and of their resources, each one annotated with whether
+    # the student validated it. They are grouped by objective, then by kind of entity.
+    entity_objectives_queries = (
+        ("on_course", CourseObjective.objects.filter(course=course).select_related("course"),
+         CourseObjectiveValidator, "course_objective"),
+        ("on_activity", ActivityObjective.objects.filter(
+            activity__course_activities__course=course
+        ).select_related("activity"), ActivityObjectiveValidator, "activity_objective"),
+        ("on_resource", ResourceObjective.objects.filter(
+            resource__activities__course_activities__course=course
+        ).select_related("resource"), ResourceObjectiveValidator, "resource_objective"),
+    )
+    objectives: Dict[int, Objective] = dict()
+    entity_objectives_by_objective: Dict[int, Dict[str, List[EntityObjective]]] = dict()
+    for entity_type, entity_objectives, validator_model, validator_field in entity_objectives_queries:
+        entity_objectives = entity_objectives.select_related("objective").annotate(
+            validated_by_student=Exists(validator_model.objects.filter(
+                student=student, **{validator_field: OuterRef("pk")}
+            ))
+        ).order_by("pk")
+        for entity_objective in entity_objectives:
+            objectives[entity_objective.objective_id] = entity_objective.objective
+            entity_objectives_by_objective.setdefault(entity_objective.objective_id, {
+                "on_course": [], "on_activity": [], "on_resource": []
+            })[entity_type].append(entity_objective)
+
+    for objective_id in sorted(objectives):
         # Information on an course_objective
         objective_basic_information = dict()
 
         # 'objective_ability' is simply the course_objective ability, independently of course,activity,resource
-        objective_basic_information["objective_ability"] = objective.ability
-
-        # Validated is a boolean which will say if course_objective is validated
-        # on almost one Course/Activity/Resource
-        objective_basic_information["validated"] = False
-
-        # Query to get CourseObjective using this course_objective
-        objective_on_course = CourseObjective.objects.filter(
-            objective=objective,
-            course=course
-        )
-
-        # Query to get CourseObjective using this course_objective
-        objective_on_activity = ActivityObjective.objects.filter(
-            objective=objective,
-            activity__course_activities__course=course
-        )
-
-        # Query to get ResourceObjective using this course_objective
-        objective_on_resource = ResourceObjective.objects.filter(
-            objective=objective,
-            resource__activities__course_activities__course=course
-        )
+        objective_basic_information["objective_ability"] = objectives[objective_id].ability
 
-        # The 3 following block get the ObjectObjective and put it in the dict
-        if objective_on_course.exists():
-            objective_basic_information["on_course"] = objective_on_course.all()
-
-        if objective_on_activity.exists():
-            objective_basic_information["on_activity"] = objective_on_activity.all()
-
-        if objective_on_resource.exists():
-            objective_basic_information["on_resource"] = objective_on_resource.all()
+        # The 3 following entity objectives lists are put in the dict, when not empty
+        objective_on_entities = entity_objectives_by_objective[objective_id]
+        for entity_type, objective_on_entity in objective_on_entities.items():
+            if objective_on_entity:
+                objective_basic_information[entity_type] = objective_on_entity
 
         # An course_objective is validated if he is validated in on of the course/activity/resource
-        objective_basic_information["validated"] = \
-            any(
-                student in objective_on_resource_object.validators.all()
-                for objective_on_resource_object in objective_on_resource) or \
-            any(
-                student in objective_on_activity_object.validators.all()
-                for objective_on_activity_object in objective_on_activity) or \
-            any(
-                student in objective_on_course_object.validators.all()
-                for objective_on_course_object in objective_on_course)
+        objective_basic_information["validated"] = any(
+            obj.validated_by_student for objective_on_entity in objective_on_entities.values()
+            for obj in objective_on_entity
+        )
 
         objectives_in_course_information.append(objective_basic_information)
 
         # here we updated all the needed statistics
-        for all_objectives in [objective_on_course, objective_on_activity, objective_on_resource]:
-            for obj in all_objectives:
+        for entity_type in ("on_course", "on_activity", "on_resource"):
+            for obj in objective_on_entities[entity_type]:
                 if obj.taxonomy_level not in objective_taxonomy_information:
                     objective_taxonomy_information[obj.taxonomy_level] = dict()
                     objective_taxonomy_information[obj.taxonomy_level]["number_validation"] = 0
                     objective_taxonomy_information[obj.taxonomy_level]["total"] = 0
 
-                if student in obj.validators.all():
+                if obj.validated_by_student:
                     objective_taxonomy_information[obj.taxonomy_level]["number_validation"] += 1
                     objective_taxonomy_total_validated += 1
                 objective_taxonomy_information[obj.taxonomy_level]["total"] += 1
-
-        objective_taxonomy_total += len(objective_on_course) + len(objective_on_activity) + len(
-            objective_on_resource)
+                objective_taxonomy_total += 1
 
     # Update the size of progress for each TaxonomyLevel
     for level in objective_taxonomy_information:
@@ -2574,3 +4029,943 @@ def get_progression_on_course_for_user(course: Course, student: get_user_model()
     final_student_progression["objective_taxonomy_information"] = objective_taxonomy_information
 
     return final_student_progression
+
+
+class ResourceNode(NamedTuple):
+    """
+    A resource in a course tree, with its objectives and its collaborators.
+    """
+    resource: "Resource"
+    objectives: Tuple["ResourceObjective", ...]
+    collaborators: Tuple["ResourceCollaborator", ...]
+
+
+class ActivityNode(NamedTuple):
+    """
+    An activity in a course tree, with its rank on the course, its resources, its objectives and its collaborators.
+    """
+    course_activity: "CourseActivity"
+    resources: Tuple[ResourceNode, ...]
+    objectives: Tuple["ActivityObjective", ...]
+    collaborators: Tuple["ActivityCollaborator", ...]
+
+    @property
+    def activity(self) -> "Activity":
+        """
+        :return: the activity of this node
+        :rtype: Activity
+        """
+        return self.course_activity.activity
+
+    def cache_resources(self) -> None:
+        """
+        Store the resources of this node as if they were prefetched, so that “activity.resources.all” and
+        “activity.resources.count” do not run any query.
+        """
+        resources = self.activity.resources.get_queryset()
+        resources._result_cache = [resource_node.resource for resource_node in self.resources]
+        resources._prefetch_done = True
+        self.activity._prefetched_objects_cache = {"resources": resources}
+
+
+class CourseTree(NamedTuple):
+    """
+    The content of a course, loaded at once: its activities sorted by rank, their resources, and the objectives and
+    collaborators of each of them. A course tree is immutable and does not run any query once loaded: the resources of
+    each activity are also stored as if they were prefetched, in the order of “Resource.Meta.ordering”.
+    """
+    course: "Course"
+    activities: Tuple[ActivityNode, ...]
+    objectives: Tuple["CourseObjective", ...]
+    collaborators: Tuple["CourseCollaborator", ...]
+
+    @classmethod
+    def load(cls, course: "Course") -> "CourseTree":
+        """
+        Load the tree of a course with eight queries, whatever the number of activities, resources, objectives and
+        collaborators.
+
+        :param course: the course to load
+        :type course: Course
+        :return: the course tree
+        :rtype: CourseTree
+        """
+        course_activities = list(
+            CourseActivity.objects.filter(course=course).select_related("activity", "activity__author")
+        )
+        activity_ids = [course_activity.activity_id for course_activity in course_activities]
+
+        # A resource used by several activities of the course is loaded once
+        resources: Dict[int, Resource] = dict()
+        resource_ids_by_activity: Dict[int, List[int]] = collections.defaultdict(list)
+        for link in Activity.resources.through.objects.filter(activity__in=activity_ids) \
+                .select_related("resource", "resource__author").order_by("-resource__updated", "resource__name", "pk"):
+            resources.setdefault(link.resource_id, link.resource)
+            resource_ids_by_activity[link.activity_id].append(link.resource_id)
+
+        def group_by(queryset: QuerySet, field: str) -> Dict[int, tuple]:
+            grouped = collections.defaultdict(list)
+            for row in queryset:
+                grouped[getattr(row, field)].append(row)
+            return collections.defaultdict(tuple, {key: tuple(rows) for key, rows in grouped.items()})
+
+        activity_objectives = group_by(
+            ActivityObjective.objects.filter(activity__in=activity_ids).select_related("objective"), "activity_id"
+        )
+        resource_objectives = group_by(
+            ResourceObjective.objects.filter(resource__in=resources.keys()).select_related("objective"), "resource_id"
+        )
+        activity_collaborators = group_by(
+            ActivityCollaborator.objects.filter(activity__in=activity_ids).select_related("collaborator"),
+            "activity_id"
+        )
+        resource_collaborators = group_by(
+            ResourceCollaborator.objects.filter(resource__in=resources.keys()).select_related("collaborator"),
+            "resource_id"
+        )
+        resource_nodes = {
+            resource_id: ResourceNode(resource, resource_objectives[resource_id], resource_collaborators[resource_id])
+            for resource_id, resource in resources.items()
+        }
+        activity_nodes = []
+        for course_activity in course_activities:
+            course_activity.course = course
+            activity_nodes.append(ActivityNode(
+                course_activity,
+                tuple(resource_nodes[pk] for pk in resource_ids_by_activity[course_activity.activity_id]),
+                activity_objectives[course_activity.activity_id],
+                activity_collaborators[course_activity.activity_id]
+            ))
+            activity_nodes[-1].cache_resources()
+        return cls(
+            course,
+            tuple(activity_nodes),
+            tuple(CourseObjective.objects.filter(course=course).select_related("objective")),
+            tuple(CourseCollaborator.objects.filter(course=course).select_related("collaborator"))
+        )
+
+    @property
+    def course_activities(self) -> Tuple["CourseActivity", ...]:
+        """
+        :return: the course activities, sorted by rank, with their activity
+        :rtype: Tuple[CourseActivity, ...]
+        """
+        return tuple(node.course_activity for node in self.activities)
+
+    @property
+    def resources(self) -> Tuple[ResourceNode, ...]:
+        """
+        :return: the resources of the course activities, each one once, in the order of the activities
+        :rtype: Tuple[ResourceNode, ...]
+        """
+        return tuple({
+            resource_node.resource.pk: resource_node
+            for activity_node in self.activities for resource_node in activity_node.resources
+        }.values())
+
+    @property
+    def included_objects(self) -> Tuple[BasicModelMixin, ...]:
+        """
+        Get the activities and resources included in the course, like “extract_all_included_objects” does.
+
+        :return: the resources of each activity followed by the activity, each object once
+        :rtype: Tuple[BasicModelMixin, ...]
+        """
+        included_objects: Dict[Tuple[type, int], BasicModelMixin] = dict()
+        for activity_node in self.activities:
+            for resource_node in activity_node.resources:
+                included_objects.setdefault((Resource, resource_node.resource.pk), resource_node.resource)
+            included_objects.setdefault((Activity, activity_node.activity.pk), activity_node.activity)
+        return tuple(included_objects.values())
+
+    @property
+    def entity_objectives(self) -> Tuple["EntityObjective", ...]:
+        """
+        :return: the objectives of the course, of its activities and of their resources, as entity objectives
+        :rtype: Tuple[EntityObjective, ...]
+        """
+        return self.objectives + tuple(itertools.chain(
+            *(activity_node.objectives for activity_node in self.activities),
+            *(resource_node.objectives for resource_node in self.resources)
+        ))
+
+    def get_all_objectives(self) -> Tuple[Objective, ...]:
+        """
+        Get the objectives of the course, like “Course.get_all_objectives” does.
+
+        :return: the objectives in the course, in its activities and in their resources, each objective once
+        :rtype: Tuple[Objective, ...]
+        """
+        return tuple({
+            entity_objective.objective_id: entity_objective.objective for entity_objective in self.entity_objectives
+        }.values())
+
+    def get_activity_node(self, activity_slug: str) -> Optional[ActivityNode]:
+        """
+        :param activity_slug: the slug of an activity
+        :type activity_slug: str
+        :return: the node of the activity in the course, if the activity is included in it
+        :rtype: Optional[ActivityNode]
+        """
+        return next((node for node in self.activities if node.activity.slug == activity_slug), None)
+
+    def get_collaborator_ids(self, an_object: BasicModelMixin) -> FrozenSet[int]:
+        """
+        Get the collaborators of the course or of one of its activities or resources.
+
+        :param an_object: the course, or an activity or a resource included in it
+        :type an_object: BasicModelMixin
+        :return: the primary keys of the collaborators on the object
+        :rtype: FrozenSet[int]
+        """
+        if isinstance(an_object, Course):
+            collaborators = self.collaborators
+        elif isinstance(an_object, Activity):
+            collaborators = tuple(itertools.chain(*(
+                node.collaborators for node in self.activities if node.activity.pk == an_object.pk
+            )))
+        else:
+            collaborators = tuple(itertools.chain(*(
+                node.collaborators for node in self.resources if node.resource.pk == an_object.pk
+            )))
+        return frozenset(collaborator.collaborator_id for collaborator in collaborators)
+
+
+def _get_snapshot_fields(model: type) -> Tuple[str, ...]:
+    """
+    Get the fields of a model stored in course tree snapshots: its concrete fields, or only the fields displayed for
+    users, so that no other personal data is written into the cache.
+
+    :param model: the model
+    :type model: type
+    :return: the attribute names of the fields, the primary key first
+    :rtype: Tuple[str, ...]
+    """
+    if model is get_user_model():
+        return tuple(
+            field.attname for field in model._meta.concrete_fields
+            if field.primary_key or field.name in ("username", "first_name", "last_name")
+        )
+    return tuple(field.attname for field in model._meta.concrete_fields)
+
+
+def _dump_row(instance: models.Model) -> tuple:
+    values = []
+    for field_name in _get_snapshot_fields(type(instance)):
+        value = getattr(instance, field_name)
+        values.append(value.name if isinstance(value, models.fields.files.FieldFile) else value)
+    return tuple(values)
+
+
+def _load_row(model: type, db: str, row: tuple) -> models.Model:
+    return model.from_db(db, _get_snapshot_fields(model), row)
+
+
+class CourseTreeSnapshot:
+    """
+    A compact copy of a course tree, made of tuples of field values only, that can be kept in memory or pickled in a
+    cache. A snapshot is valid as long as the course was not saved, and its content version did not change.
+    """
+    __slots__ = ("key", "users", "objectives", "course_objectives", "course_collaborators", "activities", "resources")
+
+    def __init__(self, tree: CourseTree, version: int):
+        course = tree.course
+        self.key = (course.pk, course.updated, version)
+        users = dict()
+        for collaborator in itertools.chain(
+                tree.collaborators, *(node.collaborators for node in itertools.chain(tree.activities, tree.resources))
+        ):
+            users[collaborator.collaborator_id] = collaborator.collaborator
+        for node in tree.activities:
+            users[node.activity.author_id] = node.activity.author
+        for node in tree.resources:
+            users[node.resource.author_id] = node.resource.author
+        self.users = tuple(_dump_row(user) for user in users.values())
+        self.objectives = tuple({
+            entity_objective.objective_id: _dump_row(entity_objective.objective)
+            for entity_objective in tree.entity_objectives
+        }.values())
+        self.course_objectives = tuple(_dump_row(course_objective) for course_objective in tree.objectives)
+        self.course_collaborators = tuple(_dump_row(collaborator) for collaborator in tree.collaborators)
+        self.activities = tuple(
+            (_dump_row(node.course_activity), _dump_row(node.activity),
+             tuple(resource_node.resource.pk for resource_node in node.resources),
+             tuple(_dump_row(activity_objective) for activity_objective in node.objectives),
+             tuple(_dump_row(collaborator) for collaborator in node.collaborators))
+            for node in tree.activities
+        )
+        self.resources = tuple(
+            (_dump_row(node.resource),
+             tuple(_dump_row(resource_objective) for resource_objective in node.objectives),
+             tuple(_dump_row(collaborator) for collaborator in node.collaborators))
+            for node in tree.resources
+        )
+
+    def is_valid_for(self, course: Course, version: int) -> bool:
+        """
+        :param course: the course, as currently stored
+        :type course: Course
+        :param version: the current content version of the course
+        :type version: int
+        :return: whether this snapshot is a copy of the current content of the course
+        :rtype: bool
+        """
+        return self.key == (course.pk, course.updated, version)
+
+    def to_tree(self, course: Course) -> CourseTree:
+        """
+        Build the course tree back from this snapshot, without any query.
+
+        :param course: the course of this snapshot
+        :type course: Course
+        :return: the course tree
+        :rtype: CourseTree
+        """
+        db = course._state.db
+        users = {row[0]: _load_row(get_user_model(), db, row) for row in self.users}
+        objectives = {row[0]: _load_row(Objective, db, row) for row in self.objectives}
+
+        def load_entity_objective(model: type, row: tuple) -> EntityObjective:
+            entity_objective = _load_row(model, db, row)
+            entity_objective.objective = objectives[entity_objective.objective_id]
+            return entity_objective
+
+        def load_collaborator(model: type, row: tuple) -> ObjectCollaboratorMixin:
+            collaborator = _load_row(model, db, row)
+            collaborator.collaborator = users[collaborator.collaborator_id]
+            return collaborator
+
+        resource_nodes = dict()
+        for resource_row, objective_rows, collaborator_rows in self.resources:
+            resource = _load_row(Resource, db, resource_row)
+            resource.author = users[resource.author_id]
+            resource_nodes[resource.pk] = ResourceNode(
+                resource,
+                tuple(load_entity_objective(ResourceObjective, row) for row in objective_rows),
+                tuple(load_collaborator(ResourceCollaborator, row) for row in collaborator_rows)
+            )
+        activity_nodes = []
+        for course_activity_row, activity_row, resource_ids, objective_rows, collaborator_rows in self.activities:
+            course_activity = _load_row(CourseActivity, db, course_activity_row)
+            activity = _load_row(Activity, db, activity_row)
+            activity.author = users[activity.author_id]
+            course_activity.course, course_activity.activity = course, activity
+            activity_nodes.append(ActivityNode(
+                course_activity,
+                tuple(resource_nodes[resource_id] for resource_id in resource_ids),
+                tuple(load_entity_objective(ActivityObjective, row) for row in objective_rows),
+                tuple(load_collaborator(ActivityCollaborator, row) for row in collaborator_rows)
+            ))
+            activity_nodes[-1].cache_resources()
+        return CourseTree(
+            course,
+            tuple(activity_nodes),
+            tuple(load_entity_objective(CourseObjective, row) for row in self.course_objectives),
+            tuple(load_collaborator(CourseCollaborator, row) for row in self.course_collaborators)
+        )
+
+
+class CourseTreeSnapshotCache:
+    """
+    The course tree snapshots kept in the memory of a process, one for each course. When full, the least recently used
+    snapshot is evicted.
+    """
+
+    def __init__(self):
+        self._snapshots: "collections.OrderedDict[int, CourseTreeSnapshot]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, course_id: int) -> Optional[CourseTreeSnapshot]:
+        """
+        :param course_id: the primary key of the course
+        :type course_id: int
+        :return: the last snapshot stored for the course, if any
+        :rtype: Optional[CourseTreeSnapshot]
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(course_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(course_id)
+            return snapshot
+
+    def put(self, snapshot: CourseTreeSnapshot, max_size: int) -> None:
+        """
+        Store the snapshot of a course, in place of the previous one, and evict the least recently used snapshots
+        beyond the maximum size.
+
+        :param snapshot: the snapshot to store
+        :type snapshot: CourseTreeSnapshot
+        :param max_size: the maximum number of snapshots to keep
+        :type max_size: int
+        """
+        course_id = snapshot.key[0]
+        with self._lock:
+            self._snapshots[course_id] = snapshot
+            self._snapshots.move_to_end(course_id)
+            while len(self._snapshots) > max_size:
+                self._snapshots.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Forget every snapshot.
+        """
+        with self._lock:
+            self._snapshots.clear()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+
+course_tree_snapshots = CourseTreeSnapshotCache()
+
+
+def get_course_tree(course: Course) -> CourseTree:
+    """
+    Get the content tree of a course from its snapshot when it is still valid, in the memory of the process or in the
+    “LEARNING_COURSE_TREE_CACHE” cache. Otherwise, the tree is loaded and its snapshot is stored. A valid snapshot costs
+    a single query, to read the content version of the course.
+
+    :param course: the course
+    :type course: Course
+    :return: the course tree
+    :rtype: CourseTree
+    """
+    version = ContentVersion.objects.get_version(course)
+    cache_size, cache_alias = get_course_tree_cache_size(), get_course_tree_cache_alias()
+    cache_key = "learning.course_tree.{}.{}".format(course.pk, version)
+
+    snapshot = course_tree_snapshots.get(course.pk)
+    if (snapshot is None or not snapshot.is_valid_for(course, version)) and cache_alias is not None:
+        snapshot = caches[cache_alias].get(cache_key)
+        if snapshot is not None and snapshot.is_valid_for(course, version) and cache_size > 0:
+            course_tree_snapshots.put(snapshot, cache_size)
+    if snapshot is not None and snapshot.is_valid_for(course, version):
+        return snapshot.to_tree(course)
+
+    tree = CourseTree.load(course)
+    snapshot = CourseTreeSnapshot(tree, version)
+    if cache_size > 0:
+        course_tree_snapshots.put(snapshot, cache_size)
+    if cache_alias is not None:
+        caches[cache_alias].set(cache_key, snapshot)
+    return tree
+
+
+class ProgressionMatrix:
+    """
+    The progression of all the students of a course, as a students × objectives boolean matrix. A cell is True when
+    the student validated the objective on the course, on one of its activities or on one of their resources.
+
+    Rates of students and objectives are reductions of the matrix rows or columns. Each objective column also has the
+    taxonomy levels under which the objective is used in the course. Rates of taxonomy levels count entity objectives
+    instead, like “get_progression_on_course_for_user”: an objective validated on a resource does not validate it on
+    the course.
+    """
+
+    def __init__(self, students: List[get_user_model()], objectives: List[Objective],
+                 validated: List[List[bool]], objective_levels: List[Set[str]],
+                 level_counts: Dict[str, List[int]]):
+        self.students = students
+        self.objectives = objectives
+        self.validated = validated
+        self.objective_levels = objective_levels
+        self.level_counts = level_counts
+
+    def student_rates(self) -> List[float]:
+        """
+        Get the validation rate of each student, in the same order as the students.
+
+        :return: for each student, the ratio of validated objectives
+        :rtype: List[float]
+        """
+        nb_objectives = len(self.objectives)
+        return [sum(row) / nb_objectives if nb_objectives else 0.0 for row in self.validated]
+
+    def _validations_by_objective(self) -> List[int]:
+        validations = [0] * len(self.objectives)
+        for row in self.validated:
+            for index, cell in enumerate(row):
+                validations[index] += cell
+        return validations
+
+    def objective_rates(self) -> List[float]:
+        """
+        Get the validation rate of each objective, in the same order as the objectives.
+
+        :return: for each objective, the ratio of students who validated it
+        :rtype: List[float]
+        """
+        nb_students = len(self.students)
+        return [nb / nb_students if nb_students else 0.0 for nb in self._validations_by_objective()]
+
+    def taxonomy_level_rates(self) -> Dict[str, float]:
+        """
+        Get the validation rate of each taxonomy level used in the course. The rate of a level is the ratio of entity
+        objectives of this level validated by the students, over all the students.
+
+        :return: the rate of each taxonomy level used in the course, by taxonomy level name, in taxonomy order
+        :rtype: Dict[str, float]
+        """
+        nb_students = len(self.students)
+        rates = dict()
+        for level in TaxonomyLevel:
+            if level.name in self.level_counts:
+                nb_validated, nb_entity_objectives = self.level_counts[level.name]
+                nb_cells = nb_entity_objectives * nb_students
+                rates[level.name] = nb_validated / nb_cells if nb_cells else 0.0
+        return rates
+
+    def rows(self) -> Generator[Tuple[get_user_model(), List[bool], float], None, None]:
+        """
+        Iterate over the matrix rows, with their student and validation rate.
+
+        :return: a generator of tuples (student, validations of the student, validation rate of the student)
+        :rtype: Generator[Tuple[get_user_model(), List[bool], float], None, None]
+        """
+        return zip(self.students, self.validated, self.student_rates())
+
+
+def get_progression_matrix(course: Course) -> ProgressionMatrix:
+    """
+    Get the progression of all the students registered on a course. All validations on the objectives of the course,
+    of its activities and of their resources are loaded at once, with five queries whatever the number of students and
+    objectives.
+
+    :param course: the course for which to get the progression matrix
+    :type course: Course
+    :return: the students × objectives progression matrix, students being ordered by username and objectives by ability
+    :rtype: ProgressionMatrix
+    """
+    students = [
+        registration.student for registration in
+        RegistrationOnCourse.objects.filter(course=course).select_related("student").order_by("student__username")
+    ]
+    student_indexes = {student.pk: index for index, student in enumerate(students)}
+
+    levels: Dict[int, Set[str]] = dict()
+    validations: Set[Tuple[int, int]] = set()
+    level_counts: Dict[str, List[int]] = dict()
+    for entity_objectives, occurrence in (
+            (CourseObjective.objects.filter(course=course), "course_id"),
+            (ActivityObjective.objects.filter(activity__course_activities__course=course), "activity_id"),
+            # A resource objective occurs once for each activity of the course that uses the resource
+            (ResourceObjective.objects.filter(resource__activities__course_activities__course=course),
+             "resource__activities__id"),
+    ):
+        # Each row is an occurrence of an entity objective joined with one of its validators, or with None when no one
+        # validated it
+        occurrences_seen: Set[Tuple[int, int]] = set()
+        rows = entity_objectives.values_list("pk", occurrence, "objective_id", "taxonomy_level", "validators")
+        for entity_objective_id, occurrence_id, objective_id, taxonomy_level, student_id in rows:
+            level = get_taxonomy_level_name(taxonomy_level)
+            levels.setdefault(objective_id, set()).add(level)
+            counts = level_counts.setdefault(level, [0, 0])
+            if (entity_objective_id, occurrence_id) not in occurrences_seen:
+                occurrences_seen.add((entity_objective_id, occurrence_id))
+                counts[1] += 1
+            if student_id in student_indexes:
+                validations.add((student_indexes[student_id], objective_id))
+                counts[0] += 1
+
+    objectives = list(Objective.objects.filter(pk__in=levels.keys()).order_by("ability", "pk"))
+    validated = [
+        [(student_index, objective.pk) in validations for objective in objectives]
+        for student_index in range(len(students))
+    ]
+    return ProgressionMatrix(
+        students, objectives, validated, [levels[objective.pk] for objective in objectives], level_counts
+    )
+
+
+class ProgressionSnapshotManager(models.Manager):
+    """
+    The manager of progression snapshots, which computes them and keeps them current.
+    """
+
+    # noinspection PyMethodMayBeStatic
+    def compute_levels(self, course_id: int, student_ids: List[int]) -> Dict[int, Dict[str, List[int]]]:
+        """
+        Compute the validated and total number of entity objectives of each taxonomy level in a course, for some
+        students. Entity objectives are counted like in “get_progression_on_course_for_user”. This runs six queries,
+        whatever the number of students.
+
+        :param course_id: the primary key of the course
+        :type course_id: int
+        :param student_ids: the primary keys of the students
+        :type student_ids: List[int]
+        :return: for each student, the [validated, total] numbers of entity objectives by taxonomy level name
+        :rtype: Dict[int, Dict[str, List[int]]]
+        """
+        levels_by_student: Dict[int, Dict[str, List[int]]] = {student_id: dict() for student_id in student_ids}
+        for entity_objectives, validator_model, validator_field in (
+                (CourseObjective.objects.filter(course=course_id), CourseObjectiveValidator, "course_objective"),
+                (ActivityObjective.objects.filter(activity__course_activities__course=course_id),
+                 ActivityObjectiveValidator, "activity_objective"),
+                (ResourceObjective.objects.filter(resource__activities__course_activities__course=course_id),
+                 ResourceObjectiveValidator, "resource_objective"),
+        ):
+            rows = list(entity_objectives.order_by().values_list("pk", "taxonomy_level"))
+            validations = set(validator_model.objects.filter(
+                student__in=student_ids, **{"{}__in".format(validator_field): entity_objectives.order_by().values("pk")}
+            ).values_list("{}_id".format(validator_field), "student_id"))
+            for entity_objective_id, taxonomy_level in rows:
+                level = get_taxonomy_level_name(taxonomy_level)
+                for student_id, levels in levels_by_student.items():
+                    counts = levels.setdefault(level, [0, 0])
+                    counts[0] += (entity_objective_id, student_id) in validations
+                    counts[1] += 1
+        return levels_by_student
+
+    def create_for(self, course_id: int, student_id: int) -> "ProgressionSnapshot":
+        """
+        Create, or recompute, the progression snapshot of a student on a course.
+
+        :param course_id: the primary key of the course
+        :type course_id: int
+        :param student_id: the primary key of the student
+        :type student_id: int
+        :return: the progression snapshot
+        :rtype: ProgressionSnapshot
+        """
+        snapshot, created = self.update_or_create(
+            course_id=course_id, student_id=student_id,
+            defaults={"levels": self.compute_levels(course_id, [student_id])[student_id]}
+        )
+        return snapshot
+
+    def refresh(self, course_ids) -> None:
+        """
+        Recompute the existing progression snapshots of courses, after entity objectives were added or removed from
+        them. No snapshot is created, so that this can safely happen while a course is being deleted.
+
+        :param course_ids: the primary keys of the courses
+        """
+        for course_id in set(course_ids):
+            snapshots = list(self.filter(course_id=course_id))
+            if snapshots:
+                levels = self.compute_levels(course_id, [snapshot.student_id for snapshot in snapshots])
+                for snapshot in snapshots:
+                    snapshot.levels = levels[snapshot.student_id]
+                self.bulk_update(snapshots, ["levels"])
+
+    def record_validation(self, entity_objective: "EntityObjective", student_id: int, delta: int) -> None:
+        """
+        Count a validation of an entity objective, or its removal, in the progression snapshots of the student on
+        every course that includes it.
+
+        :param entity_objective: the entity objective that was validated or whose validation was removed
+        :type entity_objective: EntityObjective
+        :param student_id: the primary key of the student
+        :type student_id: int
+        :param delta: 1 when the validation was added, -1 when it was removed
+        :type delta: int
+        """
+        self.record_validations([entity_objective], student_id, delta)
+
+    def record_validations(self, entity_objectives: List["EntityObjective"], student_id: int, delta: int) -> None:
+        """
+        Count validations of entity objectives, or their removal, in the progression snapshots of the student on every
+        course that includes them. The number of queries does not depend on the number of entity objectives or courses.
+
+        :param entity_objectives: the entity objectives that were validated or whose validations were removed
+        :type entity_objectives: List[EntityObjective]
+        :param student_id: the primary key of the student
+        :type student_id: int
+        :param delta: 1 when the validations were added, -1 when they were removed
+        :type delta: int
+        """
+        entity_objectives_by_model = collections.defaultdict(list)
+        for entity_objective in entity_objectives:
+            entity_objectives_by_model[type(entity_objective)].append(entity_objective)
+        deltas_by_course: Dict[int, collections.Counter] = collections.defaultdict(collections.Counter)
+        for model, model_entity_objectives in entity_objectives_by_model.items():
+            course_ids = model.get_course_ids_by_entity_objective(model_entity_objectives)
+            for entity_objective in model_entity_objectives:
+                level = get_taxonomy_level_name(entity_objective.taxonomy_level)
+                for course_id in course_ids[entity_objective.pk]:
+                    deltas_by_course[course_id][level] += delta
+        if not deltas_by_course:
+            return
+        with transaction.atomic():
+            snapshots = list(self.select_for_update().filter(course_id__in=deltas_by_course, student_id=student_id))
+            for snapshot in snapshots:
+                for level, level_delta in deltas_by_course[snapshot.course_id].items():
+                    snapshot.levels.setdefault(level, [0, 0])[0] += level_delta
+                snapshot.updated = timezone.now()
+            self.bulk_update(snapshots, ["levels", "updated"])
+
+    def repair(self, course_id: int, fix: bool = True) -> int:
+        """
+        Compare the progression snapshots of a course with the recomputed progressions of its students, and repair
+        them.
+
+        :param course_id: the primary key of the course
+        :type course_id: int
+        :param fix: whether to repair snapshots, or only count those that drifted
+        :type fix: bool
+        :return: the number of missing, wrong or orphan snapshots
+        :rtype: int
+        """
+        student_ids = list(RegistrationOnCourse.objects.filter(course=course_id).values_list("student_id", flat=True))
+        expected = self.compute_levels(course_id, student_ids)
+        stored = {snapshot.student_id: snapshot for snapshot in self.filter(course_id=course_id)}
+        orphans = [student_id for student_id in stored if student_id not in expected]
+        wrong = [stored[student_id] for student_id in expected
+                 if student_id in stored and stored[student_id].levels != expected[student_id]]
+        missing = [student_id for student_id in expected if student_id not in stored]
+        if fix:
+            with transaction.atomic():
+                self.filter(course_id=course_id, student_id__in=orphans).delete()
+                for snapshot in wrong:
+                    snapshot.levels = expected[snapshot.student_id]
+                self.bulk_update(wrong, ["levels"])
+                self.bulk_create([
+                    ProgressionSnapshot(course_id=course_id, student_id=student_id, levels=expected[student_id])
+                    for student_id in missing
+                ], ignore_conflicts=True)
+        return len(orphans) + len(wrong) + len(missing)
+
+
+class ProgressionSnapshot(models.Model):
+    """
+    The progression of a student on a course, as the validated and total numbers of entity objectives of each taxonomy
+    level. Snapshots are kept current by signals (see learning.signals) and can be repaired with the
+    “rebuild_progression_snapshots” management command.
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name="progression_snapshots",
+        verbose_name=_("Course")
+    )
+    student = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="progression_snapshots",
+        verbose_name=_("Student")
+    )
+    levels = models.JSONField(
+        default=dict,
+        verbose_name=_("Levels"),
+        help_text=_("The validated and total numbers of entity objectives, by taxonomy level")
+    )
+    updated = models.DateTimeField(auto_now=True, verbose_name=_("Last updated the…"))
+
+    objects = ProgressionSnapshotManager()
+
+    @property
+    def validated(self) -> int:
+        """
+        :return: the number of entity objectives validated by the student in the course
+        :rtype: int
+        """
+        return sum(validated for validated, total in self.levels.values())
+
+    @property
+    def total(self) -> int:
+        """
+        :return: the number of entity objectives in the course
+        :rtype: int
+        """
+        return sum(total for validated, total in self.levels.values())
+
+    @property
+    def progress(self) -> int:
+        """
+        :return: the percentage of entity objectives validated by the student in the course
+        :rtype: int
+        """
+        total = self.total
+        return int(100 * self.validated / total) if total else 0
+
+    def __str__(self):
+        return "{} ({} %)".format(self.student, self.progress)
+
+    class Meta:
+        unique_together = ("course", "student")
+        verbose_name = pgettext_lazy("Progression snapshot verbose name (singular form)", "progression snapshot")
+        verbose_name_plural = pgettext_lazy("Progression snapshot verbose name (plural form)", "progression snapshots")
+
+
+class IndexedTextManager(models.Manager):
+    """
+    The manager of indexed texts, which stores them with their trigrams and looks texts up by substring.
+    """
+
+    def index(self, an_object: models.Model) -> None:
+        """
+        Store the folded text of an object and its trigrams, if it changed since it was last indexed.
+
+        :param an_object: the object to index, whose type is in “INDEXED_TEXT_FIELDS”
+        :type an_object: models.Model
+        """
+        folded_text = fold_text(getattr(an_object, INDEXED_TEXT_FIELDS[type(an_object)]))
+        indexed_text, created = self.get_or_create(
+            content_type=ContentType.objects.get_for_model(type(an_object)), object_id=an_object.pk,
+            defaults={"folded_text": folded_text}
+        )
+        if not created:
+            if indexed_text.folded_text == folded_text:
+                return
+            indexed_text.folded_text = folded_text
+            indexed_text.save(update_fields=["folded_text"])
+            indexed_text.trigrams.all().delete()
+            indexed_text.words.all().delete()
+        IndexedTextTrigram.objects.bulk_create([
+            IndexedTextTrigram(text=indexed_text, trigram=trigram) for trigram in get_trigrams(folded_text)
+        ])
+        IndexedTextWord.objects.bulk_create([
+            IndexedTextWord(text=indexed_text, word=word, occurrences=occurrences)
+            for word, occurrences in get_words(folded_text).items()
+        ])
+
+    def forget(self, an_object: models.Model) -> None:
+        """
+        Remove the indexed text of an object.
+
+        :param an_object: the object whose text is removed from the index
+        :type an_object: models.Model
+        """
+        self.filter(content_type=ContentType.objects.get_for_model(type(an_object)), object_id=an_object.pk).delete()
+
+    def matching(self, model: type, folded_query: str) -> QuerySet:
+        """
+        Get the objects of a model whose folded text contains a folded query. Candidates are the texts that have all
+        the trigrams of the query, which are then checked with a substring comparison. Queries shorter than a trigram
+        are compared with every text of the model.
+
+        :param model: the type of the objects, whose type is in “INDEXED_TEXT_FIELDS”
+        :type model: type
+        :param folded_query: the folded text to search for
+        :type folded_query: str
+        :return: the primary keys of the matching objects, as a queryset of values
+        :rtype: QuerySet
+        """
+        texts = self.filter(content_type=ContentType.objects.get_for_model(model), folded_text__contains=folded_query)
+        trigrams = get_trigrams(folded_query)
+        if trigrams:
+            texts = texts.filter(pk__in=IndexedTextTrigram.objects.filter(trigram__in=trigrams).values("text").annotate(
+                nb_trigrams=models.Count("pk")
+            ).filter(nb_trigrams=len(trigrams)).values("text"))
+        return texts.values("object_id")
+
+    # noinspection PyMethodMayBeStatic
+    def get_word_counts(self, text_lookups: Q) -> Dict[Tuple[int, int], Dict[str, int]]:
+        """
+        Get the words of some indexed texts, with their number of occurrences.
+
+        :param text_lookups: the lookups that select the indexed texts
+        :type text_lookups: Q
+        :return: the word counts of each text, by content type and object identifier
+        :rtype: Dict[Tuple[int, int], Dict[str, int]]
+        """
+        word_counts = collections.defaultdict(dict)
+        for content_type_id, object_id, word, occurrences in IndexedTextWord.objects.filter(
+            text__in=self.filter(text_lookups).values("pk")
+        ).values_list("text__content_type_id", "text__object_id", "word", "occurrences"):
+            word_counts[(content_type_id, object_id)][word] = occurrences
+        return word_counts
+
+    def get_inverse_document_frequencies(self, text_lookups: Q, words) -> Dict[str, float]:
+        """
+        Get the smoothed inverse document frequencies of the words of some indexed texts, and of other words, among
+        all the indexed texts.
+
+        :param text_lookups: the lookups that select the indexed texts whose words are needed
+        :type text_lookups: Q
+        :param words: other words whose inverse document frequencies are needed
+        :return: the inverse document frequency of each word
+        :rtype: Dict[str, float]
+        """
+        nb_texts = self.count()
+        document_frequencies = IndexedTextWord.objects.filter(
+            Q(word__in=list(words)) | Q(
+                word__in=IndexedTextWord.objects.filter(text__in=self.filter(text_lookups).values("pk")).values("word")
+            )
+        ).values("word").annotate(nb_texts=models.Count("pk")).order_by().values_list("word", "nb_texts")
+        return {
+            word: math.log((1 + nb_texts) / (1 + document_frequency)) + 1
+            for word, document_frequency in document_frequencies
+        }
+
+
+class IndexedText(models.Model):
+    """
+    The folded text of an object, used to search for substrings without scanning every object. It is a denormalized
+    copy of the objective abilities and of the course, activity and resource names, kept current by the signals in
+    “learning.signals”.
+    """
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Object type")
+    )
+    object_id = models.PositiveIntegerField(verbose_name=_("Object identifier"))
+    folded_text = models.TextField(
+        verbose_name=_("Folded text"),
+        help_text=_("The text of the object, lowered and without accents")
+    )
+
+    objects = IndexedTextManager()
+
+    def __str__(self):
+        return self.folded_text
+
+    class Meta:
+        unique_together = ("content_type", "object_id")
+        verbose_name = pgettext_lazy("Indexed text verbose name (singular form)", "indexed text")
+        verbose_name_plural = pgettext_lazy("Indexed text verbose name (plural form)", "indexed texts")
+
+
+class IndexedTextTrigram(models.Model):
+    """
+    A trigram of an indexed text. The index on trigrams is what makes substring searches sub-linear.
+    """
+    text = models.ForeignKey(
+        IndexedText,
+        on_delete=models.CASCADE,
+        related_name="trigrams",
+        verbose_name=_("Indexed text")
+    )
+    trigram = models.CharField(max_length=TRIGRAM_LENGTH, verbose_name=_("Trigram"))
+
+    def __str__(self):
+        return self.trigram
+
+    class Meta:
+        unique_together = ("trigram", "text")
+        verbose_name = pgettext_lazy("Indexed text trigram verbose name (singular form)", "indexed text trigram")
+        verbose_name_plural = pgettext_lazy("Indexed text trigram verbose name (plural form)", "indexed text trigrams")
+
+
+class IndexedTextWord(models.Model):
+    """
+    A word of an indexed text, with its number of occurrences. Words of a text form its sparse term frequency vector,
+    which is used to rank objective suggestions.
+    """
+    text = models.ForeignKey(
+        IndexedText,
+        on_delete=models.CASCADE,
+        related_name="words",
+        verbose_name=_("Indexed text")
+    )
+    word = models.CharField(max_length=255, verbose_name=_("Word"))
+    occurrences = models.PositiveIntegerField(verbose_name=_("Occurrences"))
+
+    def __str__(self):
+        return self.word
+
+    class Meta:
+        unique_together = ("word", "text")
+        verbose_name = pgettext_lazy("Indexed text word verbose name (singular form)", "indexed text word")
+        verbose_name_plural = pgettext_lazy("Indexed text word verbose name (plural form)", "indexed text words")
+
+
+# The field holding the indexed text of each indexed model
+INDEXED_TEXT_FIELDS = {
+    Objective: "ability",
+    Course: "name",
+    Activity: "name",
+    Resource: "name",
+}
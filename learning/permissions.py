@@ -20,21 +20,80 @@
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 #
 import abc
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
-from typing import Set
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext as _
 
+# The permissions computed during the current request, keyed by (object type, object pk, user pk). Values are bitmasks
+# for types with “simple_permissions”, sets of full permissions otherwise. The cache is None outside of a
+# “permissions_cache” scope: permissions are then computed on each call, as before.
+_CacheKey = Tuple[type, int, Optional[int]]
+_permissions_cache: ContextVar[Optional[Dict[_CacheKey, Union[int, FrozenSet[str]]]]] = ContextVar(
+    "learning_permissions_cache", default=None
+)
+
+
+@contextmanager
+def permissions_cache() -> Iterator[None]:
+    """
+    Open a permission cache scope. Inside this scope, the permissions of a user on an object are computed only once.
+    The cache is stored in a context variable, so that it is private to the current thread or asynchronous task. This
+    is used by the “PermissionsCacheMiddleware” to memoize permissions for the duration of a request.
+    """
+    token = _permissions_cache.set(dict())
+    try:
+        yield
+    finally:
+        _permissions_cache.reset(token)
+
+
+def invalidate_permissions_cache() -> None:
+    """
+    Forget every permission computed in the current cache scope, if any. This must be called each time something that
+    permissions depend on changes (collaborators, students, etc.). As permissions cascade from courses to activities
+    and resources, the whole scope is invalidated, not only the changed object.
+    """
+    cache = _permissions_cache.get()
+    if cache is not None:
+        cache.clear()
+
+
+def _get_cache_key(an_object: "ObjectPermissionManagerMixin", user: get_user_model()) -> _CacheKey:
+    """
+    Get the key used to store the permissions of a user on an object in the permissions cache.
+
+    :param an_object: the object on which permissions are computed
+    :type an_object: ObjectPermissionManagerMixin
+    :param user: the user for which permissions are computed
+    :type user: get_user_model()
+    :return: the cache key
+    :rtype: tuple
+    """
+    return type(an_object), getattr(an_object, "pk", None), getattr(user, "pk", None)
+
 
 class ObjectPermissionManagerMixin:
     """
     This mixin implements a simple way to manage object permission for single users. This extends the Django
     authentication system in order to provide a per-object permission system.
 
+    Subclasses that list their simple permissions in “simple_permissions” have their permissions handled as integer
+    bitmasks, the bit of a permission being its position in the tuple. Full permission names and bits are computed
+    once, when the class is created: permission checks are then bit tests, and the “<permission>_<object_type>”
+    string sets are only built for callers that need them, such as templates.
+
     Read the Wiki for more information: https://gitlab.com/koala-lms/django-learning/-/wikis/Contribution/Manage%20Permissions
     """
 
+    # The simple permissions that can be given on objects of this type, in bit order. Empty means permissions are
+    # handled as string sets only.
+    simple_permissions: Tuple[str, ...] = tuple()
+
     class PermissionMessage(Enum):
         """
         This enumeration contains the permission messages that could be shown to a user. Items can be added
@@ -45,6 +104,19 @@ class ObjectPermissionManagerMixin:
         CHANGE = _("Can change the object")
         DELETE = _("Can delete the object")
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        object_type = cls.__name__.lower()
+        cls._permission_bits = {
+            permission: 1 << bit for bit, permission in enumerate(cls.simple_permissions)
+        }
+        cls._full_permissions = {
+            permission: "{permission}_{object_type}".format(permission=permission, object_type=object_type)
+            for permission in cls.simple_permissions
+        }
+        # Decoded full permissions, by mask. Only a few masks exist in practice, as they come from roles.
+        cls._full_permissions_by_mask = dict()
+
     def _make_full_permission(self, permission: str) -> str:
         """
         Transform a simple permission, like “add”, and adapt it to the current object, with the form of
@@ -56,7 +128,12 @@ class ObjectPermissionManagerMixin:
         :return: a full permission string, containing the object name as suffix and permission as prefix
         :rtype: str
         """
-        return "{permission}_{object_type}".format(permission=permission, object_type=type(self).__name__.lower())
+        full_permission = self._full_permissions.get(permission)
+        if full_permission is None:
+            full_permission = "{permission}_{object_type}".format(
+                permission=permission, object_type=type(self).__name__.lower()
+            )
+        return full_permission
 
     def _make_perms(self, permissions: Set[str]) -> Set[str]:
         """
@@ -69,6 +146,55 @@ class ObjectPermissionManagerMixin:
         """
         return {self._make_full_permission(permission) for permission in permissions}
 
+    @classmethod
+    def _encode_perms(cls, permissions: Iterable[str]) -> int:
+        """
+        Encode simple permissions as a bitmask.
+
+        :param permissions: the simple permissions to encode, all part of “simple_permissions”
+        :type permissions: Iterable[str]
+        :raises ValueError: when a permission is not part of “simple_permissions”
+        :return: the permissions bitmask
+        :rtype: int
+        """
+        mask = 0
+        for permission in permissions:
+            try:
+                mask |= cls._permission_bits[permission]
+            except KeyError:
+                raise ValueError("“{}” is not a permission of {}.".format(permission, cls.__name__))
+        return mask
+
+    @classmethod
+    def _decode_perms(cls, mask: int) -> Set[str]:
+        """
+        Decode a bitmask into the simple permissions it contains.
+
+        :param mask: the permissions bitmask
+        :type mask: int
+        :return: the simple permissions
+        :rtype: Set[str]
+        """
+        return {permission for permission, bit in cls._permission_bits.items() if mask & bit}
+
+    @classmethod
+    def _decode_full_perms(cls, mask: int) -> FrozenSet[str]:
+        """
+        Decode a bitmask into the full permissions it contains, in the form of “<permission>_<object_type>”.
+
+        :param mask: the permissions bitmask
+        :type mask: int
+        :return: the full permissions
+        :rtype: FrozenSet[str]
+        """
+        full_permissions = cls._full_permissions_by_mask.get(mask)
+        if full_permissions is None:
+            full_permissions = frozenset(
+                cls._full_permissions[permission] for permission, bit in cls._permission_bits.items() if mask & bit
+            )
+            cls._full_permissions_by_mask[mask] = full_permissions
+        return full_permissions
+
     def get_user_perms(self, user: get_user_model()) -> Set[str]:
         """
         Get the full permissions for a given user. This consists of getting all the authorization for this user adapted
@@ -79,7 +205,34 @@ class ObjectPermissionManagerMixin:
         :return: the set of permissions for this user.
         :rtype: Set[str]
         """
-        return self._make_perms(self._get_user_perms(user))
+        if self.simple_permissions:
+            return set(self._decode_full_perms(self.get_user_perms_mask(user)))
+        cache = _permissions_cache.get()
+        if cache is None or getattr(self, "pk", None) is None:
+            return self._make_perms(self._get_user_perms(user))
+        key = _get_cache_key(self, user)
+        if key not in cache:
+            cache[key] = frozenset(self._make_perms(self._get_user_perms(user)))
+        return set(cache[key])
+
+    def get_user_perms_mask(self, user: get_user_model()) -> int:
+        """
+        Get the permissions for a given user, as a bitmask of “simple_permissions”.
+
+        .. note:: This requires the class to define “simple_permissions”.
+
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        cache = _permissions_cache.get()
+        if cache is None or getattr(self, "pk", None) is None:
+            return self._load_user_perms_mask(user)
+        key = _get_cache_key(self, user)
+        if key not in cache:
+            cache[key] = self._load_user_perms_mask(user)
+        return cache[key]
 
     @abc.abstractmethod
     def _get_user_perms(self, user: get_user_model()) -> Set[str]:
@@ -96,6 +249,82 @@ class ObjectPermissionManagerMixin:
         """
         raise NotImplementedError()
 
+    def _get_user_perms_mask(self, user: get_user_model()) -> int:
+        """
+        Compute the permissions bitmask of this user. By default, this encodes what “_get_user_perms” returns. Classes
+        with “simple_permissions” should rather compute the bitmask directly, and decode it in “_get_user_perms”.
+
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        return self._encode_perms(self._get_user_perms(user))
+
+    def _load_user_perms_mask(self, user: get_user_model()) -> int:
+        """
+        Load the permissions bitmask of this user. By default, it is computed using “_get_user_perms_mask”. Subclasses
+        can override this to read permissions from a faster storage, such as a denormalized table.
+
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the permissions bitmask for this user.
+        :rtype: int
+        """
+        return self._get_user_perms_mask(user)
+
+    @classmethod
+    def _bulk_get_user_perms(cls, objects: List["ObjectPermissionManagerMixin"],
+                             user: get_user_model()) -> Dict["ObjectPermissionManagerMixin", Set[str]]:
+        """
+        Get the simple permissions of a user on many objects of this type at once.
+
+        .. note:: This is used for classes without “simple_permissions” only, and calls “_get_user_perms” on each
+                  object.
+
+        :param objects: the objects for which to retrieve permissions, all of this type
+        :type objects: List[ObjectPermissionManagerMixin]
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the set of simple permissions for this user, for each object
+        :rtype: Dict[ObjectPermissionManagerMixin, Set[str]]
+        """
+        return {an_object: an_object._get_user_perms(user) for an_object in objects}
+
+    @classmethod
+    def _bulk_get_user_perms_mask(cls, objects: List["ObjectPermissionManagerMixin"],
+                                  user: get_user_model()) -> Dict["ObjectPermissionManagerMixin", int]:
+        """
+        Get the permissions bitmask of a user on many objects of this type at once.
+
+        .. note:: By default, this calls “_get_user_perms_mask” on each object. Subclasses should override it to load
+                  the data permissions depend on with a fixed number of queries, whatever the number of objects is.
+
+        :param objects: the objects for which to retrieve permissions, all of this type
+        :type objects: List[ObjectPermissionManagerMixin]
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the permissions bitmask for this user, for each object
+        :rtype: Dict[ObjectPermissionManagerMixin, int]
+        """
+        return {an_object: an_object._get_user_perms_mask(user) for an_object in objects}
+
+    @classmethod
+    def _bulk_load_user_perms_mask(cls, objects: List["ObjectPermissionManagerMixin"],
+                                   user: get_user_model()) -> Dict["ObjectPermissionManagerMixin", int]:
+        """
+        Load the permissions bitmask of a user on many objects of this type at once. This is to
+        “_bulk_get_user_perms_mask” what “_load_user_perms_mask” is to “_get_user_perms_mask”.
+
+        :param objects: the objects for which to retrieve permissions, all of this type
+        :type objects: List[ObjectPermissionManagerMixin]
+        :param user: the user for which to retrieve permissions
+        :type user: get_user_model()
+        :return: the permissions bitmask for this user, for each object
+        :rtype: Dict[ObjectPermissionManagerMixin, int]
+        """
+        return cls._bulk_get_user_perms_mask(objects, user)
+
     def user_can_view(self, user: get_user_model()) -> bool:
         """
         Check whether the given user has the “view permission” on this object.
@@ -105,7 +334,7 @@ class ObjectPermissionManagerMixin:
         :return: True is the user has the given permission on the object
         :rtype: bool
         """
-        return self._make_full_permission("view") in self.get_user_perms(user)
+        return self.user_can("view", user)
 
     def user_can_add(self, user: get_user_model()) -> bool:
         """
@@ -116,7 +345,7 @@ class ObjectPermissionManagerMixin:
         :return: True is the user has the given permission on the object
         :rtype: bool
         """
-        return self._make_full_permission("add") in self.get_user_perms(user)
+        return self.user_can("add", user)
 
     def user_can_change(self, user: get_user_model()) -> bool:
         """
@@ -127,7 +356,7 @@ class ObjectPermissionManagerMixin:
         :return: True is the user has the given permission on the object
         :rtype: bool
         """
-        return self._make_full_permission("change") in self.get_user_perms(user)
+        return self.user_can("change", user)
 
     def user_can_delete(self, user: get_user_model()) -> bool:
         """
@@ -138,7 +367,7 @@ class ObjectPermissionManagerMixin:
         :return: True is the user has the given permission on the object
         :rtype: bool
         """
-        return self._make_full_permission("delete") in self.get_user_perms(user)
+        return self.user_can("delete", user)
 
     def user_can(self, permission: str, user: get_user_model()) -> bool:
         """
@@ -151,4 +380,51 @@ class ObjectPermissionManagerMixin:
         :return: True is the user has the given permission on the object
         :rtype: bool
         """
+        if self.simple_permissions:
+            return bool(self.get_user_perms_mask(user) & self._permission_bits.get(permission, 0))
         return self._make_full_permission(permission) in self.get_user_perms(user)
+
+
+def resolve_perms(objects: Iterable[ObjectPermissionManagerMixin],
+                  user: get_user_model()) -> Dict[ObjectPermissionManagerMixin, Set[str]]:
+    """
+    Get the full permissions of a user on many objects at once, in the form of “<permission>_<object_type>”. Objects
+    are grouped by type and the permissions of each group are computed by the “_bulk_get_user_perms” method of the
+    type. Permissions already known by the current permissions cache are reused, the new ones are stored into it.
+
+    .. note:: Objects must be saved, as they are used as dictionary keys. Keys keep the order of the given objects.
+
+    :param objects: the objects for which to retrieve permissions
+    :type objects: Iterable[ObjectPermissionManagerMixin]
+    :param user: the user for which to retrieve permissions
+    :type user: get_user_model()
+    :return: the set of permissions for this user, for each object
+    :rtype: Dict[ObjectPermissionManagerMixin, Set[str]]
+    """
+    cache = _permissions_cache.get()
+    known, missing_objects = dict(), defaultdict(list)
+    unique_objects = {_get_cache_key(an_object, user): an_object for an_object in objects}
+    for key, an_object in unique_objects.items():
+        if cache is not None and key in cache:
+            known[an_object] = cache[key]
+        else:
+            missing_objects[type(an_object)].append(an_object)
+    for object_type, typed_objects in missing_objects.items():
+        if object_type.simple_permissions:
+            computed = object_type._bulk_load_user_perms_mask(typed_objects, user)
+        else:
+            computed = {
+                an_object: frozenset(an_object._make_perms(simple_permissions))
+                for an_object, simple_permissions in object_type._bulk_get_user_perms(typed_objects, user).items()
+            }
+        known.update(computed)
+        if cache is not None:
+            cache.update({_get_cache_key(an_object, user): value for an_object, value in computed.items()})
+    # Cached values are either bitmasks or sets of full permissions, depending on the object type
+    return {
+        an_object: set(
+            type(an_object)._decode_full_perms(known[an_object]) if type(an_object).simple_permissions
+            else known[an_object]
+        )
+        for an_object in unique_objects.values()
+    }
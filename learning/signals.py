@@ -0,0 +1,383 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+"""
+Signal receivers that keep the MaterializedPermission, ProgressionSnapshot, IndexedText and ContentVersion tables
+current, and make objects forget the members loaded by “MembershipCacheMixin” when they change. Receivers of
+materialized permissions do nothing when the “LEARNING_MATERIALIZED_PERMISSIONS” settings is disabled.
+
+.. caution:: Changes made with “QuerySet.update” do not send signals. Run the “rebuild_permissions”,
+             “rebuild_progression_snapshots” and “rebuild_text_index” management commands after such changes, and
+             bump the content versions of the objects that changed.
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from learning.models import Activity, ActivityCollaborator, ActivityObjective, ActivityObjectiveValidator, \
+    ContentVersion, Course, CourseActivity, CourseCollaborator, CourseObjective, CourseObjectiveValidator, IndexedText, \
+    MaterializedPermission, Objective, ProgressionSnapshot, RegistrationOnCourse, Resource, ResourceCollaborator, \
+    ResourceObjective, ResourceObjectiveValidator, ValidationOnObjective, materialized_permissions_enabled, \
+    validations_changed_in_bulk
+
+
+@receiver(post_save, sender=CourseCollaborator)
+@receiver(post_delete, sender=CourseCollaborator)
+@receiver(post_save, sender=ActivityCollaborator)
+@receiver(post_delete, sender=ActivityCollaborator)
+@receiver(post_save, sender=ResourceCollaborator)
+@receiver(post_delete, sender=ResourceCollaborator)
+def collaboration_changed(instance, **kwargs) -> None:
+    """
+    Forget the permissions of a collaborator whose collaboration was added, changed or removed.
+    """
+    if materialized_permissions_enabled():
+        MaterializedPermission.objects.forget_user(instance.collaborator_id)
+
+
+@receiver(post_save, sender=RegistrationOnCourse)
+@receiver(post_delete, sender=RegistrationOnCourse)
+def registration_changed(instance, **kwargs) -> None:
+    """
+    Forget the permissions of a student who registered on a course or left it.
+    """
+    if materialized_permissions_enabled():
+        MaterializedPermission.objects.forget_user(instance.student_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=Resource)
+def object_saved(instance, created: bool, **kwargs) -> None:
+    """
+    Forget the permissions on an object that was updated: its author, access or state may have changed.
+    """
+    if materialized_permissions_enabled() and not created:
+        MaterializedPermission.objects.forget_object(instance)
+
+
+@receiver(pre_delete, sender=Course)
+@receiver(pre_delete, sender=Activity)
+@receiver(pre_delete, sender=Resource)
+def object_deleted(instance, **kwargs) -> None:
+    """
+    Forget the permissions on an object that is about to be deleted, while links to its dependent objects still exist.
+    """
+    if materialized_permissions_enabled():
+        MaterializedPermission.objects.forget_object(instance)
+
+
+@receiver(post_save, sender=CourseActivity)
+@receiver(post_delete, sender=CourseActivity)
+def course_activity_changed(instance, **kwargs) -> None:
+    """
+    Forget the permissions on an activity added to or removed from a course, and on its resources.
+    """
+    if materialized_permissions_enabled():
+        MaterializedPermission.objects.forget_object(instance.activity)
+
+
+@receiver(m2m_changed, sender=Activity.resources.through)
+def activity_resources_changed(instance, action: str, reverse: bool, pk_set: set, **kwargs) -> None:
+    """
+    Forget the permissions on resources added to or removed from an activity.
+    """
+    if not materialized_permissions_enabled() or action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse or action == "pre_clear":
+        # The instance is either the resource itself, or the activity whose resources are all removed
+        MaterializedPermission.objects.forget_object(instance)
+    else:
+        MaterializedPermission.objects.forget_objects(Resource, pk_set)
+
+
+# The name of the entity objective foreign key of each validator model
+VALIDATED_ENTITY_OBJECTIVE_FIELDS = {
+    CourseObjectiveValidator: "course_objective",
+    ActivityObjectiveValidator: "activity_objective",
+    ResourceObjectiveValidator: "resource_objective",
+}
+
+
+@receiver(post_save, sender=RegistrationOnCourse)
+def registration_created(instance, created: bool, **kwargs) -> None:
+    """
+    Create the progression snapshot of a student who registered on a course.
+    """
+    if created:
+        ProgressionSnapshot.objects.create_for(instance.course_id, instance.student_id)
+
+
+@receiver(post_delete, sender=RegistrationOnCourse)
+def registration_deleted(instance, **kwargs) -> None:
+    """
+    Delete the progression snapshot of a student who left a course.
+    """
+    ProgressionSnapshot.objects.filter(course_id=instance.course_id, student_id=instance.student_id).delete()
+
+
+@receiver(post_save, sender=CourseObjectiveValidator)
+@receiver(post_delete, sender=CourseObjectiveValidator)
+@receiver(post_save, sender=ActivityObjectiveValidator)
+@receiver(post_delete, sender=ActivityObjectiveValidator)
+@receiver(post_save, sender=ResourceObjectiveValidator)
+@receiver(post_delete, sender=ResourceObjectiveValidator)
+def validation_changed(sender, instance, signal, created: bool = True, **kwargs) -> None:
+    """
+    Count a validation added or removed in the progression snapshots of the student, unless validations are changed in
+    bulk: snapshots are then updated at once.
+    """
+    if (signal is post_save and not created) or validations_changed_in_bulk():
+        return
+    try:
+        entity_objective = getattr(instance, VALIDATED_ENTITY_OBJECTIVE_FIELDS[sender])
+    except ObjectDoesNotExist:
+        # The entity objective is already deleted: snapshots are refreshed when it is
+        return
+    ProgressionSnapshot.objects.record_validation(
+        entity_objective, instance.student_id, 1 if signal is post_save else -1
+    )
+
+
+@receiver(post_save, sender=CourseObjective)
+@receiver(post_save, sender=ActivityObjective)
+@receiver(post_save, sender=ResourceObjective)
+def entity_objective_saved(instance, **kwargs) -> None:
+    """
+    Refresh the progression snapshots of the courses in which an objective was added or changed.
+    """
+    ProgressionSnapshot.objects.refresh(instance.get_course_ids())
+
+
+@receiver(pre_delete, sender=CourseObjective)
+@receiver(pre_delete, sender=ActivityObjective)
+@receiver(pre_delete, sender=ResourceObjective)
+def entity_objective_deleting(instance, **kwargs) -> None:
+    """
+    Remember the courses of an entity objective about to be deleted, while links to them still exist.
+    """
+    instance.progression_course_ids = instance.get_course_ids()
+
+
+@receiver(post_delete, sender=CourseObjective)
+@receiver(post_delete, sender=ActivityObjective)
+@receiver(post_delete, sender=ResourceObjective)
+def entity_objective_deleted(instance, **kwargs) -> None:
+    """
+    Refresh the progression snapshots of the courses from which an objective was removed.
+    """
+    ProgressionSnapshot.objects.refresh(getattr(instance, "progression_course_ids", []))
+
+
+@receiver(post_save, sender=CourseActivity)
+@receiver(post_delete, sender=CourseActivity)
+def course_activity_changed_progression(instance, created: bool = True, **kwargs) -> None:
+    """
+    Refresh the progression snapshots of a course to which an activity was added, or from which it was removed.
+    """
+    if created:
+        ProgressionSnapshot.objects.refresh([instance.course_id])
+
+
+@receiver(m2m_changed, sender=Activity.resources.through)
+def activity_resources_changed_progression(instance, action: str, reverse: bool, pk_set: set, **kwargs) -> None:
+    """
+    Refresh the progression snapshots of the courses whose activities got or lost resources.
+    """
+    if reverse and action == "pre_clear":
+        # The instance is a resource removed from all its activities
+        instance.progression_course_ids = list(CourseActivity.objects.filter(
+            activity__resources=instance
+        ).values_list("course_id", flat=True))
+    elif reverse and action == "post_clear":
+        ProgressionSnapshot.objects.refresh(getattr(instance, "progression_course_ids", []))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        activity_ids = pk_set if reverse else [instance.pk]
+        ProgressionSnapshot.objects.refresh(
+            CourseActivity.objects.filter(activity__in=activity_ids).values_list("course_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Objective)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=Resource)
+def indexed_object_saved(instance, **kwargs) -> None:
+    """
+    Index the ability of an objective, or the name of a course, an activity or a resource, that was created or updated.
+    """
+    IndexedText.objects.index(instance)
+
+
+@receiver(post_delete, sender=Objective)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=Resource)
+def indexed_object_deleted(instance, **kwargs) -> None:
+    """
+    Remove the text of a deleted objective, course, activity or resource from the index.
+    """
+    IndexedText.objects.forget(instance)
+
+
+# The model and the foreign key of the versioned object of each collaborator and entity objective model
+CONTENT_OBJECT_FIELDS = {
+    CourseCollaborator: (Course, "course_id"),
+    ActivityCollaborator: (Activity, "activity_id"),
+    ResourceCollaborator: (Resource, "resource_id"),
+    CourseObjective: (Course, "course_id"),
+    ActivityObjective: (Activity, "activity_id"),
+    ResourceObjective: (Resource, "resource_id"),
+}
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Objective)
+def content_object_saved(sender, instance, created: bool, **kwargs) -> None:
+    """
+    Bump the content version of an object that was updated, and of the objects that include it. A new object is not
+    included anywhere yet.
+    """
+    if not created:
+        ContentVersion.objects.bump(sender, [instance.pk])
+
+
+@receiver(pre_delete, sender=Resource)
+def content_resource_deleting(instance, **kwargs) -> None:
+    """
+    Bump the content version of the activities and courses that include a resource about to be deleted, while links to
+    them still exist: removing the resource from its activities does not send signals.
+    """
+    ContentVersion.objects.bump(Resource, [instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Objective)
+def content_object_deleted(instance, **kwargs) -> None:
+    """
+    Forget the content version of a deleted object.
+    """
+    ContentVersion.objects.forget(instance)
+
+
+@receiver(post_save, sender=CourseActivity)
+@receiver(post_delete, sender=CourseActivity)
+def content_course_activity_changed(instance, **kwargs) -> None:
+    """
+    Bump the content version of a course whose activities were added, moved or removed.
+    """
+    ContentVersion.objects.bump(Course, [instance.course_id])
+
+
+@receiver(m2m_changed, sender=Activity.resources.through)
+def content_activity_resources_changed(instance, action: str, reverse: bool, pk_set: set, **kwargs) -> None:
+    """
+    Bump the content version of the activities that got or lost resources.
+    """
+    if reverse and action == "pre_clear":
+        # The instance is a resource removed from all its activities
+        ContentVersion.objects.bump(Resource, [instance.pk])
+    elif action in ("post_add", "post_remove") or (action == "post_clear" and not reverse):
+        ContentVersion.objects.bump(Activity, pk_set if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=CourseCollaborator)
+@receiver(post_delete, sender=CourseCollaborator)
+@receiver(post_save, sender=ActivityCollaborator)
+@receiver(post_delete, sender=ActivityCollaborator)
+@receiver(post_save, sender=ResourceCollaborator)
+@receiver(post_delete, sender=ResourceCollaborator)
+@receiver(post_save, sender=CourseObjective)
+@receiver(post_delete, sender=CourseObjective)
+@receiver(post_save, sender=ActivityObjective)
+@receiver(post_delete, sender=ActivityObjective)
+@receiver(post_save, sender=ResourceObjective)
+@receiver(post_delete, sender=ResourceObjective)
+def content_link_changed(sender, instance, **kwargs) -> None:
+    """
+    Bump the content version of an object whose collaborators or objectives were added, changed or removed.
+    """
+    model, object_field = CONTENT_OBJECT_FIELDS[sender]
+    ContentVersion.objects.bump(model, [getattr(instance, object_field)])
+
+
+# The foreign key of the object, and the many-to-many field of the object, for each link between an object and a user
+MEMBERSHIP_FIELDS = {
+    CourseCollaborator: ("course", "collaborators"),
+    ActivityCollaborator: ("activity", "collaborators"),
+    ResourceCollaborator: ("resource", "collaborators"),
+    RegistrationOnCourse: ("course", "students"),
+    ValidationOnObjective: ("objective", "validators"),
+    CourseObjectiveValidator: ("course_objective", "validators"),
+    ActivityObjectiveValidator: ("activity_objective", "validators"),
+    ResourceObjectiveValidator: ("resource_objective", "validators"),
+    Course.favourite_for.through: ("course", "favourite_for"),
+}
+
+
+@receiver(post_save, sender=CourseCollaborator)
+@receiver(post_delete, sender=CourseCollaborator)
+@receiver(post_save, sender=ActivityCollaborator)
+@receiver(post_delete, sender=ActivityCollaborator)
+@receiver(post_save, sender=ResourceCollaborator)
+@receiver(post_delete, sender=ResourceCollaborator)
+@receiver(post_save, sender=RegistrationOnCourse)
+@receiver(post_delete, sender=RegistrationOnCourse)
+@receiver(post_save, sender=ValidationOnObjective)
+@receiver(post_delete, sender=ValidationOnObjective)
+@receiver(post_save, sender=CourseObjectiveValidator)
+@receiver(post_delete, sender=CourseObjectiveValidator)
+@receiver(post_save, sender=ActivityObjectiveValidator)
+@receiver(post_delete, sender=ActivityObjectiveValidator)
+@receiver(post_save, sender=ResourceObjectiveValidator)
+@receiver(post_delete, sender=ResourceObjectiveValidator)
+def membership_changed(sender, instance, **kwargs) -> None:
+    """
+    Forget the related users loaded on an object when a link instance is saved or deleted directly, if this link
+    instance knows the object.
+    """
+    object_field_name, members_field_name = MEMBERSHIP_FIELDS[sender]
+    object_field = sender._meta.get_field(object_field_name)
+    if object_field.is_cached(instance):
+        related_object = object_field.get_cached_value(instance)
+        if related_object is not None:
+            related_object.forget_members(members_field_name)
+
+
+@receiver(m2m_changed, sender=CourseCollaborator)
+@receiver(m2m_changed, sender=ActivityCollaborator)
+@receiver(m2m_changed, sender=ResourceCollaborator)
+@receiver(m2m_changed, sender=RegistrationOnCourse)
+@receiver(m2m_changed, sender=ValidationOnObjective)
+@receiver(m2m_changed, sender=CourseObjectiveValidator)
+@receiver(m2m_changed, sender=ActivityObjectiveValidator)
+@receiver(m2m_changed, sender=ResourceObjectiveValidator)
+@receiver(m2m_changed, sender=Course.favourite_for.through)
+def related_members_changed(sender, instance, action: str, reverse: bool, **kwargs) -> None:
+    """
+    Forget the related users loaded on an object when its related manager adds, removes or clears users.
+    """
+    if not reverse and action.startswith("post_"):
+        instance.forget_members(MEMBERSHIP_FIELDS[sender][1])
+
@@ -19,6 +19,8 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 #
+from typing import Optional
+
 import markdown
 from django import template
 from django.contrib.auth import get_user_model
@@ -33,7 +35,8 @@ from learning.forms import CourseCollaboratorUpdateRoleForm, ResourceCollaborato
     ResourceObjectiveUpdateForm, AddObjectiveForm
 from learning.models import CollaboratorRole, CourseAccess, ResourceType, CourseCollaborator, ActivityAccess, \
     ActivityReuse, ResourceAccess, ResourceReuse, Licences, Duration, Course, ActivityCollaborator, \
-    ResourceCollaborator, ObjectCollaboratorMixin, Objective, ResourceObjective, ActivityObjective, CourseObjective
+    ResourceCollaborator, ObjectCollaboratorMixin, Objective, ResourceObjective, ActivityObjective, CourseObjective, \
+    ProgressionSnapshot
 
 from learning.models import CourseState, BasicModelMixin, Activity, Resource, EntityObjective
 from learning.permissions import ObjectPermissionManagerMixin
@@ -149,6 +152,15 @@ def get_role_badge_title(value):  # pragma: no cover
     return badge_title
 
 
+@register.filter
+@stringfilter
+def get_role_display(value):  # pragma: no cover
+    try:
+        return CollaboratorRole[value].value
+    except KeyError:
+        return ""
+
+
 @register.filter
 @stringfilter
 def get_role_badge_type(value):  # pragma: no cover
@@ -373,6 +385,95 @@ def render_markdown(value):
         return value
 
 
+@register.filter
+def get_progression(progressions, key) -> Optional[ProgressionSnapshot]:
+    """
+    Get a progression snapshot from the progression snapshots a view put in its context.
+
+    :param progressions: the progression snapshots, by course or by student primary key. It is empty when the view \
+                         does not provide progression snapshots.
+    :param key: the primary key of the course or of the student
+    :return: the progression snapshot, if any
+    :rtype: Optional[ProgressionSnapshot]
+    """
+    return progressions.get(key) if isinstance(progressions, dict) else None
+
+
+@register.filter
+def has_student(course: Course, user: get_user_model()) -> bool:
+    """
+    Check whether a user is registered on a course, without loading its students.
+
+    :param course: the course
+    :type course: Course
+    :param user: the user, it can be anonymous or missing from the context
+    :type user: get_user_model()
+    :return: True if the user is a student of the course
+    :rtype: bool
+    """
+    return course.has_student(user)
+
+
+@register.filter
+def has_collaborator(an_object: BasicModelMixin, user: get_user_model()) -> bool:
+    """
+    Check whether a user collaborates on a course, an activity or a resource, without loading its collaborators.
+
+    :param an_object: the course, activity or resource
+    :type an_object: BasicModelMixin
+    :param user: the user, it can be anonymous or missing from the context
+    :type user: get_user_model()
+    :return: True if the user collaborates on the object
+    :rtype: bool
+    """
+    return an_object.has_collaborator(user)
+
+
+@register.filter
+def get_collaborator_role(an_object: BasicModelMixin, user: get_user_model()) -> Optional[str]:
+    """
+    Get the role of a user on a course, an activity or a resource.
+
+    :param an_object: the course, activity or resource
+    :type an_object: BasicModelMixin
+    :param user: the user, it can be anonymous or missing from the context
+    :type user: get_user_model()
+    :return: the role name, or None if the user does not collaborate on the object
+    :rtype: Optional[str]
+    """
+    return an_object.get_collaborator_role(user)
+
+
+@register.filter
+def is_favourite_for(course: Course, user: get_user_model()) -> bool:
+    """
+    Check whether a user set a course as a favourite.
+
+    :param course: the course
+    :type course: Course
+    :param user: the user, it can be anonymous or missing from the context
+    :type user: get_user_model()
+    :return: True if the course is a favourite of the user
+    :rtype: bool
+    """
+    return course.is_favourite_for(user)
+
+
+@register.filter
+def has_validator(object_objective: EntityObjective, user: get_user_model()) -> bool:
+    """
+    Check whether a student validated an objective on an entity, without loading its validators.
+
+    :param object_objective: the objective on a course, an activity or a resource
+    :type object_objective: EntityObjective
+    :param user: the student, it can be anonymous or missing from the context
+    :type user: get_user_model()
+    :return: True if the student validated the objective on the entity
+    :rtype: bool
+    """
+    return object_objective.has_validator(user)
+
+
 #################
 # Template tags #
 #################
@@ -407,21 +508,6 @@ def get_object_perms(instance: ObjectPermissionManagerMixin, user: get_user_mode
     return perms
 
 
-@register.simple_tag
-def get_course_collaborator_object(course: Course, user: get_user_model()):  # pragma: no cover
-    """
-    Get the course collaborator object from a course and a specific user.
-
-    :param course: the course on which the user collaborates
-    :type: Course
-    :param user: the user that collaborates on the course
-    :type user: get_user_model()
-    :return: the course collaborator object
-    :rtype: CourseCollaborator
-    """
-    return CourseCollaborator.objects.filter(course=course, collaborator=user).first()
-
-
 @register.simple_tag
 def get_activity_collaborator_object(activity: Activity, user: get_user_model()):  # pragma: no cover
     """
@@ -454,17 +540,15 @@ def get_resource_collaborator_object(resource: Resource, user: get_user_model())
 
 @register.simple_tag
 def get_included_objects_that_have_collaborator(object_with_collaborators: ObjectCollaboratorMixin) -> QuerySet:
-    allowed_objects = set(
-        included for included in object_with_collaborators.related_object.linked_objects if
-        included.object_collaborators.filter(collaborator=object_with_collaborators.collaborator).exists()
-    )
     if isinstance(object_with_collaborators, CourseCollaborator):
         return ActivityCollaborator.objects.filter(
-            activity__in=allowed_objects, collaborator=object_with_collaborators.collaborator
+            activity__course_activities__course=object_with_collaborators.course_id,
+            collaborator=object_with_collaborators.collaborator_id
         )
     if isinstance(object_with_collaborators, ActivityCollaborator):
         return ResourceCollaborator.objects.filter(
-            resource__in=allowed_objects, collaborator=object_with_collaborators.collaborator
+            resource__activities=object_with_collaborators.activity_id,
+            collaborator=object_with_collaborators.collaborator_id
         )
     return QuerySet()
 
@@ -528,9 +612,9 @@ def get_objective_form(object_objective: EntityObjective) -> Form:  # pragma: no
 def get_add_objective_form(entity: BasicModelMixin) -> Form:
     form = AddObjectiveForm()
     # Getting the most relevant objectives
-    result = Objective.objects.most_relevant_objective_for_model(entity)
+    result = Objective.objects.suggested_objectives_for_model(entity)
     # Updating the form if recommended objectives exists
-    if result.count() > 0:
+    if result:
         form.fields['existing_ability'].choices = [('', _('Select an existing objective'))] + [
-                                                      (choice.id, choice.ability) for choice in result.all()]
+                                                      (choice.id, choice.ability) for choice in result]
     return form
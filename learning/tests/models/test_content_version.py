@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from learning.models import Course, Activity, Resource, Objective, TaxonomyLevel, CollaboratorRole, ContentVersion
+
+
+class ContentVersionTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.teacher = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.course = Course.objects.create(name="A course", author=self.author)
+        self.other_course = Course.objects.create(name="Another course", author=self.author)
+        self.activity = Activity.objects.create(name="An activity", author=self.author)
+        self.resource = Resource.objects.create(name="A resource", author=self.author)
+        self.objective = Objective.objects.create(ability="An ability", language="en", author=self.author)
+        self.course.add_activity(self.activity)
+        self.activity.add_resource(self.resource)
+        self.resource.add_objective(self.objective, taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=False)
+
+    def get_versions(self):
+        return [
+            ContentVersion.objects.get_version(an_object)
+            for an_object in (self.course, self.other_course, self.activity, self.resource, self.objective)
+        ]
+
+    def assert_bumped(self, change, bumped):
+        versions = self.get_versions()
+        change()
+        self.assertEqual(
+            [version + 1 if is_bumped else version for version, is_bumped in zip(versions, bumped)],
+            self.get_versions()
+        )
+
+    def test_new_objects_have_no_version(self):
+        self.assertEqual(0, ContentVersion.objects.get_version(Course.objects.create(name="New", author=self.author)))
+
+    def test_changes_propagate_to_including_objects(self):
+        # Course, other course, activity, resource, objective
+        self.assert_bumped(lambda: self.course.save(), (True, False, False, False, False))
+        self.assert_bumped(lambda: self.activity.save(), (True, False, True, False, False))
+        self.assert_bumped(lambda: self.resource.save(), (True, False, True, True, False))
+        self.assert_bumped(lambda: self.change_ability(), (True, False, True, True, True))
+        self.assert_bumped(
+            lambda: self.resource.add_collaborator(self.teacher, CollaboratorRole.TEACHER),
+            (True, False, True, True, False)
+        )
+        self.assert_bumped(lambda: self.activity.remove_resource(self.resource), (True, False, True, False, False))
+        # The activity is saved when added on a course
+        self.assert_bumped(lambda: self.other_course.add_activity(self.activity), (True, True, True, False, False))
+
+    def change_ability(self):
+        self.objective.ability = "Another ability"
+        self.objective.save()
+
+    def test_bump_objects_once(self):
+        activity = Activity.objects.create(name="Another activity", author=self.author)
+        activity.add_resource(self.resource)
+        self.course.add_activity(activity)
+        version = ContentVersion.objects.get_version(self.course)
+        activity_versions = ContentVersion.objects.get_versions(Activity, [self.activity.pk, activity.pk])
+        ContentVersion.objects.bump(Resource, [self.resource.pk])
+        self.assertEqual(version + 1, ContentVersion.objects.get_version(self.course))
+        self.assertEqual(
+            {pk: version + 1 for pk, version in activity_versions.items()},
+            ContentVersion.objects.get_versions(Activity, [self.activity.pk, activity.pk])
+        )
+
+    def test_including_object_ids(self):
+        self.assertEqual(
+            {Objective: {self.objective.pk}, Resource: {self.resource.pk}, Activity: {self.activity.pk},
+             Course: {self.course.pk}},
+            ContentVersion.objects.get_including_object_ids(Objective, [self.objective.pk])
+        )
+
+    def test_deleted_objects_are_forgotten(self):
+        self.change_ability()
+        # Primary keys are reset when objects are deleted, and objects of different types share the same ones
+        deleted = [
+            (ContentType.objects.get_for_model(an_object), an_object.pk)
+            for an_object in (self.resource, self.activity, self.course)
+        ]
+        for content_type, object_id in deleted:
+            self.assertTrue(ContentVersion.objects.filter(content_type=content_type, object_id=object_id).exists())
+        self.resource.delete()
+        self.activity.delete()
+        self.course.delete()
+        for content_type, object_id in deleted:
+            with self.subTest(model=content_type.model):
+                self.assertFalse(
+                    ContentVersion.objects.filter(content_type=content_type, object_id=object_id).exists()
+                )
+        self.assertTrue(ContentVersion.objects.filter(
+            content_type=ContentType.objects.get_for_model(Objective), object_id=self.objective.pk
+        ).exists())
@@ -18,6 +18,8 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 #
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ValidationError
@@ -26,9 +28,9 @@ from django.test import TestCase
 from learning.exc import RegistrationDisabledError, UserIsAlreadyCollaborator, \
     UserIsAlreadyAuthor, UserNotCollaboratorError, UserIsNotStudent, UserIsAlreadyStudent, ChangeActivityOnCourseError, \
     ActivityAlreadyOnCourseError, ActivityNotReusableError, \
-    ActivityIsNotLinkedWithThisCourseError
+    ActivityIsNotLinkedWithThisCourseError, CourseActivitiesOrderError
 from learning.models import Course, CollaboratorRole, CourseAccess, CourseState, CourseCollaborator, Activity, \
-    CourseActivity, ActivityReuse, RegistrationOnCourse
+    CourseActivity, ActivityReuse, RegistrationOnCourse, generate_slug_for_model
 
 
 class CourseTestCase(TestCase):
@@ -401,6 +403,41 @@ class CourseTest(CourseTestCase):
         self.assertEqual(course.access, CourseAccess.PUBLIC.name)
         self.assertEqual(course.slug, "a-sample-name-to-test-the-slug-generator")
 
+    def test_slug_counter(self):
+        author = get_user_model().objects.get(pk=1)
+        courses = [Course.objects.create(author=author, name="Introduction") for _ in range(4)]
+        self.assertEqual(
+            ["introduction", "introduction-1", "introduction-2", "introduction-3"], [course.slug for course in courses]
+        )
+        courses[1].delete()
+        self.assertEqual("introduction-1", Course.objects.create(author=author, name="Introduction").slug)
+        courses[0].description = "Updated"
+        courses[0].save()
+        self.assertEqual("introduction", courses[0].slug)
+
+    def test_slug_counter_of_long_names(self):
+        author = get_user_model().objects.get(pk=1)
+        courses = [Course.objects.create(author=author, name="a" * 60) for _ in range(12)]
+        self.assertEqual("a" * 50, courses[0].slug)
+        self.assertEqual("a" * 48 + "-1", courses[1].slug)
+        self.assertEqual("a" * 47 + "-11", courses[11].slug)
+
+    def test_slug_generated_with_a_single_query(self):
+        author = get_user_model().objects.get(pk=1)
+        for _ in range(10):
+            Course.objects.create(author=author, name="Introduction")
+        course = Course(author=author, name="Introduction")
+        with self.assertNumQueries(1):
+            self.assertEqual("introduction-10", generate_slug_for_model(Course, course))
+
+    def test_slug_generated_again_when_taken_while_saving(self):
+        author = get_user_model().objects.get(pk=1)
+        Course.objects.create(author=author, name="Introduction")
+        with mock.patch("learning.models.generate_slug_for_model", side_effect=["introduction", "introduction-1"]):
+            course = Course.objects.create(author=author, name="Introduction")
+        self.assertEqual("introduction-1", course.slug)
+        self.assertEqual(2, Course.objects.filter(slug__startswith="introduction").count())
+
     """
     Property object_collaborators
     """
@@ -958,6 +995,51 @@ class CourseTest(CourseTestCase):
         self.assertEqual(0, self.private_course.collaborators.count())
         self.assertNotIn(user, self.private_course.collaborators.all())
 
+    """
+    Methods has_collaborator and has_student
+    """
+
+    def test_membership_is_loaded_once(self):
+        collaborator, student = get_user_model().objects.get(pk=2), get_user_model().objects.get(pk=3)
+        self.public_course.add_collaborator(collaborator, CollaboratorRole.TEACHER)
+        self.public_course.register_student(student)
+        course = Course.objects.get(pk=self.public_course.pk)
+        with self.assertNumQueries(2):
+            for _ in range(3):
+                self.assertTrue(course.has_collaborator(collaborator))
+                self.assertFalse(course.has_collaborator(student))
+                self.assertTrue(course.has_student(student))
+                self.assertFalse(course.has_student(collaborator))
+
+    def test_membership_anonymous_user(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.public_course.has_collaborator(AnonymousUser()))
+            self.assertFalse(self.public_course.has_student(AnonymousUser()))
+            self.assertFalse(self.public_course.has_student(None))
+
+    def test_membership_forgotten_by_mutators(self):
+        user = get_user_model().objects.get(pk=2)
+        self.assertFalse(self.public_course.has_collaborator(user))
+        self.public_course.add_collaborator(user, CollaboratorRole.TEACHER)
+        self.assertTrue(self.public_course.has_collaborator(user))
+        self.public_course.remove_collaborator(user)
+        self.assertFalse(self.public_course.has_collaborator(user))
+        self.assertFalse(self.public_course.has_student(user))
+        self.public_course.register_student(user)
+        self.assertTrue(self.public_course.has_student(user))
+        self.public_course.unsubscribe_student(user)
+        self.assertFalse(self.public_course.has_student(user))
+
+    def test_membership_forgotten_by_related_managers(self):
+        user = get_user_model().objects.get(pk=2)
+        self.assertFalse(self.public_course.has_student(user))
+        self.public_course.students.add(user)
+        self.assertTrue(self.public_course.has_student(user))
+        self.public_course.students.remove(user)
+        self.assertFalse(self.public_course.has_student(user))
+        CourseCollaborator.objects.create(course=self.public_course, collaborator=user)
+        self.assertTrue(self.public_course.has_collaborator(user))
+
     """
     Method add_activity
     """
@@ -1041,9 +1123,10 @@ class CourseTest(CourseTestCase):
         self.assertIn(activity, self.students_only_course.activities)
         self.assertEqual(3, self.students_only_course.course_activities.count())
 
-        self.assertEqual(1, self.students_only_course.course_activities.filter(activity_id=99).get().rank)
-        self.assertEqual(2, self.students_only_course.course_activities.filter(activity_id=98).get().rank)
-        self.assertEqual(3, self.students_only_course.course_activities.filter(activity_id=97).get().rank)
+        self.assertEqual([99, 98, 97], [activity.id for activity in self.students_only_course.activities])
+        self.assertEqual([CourseActivity.RANK_GAP * position for position in range(1, 4)], list(
+            self.students_only_course.course_activities.values_list("rank", flat=True)
+        ))
 
     """
     Method remove_activity
@@ -1185,33 +1268,126 @@ class CourseTest(CourseTestCase):
         self.public_course.reorder_course_activities()
 
         # Check that new order is properly set
-        rank = 1
+        rank = CourseActivity.RANK_GAP
         for ca in CourseActivity.objects.filter(course=self.public_course).all():
             self.assertEqual(ca.rank, rank)
-            rank += 1
+            rank += CourseActivity.RANK_GAP
 
     def test_reorder_activities_nothing_to_do(self):
         # Reorder manually before calling the method
-        rank = 1
+        rank = CourseActivity.RANK_GAP
         for ca in CourseActivity.objects.filter(course=self.public_course).all():
             ca.rank = rank
-            rank += 1
+            rank += CourseActivity.RANK_GAP
             ca.save()
 
-        # Check that reordering is correct
-        rank = 1
+        # Reorder activities, nothing is updated: the savepoint, the lock and the selection of activities only
+        with self.assertNumQueries(4):
+            self.public_course.reorder_course_activities()
+
+        # Check that new order is not changed
+        rank = CourseActivity.RANK_GAP
         for ca in CourseActivity.objects.filter(course=self.public_course).all():
             self.assertEqual(ca.rank, rank)
-            rank += 1
+            rank += CourseActivity.RANK_GAP
 
-        # Reorder activities
+    """
+    Method move_activity
+    """
+
+    def test_move_activity(self):
+        activities = [self.ca1.activity, self.ca2.activity, self.ca3.activity, self.ca4.activity]
+        self.public_course.move_activity(activities[3], 1)
+        self.assertEqual([activities[3]] + activities[:3], list(self.public_course.activities))
+        self.public_course.move_activity(activities[3], 3)
+        self.assertEqual([activities[0], activities[1], activities[3], activities[2]],
+                         list(self.public_course.activities))
+        self.public_course.move_activity(activities[0], 10)
+        self.assertEqual([activities[1], activities[3], activities[2], activities[0]],
+                         list(self.public_course.activities))
+
+    def test_move_activity_updates_a_single_row(self):
         self.public_course.reorder_course_activities()
+        ranks = dict(self.public_course.course_activities.values_list("pk", "rank"))
+        moved = self.public_course.move_activity(self.ca4.activity, 2)
+        self.assertEqual((ranks[self.ca1.pk] + ranks[self.ca2.pk]) // 2, moved.rank)
+        for pk, rank in self.public_course.course_activities.exclude(pk=moved.pk).values_list("pk", "rank"):
+            self.assertEqual(ranks[pk], rank)
+
+    def test_move_activity_spreads_ranks_when_no_room_is_left(self):
+        CourseActivity.objects.filter(pk=self.ca1.pk).update(rank=1)
+        CourseActivity.objects.filter(pk=self.ca2.pk).update(rank=2)
+        self.public_course.move_activity(self.ca4.activity, 2)
+        self.assertEqual([self.ca1.activity, self.ca4.activity, self.ca2.activity, self.ca3.activity],
+                         list(self.public_course.activities))
+        self.assertEqual(
+            [CourseActivity.RANK_GAP, CourseActivity.RANK_GAP * 3 // 2, CourseActivity.RANK_GAP * 2,
+             CourseActivity.RANK_GAP * 3],
+            list(self.public_course.course_activities.values_list("rank", flat=True))
+        )
 
-        # Check that new order is not changed
-        rank = 1
-        for ca in CourseActivity.objects.filter(course=self.public_course).all():
-            self.assertEqual(ca.rank, rank)
-            rank += 1
+    def test_move_activity_not_on_course(self):
+        activity = Activity.objects.create(name="Another activity", author=get_user_model().objects.get(pk=1))
+        with self.assertRaises(ActivityIsNotLinkedWithThisCourseError):
+            self.public_course.move_activity(activity, 1)
+
+    """
+    Method move_activity_up
+    """
+
+    def test_move_activity_up(self):
+        activities = [self.ca1.activity, self.ca2.activity, self.ca3.activity, self.ca4.activity]
+        self.assertEqual(3, self.public_course.move_activity_up(activities[3]))
+        self.assertEqual([activities[0], activities[1], activities[3], activities[2]],
+                         list(self.public_course.activities))
+        self.assertEqual(1, self.public_course.move_activity_up(activities[1]))
+        self.assertEqual([activities[1], activities[0], activities[3], activities[2]],
+                         list(self.public_course.activities))
+
+    def test_move_activity_up_already_first(self):
+        activities = list(self.public_course.activities)
+        self.assertIsNone(self.public_course.move_activity_up(activities[0]))
+        self.assertEqual(activities, list(self.public_course.activities))
+
+    def test_move_activity_up_not_on_course(self):
+        activity = Activity.objects.create(name="Another activity", author=get_user_model().objects.get(pk=1))
+        with self.assertRaises(ActivityIsNotLinkedWithThisCourseError):
+            self.public_course.move_activity_up(activity)
+
+    """
+    Method order_activities
+    """
+
+    def test_order_activities(self):
+        activities = [self.ca1.activity, self.ca2.activity, self.ca3.activity, self.ca4.activity]
+        new_order = [activities[2], activities[0], activities[3], activities[1]]
+        # Savepoint, lock, course activities, bulk update, content version bump (4) and savepoint release
+        with self.assertNumQueries(9):
+            self.public_course.order_activities([activity.id for activity in new_order])
+        self.assertEqual(new_order, list(self.public_course.activities))
+        self.assertEqual(
+            [CourseActivity.RANK_GAP * position for position in range(1, 5)],
+            list(self.public_course.course_activities.values_list("rank", flat=True))
+        )
+
+    def test_order_activities_same_order_updates_nothing(self):
+        self.public_course.reorder_course_activities()
+        ids = [activity.id for activity in self.public_course.activities]
+        with self.assertNumQueries(4):
+            self.public_course.order_activities(ids)
+
+    def test_order_activities_incomplete_duplicated_or_foreign(self):
+        activity = Activity.objects.create(name="Another activity", author=get_user_model().objects.get(pk=1))
+        ids = [self.ca1.activity.id, self.ca2.activity.id, self.ca3.activity.id, self.ca4.activity.id]
+        for wrong_ids in (ids[:3], ids[:3] + [ids[0]], ids + [ids[0]], ids[:3] + [activity.id]):
+            with self.subTest(wrong_ids=wrong_ids), self.assertRaises(CourseActivitiesOrderError):
+                self.public_course.order_activities(wrong_ids)
+        self.assertEqual(ids, [activity.id for activity in self.public_course.activities])
+
+    def test_order_activities_read_only(self):
+        self.public_course.state = CourseState.ARCHIVED.name
+        with self.assertRaises(ChangeActivityOnCourseError):
+            self.public_course.order_activities([])
 
     """
     Method clean
@@ -1452,3 +1628,52 @@ class TestCourseManager(CourseTestCase):
 
         self.assertEqual(1, Course.objects.recommendations_for(user, query="PUBLIC").count())
         self.assertIn(self.public_course, Course.objects.recommendations_for(user, query="PUBLIC").all())
+
+    def test_with_user_context(self):
+        user = get_user_model().objects.get(pk=2)
+        self.public_course.register_student(user)
+        self.students_only_course.add_collaborator(user, CollaboratorRole.TEACHER)
+        self.private_course.favourite_for.add(user)
+
+        courses = {course.id: course for course in Course.objects.with_user_context(user)}
+        self.assertTrue(courses[self.public_course.id].is_student)
+        self.assertFalse(courses[self.students_only_course.id].is_student)
+        self.assertEqual(CollaboratorRole.TEACHER.name, courses[self.students_only_course.id].collaborator_role)
+        self.assertIsNone(courses[self.public_course.id].collaborator_role)
+        self.assertTrue(courses[self.private_course.id].is_favourite)
+        self.assertFalse(courses[self.public_course.id].is_favourite)
+        self.assertEqual(1, courses[self.public_course.id].student_count)
+        self.assertEqual(0, courses[self.private_course.id].student_count)
+        self.assertEqual(4, courses[self.public_course.id].activity_count)
+        self.assertEqual(0, courses[self.private_course.id].activity_count)
+
+    def test_with_user_context_anonymous(self):
+        self.public_course.register_student(get_user_model().objects.get(pk=2))
+        course = Course.objects.with_user_context(AnonymousUser()).get(pk=self.public_course.pk)
+        self.assertFalse(course.is_student)
+        self.assertFalse(course.is_favourite)
+        self.assertIsNone(course.collaborator_role)
+        self.assertEqual(1, course.student_count)
+        self.assertFalse(course.has_student(AnonymousUser()))
+
+    def test_with_user_context_is_used_by_membership_checks(self):
+        user = get_user_model().objects.get(pk=2)
+        other = get_user_model().objects.get(pk=3)
+        self.public_course.register_student(user)
+        self.public_course.add_collaborator(other, CollaboratorRole.NON_EDITOR_TEACHER)
+        course = Course.objects.with_user_context(user).get(pk=self.public_course.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(course.has_student(user))
+            self.assertFalse(course.has_collaborator(user))
+            self.assertFalse(course.is_favourite_for(user))
+            self.assertEqual(1, course.nb_students)
+            self.assertEqual(4, course.nb_activities)
+        # Annotations are only valid for the user they were computed for
+        self.assertTrue(course.has_collaborator(other))
+
+    def test_with_user_context_forgotten_on_change(self):
+        user = get_user_model().objects.get(pk=2)
+        course = Course.objects.with_user_context(user).get(pk=self.public_course.pk)
+        self.assertFalse(course.has_student(user))
+        course.register_student(user)
+        self.assertTrue(course.has_student(user))
@@ -0,0 +1,193 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+import pickle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from learning.models import Course, CourseAccess, CourseState, Activity, Resource, Objective, TaxonomyLevel, \
+    CollaboratorRole, ContentVersion, CourseTree, CourseTreeSnapshot, course_tree_snapshots, \
+    extract_all_included_objects, get_course_tree
+
+
+class CourseTreeTestCase(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.teacher = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.course = Course.objects.create(
+            name="A course", author=self.author, access=CourseAccess.PUBLIC.name, state=CourseState.PUBLISHED.name
+        )
+        self.course.add_collaborator(self.teacher, CollaboratorRole.TEACHER)
+        self.objectives = [
+            Objective.objects.create(ability="Ability {}".format(i), language="en", author=self.author)
+            for i in range(3)
+        ]
+        self.course.add_objective(self.objectives[0], taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=False)
+        self.shared_resource = Resource.objects.create(name="A shared resource", author=self.author)
+        self.shared_resource.add_collaborator(self.teacher, CollaboratorRole.NON_EDITOR_TEACHER)
+        self.shared_resource.add_objective(
+            self.objectives[1], taxonomy_level=TaxonomyLevel.ANALYSIS, objective_reusable=False
+        )
+
+    def add_activities(self, nb_activities: int) -> None:
+        for i in range(nb_activities):
+            activity = Activity.objects.create(name="Activity {}".format(i), author=self.author)
+            activity.add_objective(self.objectives[2], taxonomy_level=TaxonomyLevel.SYNTHESIS, objective_reusable=False)
+            activity.add_resource(self.shared_resource)
+            activity.add_resource(Resource.objects.create(name="Resource {}".format(i), author=self.author))
+            self.course.add_activity(activity)
+
+
+class CourseTreeTest(CourseTreeTestCase):
+
+    def test_content(self):
+        self.add_activities(3)
+        tree = CourseTree.load(self.course)
+        self.assertEqual(list(self.course.activities), [node.activity for node in tree.activities])
+        self.assertEqual(list(self.course.course_activities.all()), list(tree.course_activities))
+        for node in tree.activities:
+            self.assertEqual(list(Resource.objects.filter(activities=node.activity)),
+                             [resource_node.resource for resource_node in node.resources])
+            with self.assertNumQueries(0):
+                self.assertEqual(list(node.activity.resources.all()), [
+                    resource_node.resource for resource_node in node.resources
+                ])
+                self.assertEqual(2, node.activity.resources.count())
+            self.assertEqual(list(node.activity.activity_objectives.all()), list(node.objectives))
+        self.assertEqual(4, len(tree.resources))
+        self.assertEqual(set(self.course.get_all_objectives()), set(tree.get_all_objectives()))
+        self.assertEqual(1 + 3 + 1, len(tree.entity_objectives))
+        self.assertEqual({self.teacher.pk}, tree.get_collaborator_ids(self.course))
+        self.assertEqual({self.teacher.pk}, tree.get_collaborator_ids(self.shared_resource))
+        self.assertEqual(frozenset(), tree.get_collaborator_ids(tree.activities[0].activity))
+
+    def test_included_objects(self):
+        self.add_activities(2)
+        tree = CourseTree.load(self.course)
+        self.assertEqual(5, len(tree.included_objects))
+        self.assertEqual(
+            set(extract_all_included_objects(tree.activities[0].activity)) | {
+                resource_node.resource for resource_node in tree.resources
+            } | {node.activity for node in tree.activities},
+            set(tree.included_objects)
+        )
+
+    def test_constant_number_of_queries(self):
+        for nb_activities in (1, 4):
+            self.add_activities(nb_activities)
+            with self.assertNumQueries(8):
+                tree = CourseTree.load(self.course)
+            with self.assertNumQueries(0):
+                tree.get_all_objectives()
+                tree.included_objects
+                [node.activity.name for node in tree.activities]
+
+    def test_empty_course(self):
+        with self.assertNumQueries(3):
+            tree = CourseTree.load(self.course)
+        self.assertEqual((), tree.activities)
+        self.assertEqual((), tree.included_objects)
+        self.assertEqual((self.objectives[0],), tree.get_all_objectives())
+
+
+class CourseTreeSnapshotTest(CourseTreeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        course_tree_snapshots.clear()
+        cache.clear()
+        self.add_activities(2)
+
+    @staticmethod
+    def change_ability(objective):
+        objective.ability = "Another ability"
+        objective.save()
+
+    def assert_tree_is_cached(self, cached: bool = True):
+        with self.assertNumQueries(1 if cached else 9):
+            return get_course_tree(self.course)
+
+    def test_snapshot_round_trip(self):
+        tree = CourseTree.load(self.course)
+        snapshot = pickle.loads(pickle.dumps(CourseTreeSnapshot(tree, 0)))
+        with self.assertNumQueries(0):
+            copy = snapshot.to_tree(self.course)
+            self.assertEqual(tree.course_activities, copy.course_activities)
+            self.assertEqual([node.activity.author for node in tree.activities],
+                             [node.activity.author for node in copy.activities])
+            self.assertEqual([node.resource for node in tree.resources], [node.resource for node in copy.resources])
+            self.assertEqual(2, copy.activities[0].activity.resources.count())
+            self.assertEqual(
+                [entity_objective.objective.ability for entity_objective in tree.entity_objectives],
+                [entity_objective.objective.ability for entity_objective in copy.entity_objectives]
+            )
+            self.assertEqual(tree.get_collaborator_ids(self.shared_resource),
+                             copy.get_collaborator_ids(self.shared_resource))
+            self.assertEqual(self.teacher.username, copy.collaborators[0].collaborator.username)
+
+    def test_snapshot_only_keeps_displayed_user_fields(self):
+        self.teacher.email = "teacher@koala-lms.org"
+        self.teacher.save()
+        snapshot = CourseTreeSnapshot(CourseTree.load(self.course), 0)
+        self.assertNotIn(b"teacher@koala-lms.org", pickle.dumps(snapshot))
+        copy = snapshot.to_tree(self.course)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.teacher.username, copy.collaborators[0].collaborator.username)
+            self.assertEqual(self.teacher.get_full_name(), copy.collaborators[0].collaborator.get_full_name())
+
+    def test_tree_is_cached(self):
+        tree = self.assert_tree_is_cached(False)
+        cached_tree = self.assert_tree_is_cached()
+        self.assertEqual(tree.course_activities, cached_tree.course_activities)
+
+    def test_content_changes_invalidate_snapshot(self):
+        activities = list(self.course.activities)
+        changes = [
+            lambda: self.course.move_activity(activities[1], 0),
+            lambda: self.course.order_activities([activities[0].pk, activities[1].pk]),
+            lambda: activities[0].add_collaborator(self.teacher, CollaboratorRole.TEACHER),
+            lambda: self.shared_resource.save(),
+            lambda: self.change_ability(self.objectives[1]),
+            lambda: activities[0].remove_resource(self.shared_resource),
+            lambda: self.shared_resource.remove_objective(self.objectives[1]),
+        ]
+        for change in changes:
+            self.assert_tree_is_cached(False)
+            self.assert_tree_is_cached()
+            version = ContentVersion.objects.get_version(self.course)
+            change()
+            self.assertLess(version, ContentVersion.objects.get_version(self.course))
+
+    @override_settings(LEARNING_COURSE_TREE_CACHE_SIZE=1)
+    def test_least_recently_used_snapshot_is_evicted(self):
+        other_course = Course.objects.create(name="Another course", author=self.author)
+        self.assert_tree_is_cached(False)
+        get_course_tree(other_course)
+        self.assertEqual(1, len(course_tree_snapshots))
+        self.assert_tree_is_cached(False)
+
+    @override_settings(LEARNING_COURSE_TREE_CACHE="default", LEARNING_COURSE_TREE_CACHE_SIZE=0)
+    def test_snapshot_shared_in_cache(self):
+        self.assert_tree_is_cached(False)
+        self.assertEqual(0, len(course_tree_snapshots))
+        self.assert_tree_is_cached()
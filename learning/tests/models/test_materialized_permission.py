@@ -0,0 +1,137 @@
+#
+# Copyright (C) 2019-2020 Guillaume Bernard <guillaume.bernard@koala-lms.org>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+#
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+
+from learning.models import Course, CourseAccess, CourseState, CollaboratorRole, Activity, ActivityAccess, Resource, \
+    ResourceAccess, MaterializedPermission
+from learning.permissions import resolve_perms
+
+
+@override_settings(LEARNING_MATERIALIZED_PERMISSIONS=True)
+class MaterializedPermissionTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.user = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.course = Course.objects.create(
+            name="A simple course", author=self.author, access=CourseAccess.STUDENTS_ONLY.name,
+            state=CourseState.PUBLISHED.name, language="en"
+        )
+        self.activity = Activity.objects.create(
+            name="An activity", author=self.author, access=ActivityAccess.EXISTING_COURSES.name, language="en"
+        )
+        self.resource = Resource.objects.create(
+            name="A resource", author=self.author, access=ResourceAccess.EXISTING_ACTIVITIES.name, language="en"
+        )
+
+    def assert_permissions_are_stored(self, an_object, user):
+        stored = MaterializedPermission.objects.get(user=user, object_id=an_object.pk, content_type__model=type(
+            an_object
+        ).__name__.lower())
+        self.assertEqual(an_object._get_user_perms(user), an_object._decode_perms(stored.permissions))
+
+    @override_settings(LEARNING_MATERIALIZED_PERMISSIONS=False)
+    def test_disabled_by_default(self):
+        self.course.get_user_perms(self.user)
+        self.assertFalse(MaterializedPermission.objects.exists())
+
+    def test_permissions_stored_then_read(self):
+        perms = self.course.get_user_perms(self.author)
+        self.assert_permissions_are_stored(self.course, self.author)
+        with self.assertNumQueries(1):
+            self.assertEqual(perms, self.course.get_user_perms(self.author))
+
+    def test_anonymous_permissions_not_stored(self):
+        self.assertFalse(self.course.user_can_view(AnonymousUser()))
+        self.assertFalse(MaterializedPermission.objects.exists())
+
+    def test_bulk_read(self):
+        resolve_perms([self.course, self.activity, self.resource], self.user)
+        self.assertEqual(3, MaterializedPermission.objects.count())
+        with self.assertNumQueries(3):
+            resolve_perms([self.course, self.activity, self.resource], self.user)
+
+    def test_registration_forgets_permissions(self):
+        self.course.add_activity(self.activity)
+        self.activity.add_resource(self.resource)
+        self.assertFalse(self.resource.user_can_view(self.user))
+        self.course.register_student(self.user)
+        self.assertTrue(self.course.user_can_view(self.user))
+        self.assertTrue(self.activity.user_can_view(self.user))
+        self.assertTrue(self.resource.user_can_view(self.user))
+        self.course.unsubscribe_student(self.user)
+        self.assertFalse(self.resource.user_can_view(self.user))
+
+    def test_collaboration_forgets_permissions(self):
+        self.assertFalse(self.course.user_can_change(self.user))
+        self.course.add_collaborator(self.user, CollaboratorRole.TEACHER)
+        self.assertTrue(self.course.user_can_change(self.user))
+        self.course.change_collaborator_role(self.user, CollaboratorRole.NON_EDITOR_TEACHER)
+        self.assertFalse(self.course.user_can_change(self.user))
+        self.course.remove_collaborator(self.user)
+        self.assertFalse(self.course.user_can_view(self.user))
+
+    def test_access_change_forgets_dependent_permissions(self):
+        self.course.add_activity(self.activity)
+        self.activity.add_resource(self.resource)
+        self.assertFalse(self.resource.user_can_view(self.user))
+        self.course.access = CourseAccess.PUBLIC.name
+        self.course.save()
+        self.assertTrue(self.activity.user_can_view(self.user))
+        self.assertTrue(self.resource.user_can_view(self.user))
+
+    def test_links_forget_permissions(self):
+        self.course.access = CourseAccess.PUBLIC.name
+        self.course.save()
+        self.assertFalse(self.activity.user_can_view(self.user))
+        self.assertFalse(self.resource.user_can_view(self.user))
+        self.course.add_activity(self.activity)
+        self.assertTrue(self.activity.user_can_view(self.user))
+        self.activity.add_resource(self.resource)
+        self.assertTrue(self.resource.user_can_view(self.user))
+        self.activity.remove_resource(self.resource)
+        self.assertFalse(self.resource.user_can_view(self.user))
+        self.activity.add_resource(self.resource)
+        self.assertTrue(self.resource.user_can_view(self.user))
+        self.course.remove_activity(self.activity)
+        self.assertFalse(self.activity.user_can_view(self.user))
+        self.assertFalse(self.resource.user_can_view(self.user))
+
+    def test_rebuild_and_verify_command(self):
+        self.course.register_student(self.user)
+        self.activity.add_collaborator(self.user, CollaboratorRole.TEACHER)
+        call_command("rebuild_permissions", batch_size=1, stdout=StringIO())
+        for an_object in (self.course, self.activity, self.resource):
+            self.assert_permissions_are_stored(an_object, self.author)
+        self.assert_permissions_are_stored(self.course, self.user)
+        self.assert_permissions_are_stored(self.activity, self.user)
+        call_command("rebuild_permissions", verify=True, stdout=StringIO())
+
+    def test_verify_command_detects_wrong_permissions(self):
+        self.course.get_user_perms(self.user)
+        MaterializedPermission.objects.update(permissions=Course._encode_perms({"delete"}))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_permissions", verify=True, stdout=StringIO(), stderr=StringIO())
@@ -18,11 +18,17 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 
+import itertools
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
 from learning.exc import ObjectiveAlreadyInModel, ObjectiveNotInModel
-from learning.models import Objective, Course, CourseAccess, CourseState, TaxonomyLevel, Activity, Resource
+from learning.models import Objective, Course, CourseAccess, CourseState, TaxonomyLevel, Activity, Resource, \
+    IndexedText, fold_text
 
 
 class ObjectiveTestCase(TestCase):
@@ -159,6 +165,49 @@ class CourseObjectiveTest(ObjectiveTestCase):
         self.assertIn(objective_3, obj)
         self.assertIn(objective_4, obj)
 
+    def test_courses_including_objective(self):
+        objective = Objective.objects.create(ability="Ability", language="en", author=get_user_model().objects.get(pk=1))
+        self.assertFalse(Course.objects.including_objective(objective).exists())
+        self.course.add_objective(objective, TaxonomyLevel.KNOWLEDGE, True)
+        self.assertEqual([self.course], list(Course.objects.including_objective(objective)))
+        self.resource_2.add_objective(objective, TaxonomyLevel.KNOWLEDGE, True)
+        self.activity_1.add_objective(objective, TaxonomyLevel.KNOWLEDGE, True)
+        self.assertEqual({self.course, self.course_1}, set(Course.objects.including_objective(objective)))
+        expected = {course for course in Course.objects.all() if objective in course.get_all_objectives()}
+        with self.assertNumQueries(1):
+            self.assertEqual(expected, set(Course.objects.including_objective(objective)))
+
+    def test_courses_including_objective_visible_to(self):
+        objective = Objective.objects.create(ability="Ability", language="en", author=get_user_model().objects.get(pk=1))
+        self.course.add_objective(objective, TaxonomyLevel.KNOWLEDGE, True)
+        self.resource_1.add_objective(objective, TaxonomyLevel.KNOWLEDGE, True)
+        self.assertEqual([self.course], list(
+            Course.objects.including_objective(objective, get_user_model().objects.get(pk=1))
+        ))
+        self.assertEqual([self.course_1], list(
+            Course.objects.including_objective(objective, get_user_model().objects.get(pk=2))
+        ))
+        self.assertFalse(Course.objects.including_objective(objective, AnonymousUser()).exists())
+
+    def test_get_all_objectives_constant_number_of_queries(self):
+        author = get_user_model().objects.get(pk=2)
+        shared_objective = Objective.objects.create(ability="Remember the main dates", language="en", author=author)
+        self.course_1.add_objective(shared_objective, taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=True)
+        for nb_activities in range(1, 4):
+            activity = Activity.objects.create(name="Activity {}".format(nb_activities), author=author)
+            self.course_1.add_activity(activity)
+            activity.add_objective(shared_objective, taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=True)
+            for nb_resources in range(nb_activities):
+                resource = Resource.objects.create(name="Resource {}".format(nb_resources), author=author)
+                activity.add_resource(resource)
+                resource.add_objective(Objective.objects.create(
+                    ability="Ability {} {}".format(nb_activities, nb_resources), language="en", author=author
+                ), taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=True)
+            with self.assertNumQueries(1):
+                objectives = list(self.course_1.get_all_objectives())
+            # The shared objective is counted once, and each resource brings its own objective
+            self.assertEqual(1 + nb_activities * (nb_activities + 1) // 2, len(objectives))
+
 
 class ActivityObjectiveTest(ObjectiveTestCase):
     def test_objective_activity(self):
@@ -214,3 +263,120 @@ class ResourceObjectiveTest(ObjectiveTestCase):
                                                )
         with self.assertRaises(ObjectiveNotInModel):
             self.resource.remove_objective(objective_1)
+
+
+def reference_most_relevant_objectives(entity):
+    """
+    The objectives whose ability, or the name of an entity they are linked to, contains a tag of the entity, found by
+    scanning every objective and entity objective.
+    """
+    tags = [fold_text(name) for name in entity.tags.names()]
+    objectives = set()
+    for objective in Objective.objects.all():
+        texts = [objective.ability] + [
+            entity_objective.related_entity.name for entity_objective in itertools.chain(
+                objective.course_objectives.all(), objective.activity_objectives.all(),
+                objective.resource_objectives.all()
+            )
+        ]
+        if any(tag in fold_text(text) for tag in tags for text in texts):
+            objectives.add(objective)
+    return objectives
+
+
+class MostRelevantObjectiveTest(ObjectiveTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        author = get_user_model().objects.get(pk=1)
+        abilities = ["Réciter l’Énéide", "Write a SONNET", "Compute a derivative", "Use a compass", "Éa"]
+        self.objectives = [
+            Objective.objects.create(ability=ability, language="fr", author=author) for ability in abilities
+        ]
+        self.course.name = "Poésie élisabéthaine"
+        self.course.save()
+        self.resource.name = "Mathématiques"
+        self.resource.save()
+        self.course.add_objective(self.objectives[2], TaxonomyLevel.KNOWLEDGE, True)
+        self.activity_1.add_objective(self.objectives[3], TaxonomyLevel.KNOWLEDGE, True)
+        self.resource.add_objective(self.objectives[3], TaxonomyLevel.KNOWLEDGE, True)
+
+    def assert_same_as_reference(self, tags):
+        self.activity.tags.set(*tags, clear=True)
+        self.assertEqual(
+            reference_most_relevant_objectives(self.activity),
+            set(Objective.objects.most_relevant_objective_for_model(self.activity))
+        )
+
+    def test_same_as_reference(self):
+        for tags in (
+            [], ["eneide"], ["ÉNÉ"], ["sonnet", "compass"], ["poesie"], ["elisabethaine poesie"], ["ACTIVITY"],
+            ["mathem"], ["ea"], ["a"], ["é"], ["zzz"], ["derivatives"],
+        ):
+            with self.subTest(tags=tags):
+                self.assert_same_as_reference(tags)
+
+    def test_entity_names(self):
+        self.activity.tags.set("poésie", "activity")
+        self.assertEqual(
+            {self.objectives[2], self.objectives[3]}, set(Objective.objects.most_relevant_objective_for_model(
+                self.activity
+            ))
+        )
+
+    def test_index_follows_changes(self):
+        self.activity.tags.set("épopée")
+        self.assertFalse(Objective.objects.most_relevant_objective_for_model(self.activity).exists())
+        self.objectives[0].ability = "Réciter une épopée"
+        self.objectives[0].save()
+        self.assertEqual([self.objectives[0]], list(Objective.objects.most_relevant_objective_for_model(
+            self.activity
+        )))
+        self.course.name = "Épopées antiques"
+        self.course.save()
+        self.assertEqual({self.objectives[0], self.objectives[2]}, set(
+            Objective.objects.most_relevant_objective_for_model(self.activity)
+        ))
+        self.objectives[0].delete()
+        self.assertFalse(IndexedText.objects.filter(folded_text="reciter une epopee").exists())
+
+    def test_constant_number_of_queries(self):
+        self.activity.tags.set("poésie", "sonnet", "a")
+        expected = reference_most_relevant_objectives(self.activity)
+        with self.assertNumQueries(2):
+            # One query to get the tags, and one to search them
+            self.assertEqual(expected, set(Objective.objects.most_relevant_objective_for_model(self.activity)))
+
+    def test_rebuild_command(self):
+        IndexedText.objects.all().delete()
+        call_command("rebuild_text_index", stdout=StringIO())
+        self.assert_same_as_reference(["eneide", "mathem", "ea"])
+
+    def test_suggestions_ranked(self):
+        author = get_user_model().objects.get(pk=1)
+        sonnets = Objective.objects.create(ability="Write sonnets, read sonnets", language="en", author=author)
+        self.activity.name = "Sonnets"
+        self.activity.description = "Writing sonnets"
+        self.activity.save()
+        self.activity.tags.set("sonnet", "compass")
+        suggestions = Objective.objects.suggested_objectives_for_model(self.activity)
+        self.assertEqual(
+            set(Objective.objects.most_relevant_objective_for_model(self.activity)), set(suggestions)
+        )
+        self.assertEqual([sonnets, self.objectives[1], self.objectives[3]], suggestions)
+        self.assertEqual([sonnets], Objective.objects.suggested_objectives_for_model(self.activity, limit=1))
+
+    @override_settings(LEARNING_SUGGESTED_OBJECTIVES_LIMIT=2)
+    def test_suggestions_limit(self):
+        self.activity.tags.set("a")
+        self.assertEqual(2, len(Objective.objects.suggested_objectives_for_model(self.activity)))
+
+    def test_suggestions_constant_number_of_queries(self):
+        self.activity.tags.set("a")
+        expected = reference_most_relevant_objectives(self.activity)
+        with self.assertNumQueries(9):
+            self.assertEqual(expected, set(Objective.objects.suggested_objectives_for_model(self.activity)))
+
+    def test_no_suggestions(self):
+        self.activity.tags.set("zzz")
+        self.assertEqual([], Objective.objects.suggested_objectives_for_model(self.activity))
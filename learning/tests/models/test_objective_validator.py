@@ -18,11 +18,15 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from learning.exc import ObjectiveIsAlreadyValidated, ObjectiveIsNotValidated
 from learning.models import Course, CourseAccess, CourseState, Objective, TaxonomyLevel, \
-    Activity, CourseObjective, ActivityObjective
+    Activity, CourseObjective, ActivityObjective, CourseObjectiveValidator, ActivityObjectiveValidator, \
+    add_validator_object_objective, remove_validator_object_objective, change_validations, _create_validations, \
+    _delete_validations
 
 
 class ObjectiveValidatorTestCase(TestCase):
@@ -73,6 +77,15 @@ class TestObjectiveValidator(ObjectiveValidatorTestCase):
         with self.assertRaises(ObjectiveIsNotValidated):
             self.objective.remove_validator(self.user_student)
 
+    def test_has_validator(self):
+        self.assertFalse(self.objective.has_validator(self.user_student))
+        self.objective.add_validator(self.user_student)
+        with self.assertNumQueries(1):
+            self.assertTrue(self.objective.has_validator(self.user_student))
+            self.assertFalse(self.objective.has_validator(self.user_owner))
+        self.objective.remove_validator(self.user_student)
+        self.assertFalse(self.objective.has_validator(self.user_student))
+
 
 class TestCourseObjectiveValidator(ObjectiveValidatorTestCase):
     def test_add_validator_on_course_objective(self):
@@ -100,6 +113,17 @@ class TestCourseObjectiveValidator(ObjectiveValidatorTestCase):
         self.course.objectives.filter(pk=self.objective.pk).get().remove_validator(self.user_student)
         self.assertNotIn(self.user_student, self.course.objectives.filter(pk=self.objective.pk).get().validators.all())
 
+    def test_has_validator_on_course_objective(self):
+        self.course.add_objective(
+            objective=self.objective, taxonomy_level=TaxonomyLevel.COMPREHENSION, objective_reusable=False
+        )
+        course_objective = CourseObjective.objects.get(course=self.course, objective=self.objective)
+        self.assertFalse(course_objective.has_validator(self.user_student))
+        course_objective.change_validation(self.user_student)
+        self.assertTrue(course_objective.has_validator(self.user_student))
+        course_objective.change_validation(self.user_student)
+        self.assertFalse(course_objective.has_validator(self.user_student))
+
     def test_remove_not_validated_on_course_objective(self):
         self.course.add_objective(objective=self.objective,
                                   taxonomy_level=TaxonomyLevel.COMPREHENSION,
@@ -300,3 +324,118 @@ class TestCourseObjectiveValidator(ObjectiveValidatorTestCase):
                                                                    objective=self.objective).get()
 
         self.assertNotIn(self.user_student, self.activity_objective.validators.all())
+
+    def test_validation_is_a_single_insert(self):
+        self.course.add_objective(objective=self.objective,
+                                  taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                  objective_reusable=False)
+        course_objective = CourseObjective.objects.get(course=self.course, objective=self.objective)
+        with CaptureQueriesContext(connection) as context:
+            CourseObjectiveValidator.objects.create(course_objective=course_objective, student=self.user_student)
+        validator_queries = [
+            query["sql"] for query in context.captured_queries if CourseObjectiveValidator._meta.db_table in query["sql"]
+        ]
+        self.assertEqual(1, len(validator_queries))
+        self.assertTrue(validator_queries[0].startswith("INSERT"))
+
+    def test_validated_once_by_a_student(self):
+        self.course.add_objective(objective=self.objective,
+                                  taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                  objective_reusable=False)
+        course_objective = CourseObjective.objects.get(course=self.course, objective=self.objective)
+        CourseObjectiveValidator.objects.create(course_objective=course_objective, student=self.user_student)
+        with self.assertRaises(IntegrityError):
+            CourseObjectiveValidator.objects.create(course_objective=course_objective, student=self.user_student)
+
+    def test_reusable_validation_propagated_with_constant_queries(self):
+        self.course.add_objective(objective=self.objective,
+                                  taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                  objective_reusable=True)
+        nb_queries = []
+        for nb_activities in (1, 5):
+            for i in range(nb_activities):
+                Activity.objects.create(name="Another activity", author=self.user_owner).add_objective(
+                    objective=self.objective, taxonomy_level=TaxonomyLevel.COMPREHENSION, objective_reusable=True
+                )
+            with CaptureQueriesContext(connection) as context:
+                add_validator_object_objective(self.user_student, self.objective)
+            nb_queries.append(len(context.captured_queries))
+            self.assertEqual(
+                ActivityObjective.objects.count(),
+                ActivityObjectiveValidator.objects.filter(student=self.user_student).count()
+            )
+            self.assertIn(self.user_student, self.objective.validators.all())
+            with CaptureQueriesContext(connection) as context:
+                remove_validator_object_objective(self.user_student, self.objective)
+            nb_queries.append(len(context.captured_queries))
+            self.assertFalse(ActivityObjectiveValidator.objects.filter(student=self.user_student).exists())
+            self.assertNotIn(self.user_student, self.objective.validators.all())
+        self.assertEqual(nb_queries[:2], nb_queries[2:])
+
+    def test_create_validations_only_returns_inserted_rows(self):
+        for activity in (self.activity, Activity.objects.create(name="Another activity", author=self.user_owner)):
+            activity.add_objective(
+                objective=self.objective, taxonomy_level=TaxonomyLevel.COMPREHENSION, objective_reusable=True
+            )
+        activity_objectives = list(ActivityObjective.objects.order_by("pk"))
+        # Another request validated the first activity objective in the meantime
+        ActivityObjectiveValidator.objects.create(activity_objective=activity_objectives[0], student=self.user_student)
+        with transaction.atomic():
+            created = _create_validations(
+                ActivityObjectiveValidator, "activity_objective", self.user_student, activity_objectives
+            )
+        self.assertEqual(activity_objectives[1:], created)
+        self.assertEqual(2, ActivityObjectiveValidator.objects.filter(student=self.user_student).count())
+
+    def test_delete_validations_only_returns_deleted_rows(self):
+        for activity in (self.activity, Activity.objects.create(name="Another activity", author=self.user_owner)):
+            activity.add_objective(
+                objective=self.objective, taxonomy_level=TaxonomyLevel.COMPREHENSION, objective_reusable=True
+            )
+        activity_objectives = list(ActivityObjective.objects.order_by("pk"))
+        ActivityObjectiveValidator.objects.create(activity_objective=activity_objectives[1], student=self.user_student)
+        with transaction.atomic():
+            deleted = _delete_validations(
+                ActivityObjectiveValidator, "activity_objective", self.user_student, activity_objectives
+            )
+        self.assertEqual(activity_objectives[1:], deleted)
+        self.assertFalse(ActivityObjectiveValidator.objects.exists())
+
+    def test_reusable_validation_not_propagated_to_not_reusable(self):
+        self.course.add_objective(objective=self.objective,
+                                  taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                  objective_reusable=False)
+        self.activity.add_objective(objective=self.objective,
+                                    taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                    objective_reusable=True)
+        add_validator_object_objective(self.user_student, self.objective)
+        self.assertFalse(CourseObjectiveValidator.objects.exists())
+        self.assertTrue(ActivityObjectiveValidator.objects.filter(student=self.user_student).exists())
+
+    def test_change_validations_with_constant_queries(self):
+        nb_queries = []
+        for nb_objectives in (1, 5):
+            ActivityObjective.objects.all().delete()
+            for i in range(nb_objectives):
+                objective = Objective.objects.create(ability="Ability {} {}".format(nb_objectives, i), language="fr",
+                                                     author=self.user_owner)
+                self.activity.add_objective(objective=objective, taxonomy_level=TaxonomyLevel.COMPREHENSION,
+                                            objective_reusable=False)
+            activity_objectives = list(ActivityObjective.objects.all())
+            with CaptureQueriesContext(connection) as context:
+                change_validations(self.user_student, {
+                    activity_objective: True for activity_objective in activity_objectives
+                })
+            nb_queries.append(len(context.captured_queries))
+            self.assertEqual(
+                nb_objectives, ActivityObjectiveValidator.objects.filter(student=self.user_student).count()
+            )
+            with CaptureQueriesContext(connection) as context:
+                change_validations(self.user_student, {
+                    activity_objective: index > 0 for index, activity_objective in enumerate(activity_objectives)
+                })
+            nb_queries.append(len(context.captured_queries))
+            self.assertEqual(
+                nb_objectives - 1, ActivityObjectiveValidator.objects.filter(student=self.user_student).count()
+            )
+        self.assertEqual(nb_queries[:2], nb_queries[2:])
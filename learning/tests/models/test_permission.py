@@ -18,9 +18,17 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 #
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
 
-from learning.permissions import ObjectPermissionManagerMixin
+from learning.models import Course, CourseAccess, CourseState, CollaboratorRole, RegistrationOnCourse, Activity, \
+    ActivityAccess, Resource, ResourceAccess, CourseActivity, PERMISSIONS_FOR_ROLE, PERMISSION_MASKS_FOR_ROLE, \
+    SIMPLE_PERMISSIONS
+from learning.permissions import ObjectPermissionManagerMixin, permissions_cache, resolve_perms
 
 
 # noinspection SpellCheckingInspection
@@ -53,3 +61,289 @@ class ObjectPermissionManagerTest(TestCase):
         self.assertTrue(self.fake.user_can_add(None))
         self.assertTrue(self.fake.user_can("anything", None))
         self.assertFalse(self.fake.user_can("nothing", None))
+
+
+class PermissionBitmaskTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.course = Course.objects.create(
+            id=1,
+            name="A simple course",
+            author=self.author,
+            access=CourseAccess.PUBLIC.name,
+            state=CourseState.PUBLISHED.name,
+            language="en"
+        )
+
+    def test_role_masks(self):
+        for role, permissions in PERMISSIONS_FOR_ROLE.items():
+            self.assertEqual(set(permissions), Course._decode_perms(PERMISSION_MASKS_FOR_ROLE[role]))
+
+    def test_encode_decode(self):
+        self.assertEqual(0, Course._encode_perms(set()))
+        self.assertEqual(set(), Course._decode_perms(0))
+        self.assertEqual(set(SIMPLE_PERMISSIONS), Course._decode_perms(Course._encode_perms(SIMPLE_PERMISSIONS)))
+
+    def test_encode_unknown_permission(self):
+        with self.assertRaises(ValueError):
+            Course._encode_perms({"view", "fly"})
+
+    def test_full_permissions_are_precomputed_per_class(self):
+        self.assertEqual({"view_course"}, Course._decode_full_perms(Course._encode_perms(["view"])))
+        self.assertEqual({"view_activity"}, Activity._decode_full_perms(Activity._encode_perms(["view"])))
+        self.assertIs(
+            Course._decode_full_perms(PERMISSION_MASKS_FOR_ROLE["students"]),
+            Course._decode_full_perms(PERMISSION_MASKS_FOR_ROLE["students"])
+        )
+
+    def test_string_sets_match_bitmask(self):
+        for user in (self.author, AnonymousUser()):
+            mask = self.course.get_user_perms_mask(user)
+            self.assertEqual(self.course._make_perms(self.course._decode_perms(mask)), self.course.get_user_perms(user))
+            for permission in SIMPLE_PERMISSIONS:
+                self.assertEqual(
+                    "{}_course".format(permission) in self.course.get_user_perms(user),
+                    self.course.user_can(permission, user)
+                )
+        self.assertFalse(self.course.user_can("fly", self.author))
+
+
+class PermissionsCacheTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.user = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.course = Course.objects.create(
+            id=1,
+            name="A simple course",
+            author=self.author,
+            access=CourseAccess.STUDENTS_ONLY.name,
+            state=CourseState.PUBLISHED.name,
+            language="en"
+        )
+
+    def test_no_cache_outside_scope(self):
+        self.assertNotIn("view_course", self.course.get_user_perms(self.user))
+        RegistrationOnCourse.objects.create(course=self.course, student=self.user)
+        self.assertIn("view_course", self.course.get_user_perms(self.user))
+
+    def test_perms_computed_once_in_scope(self):
+        with permissions_cache():
+            perms = self.course.get_user_perms(self.user)
+            with self.assertNumQueries(0):
+                self.assertEqual(perms, self.course.get_user_perms(self.user))
+                self.assertFalse(self.course.user_can_view(self.user))
+                self.assertFalse(self.course.user_can("view_students", self.user))
+
+    def test_perms_cached_per_user(self):
+        with permissions_cache():
+            self.assertNotIn("change_course", self.course.get_user_perms(self.user))
+            self.assertIn("change_course", self.course.get_user_perms(self.author))
+
+    def test_returned_perms_cannot_alter_cache(self):
+        with permissions_cache():
+            self.course.get_user_perms(self.user).add("change_course")
+            self.assertNotIn("change_course", self.course.get_user_perms(self.user))
+
+    def test_register_student_invalidates_cache(self):
+        with permissions_cache():
+            self.assertFalse(self.course.user_can_view(self.user))
+            self.course.register_student(self.user)
+            self.assertTrue(self.course.user_can_view(self.user))
+            self.course.unsubscribe_student(self.user)
+            self.assertFalse(self.course.user_can_view(self.user))
+
+    def test_add_collaborator_invalidates_cache(self):
+        with permissions_cache():
+            self.assertFalse(self.course.user_can_change(self.user))
+            self.course.add_collaborator(self.user, CollaboratorRole.TEACHER)
+            self.assertTrue(self.course.user_can_change(self.user))
+            self.course.change_collaborator_role(self.user, CollaboratorRole.NON_EDITOR_TEACHER)
+            self.assertFalse(self.course.user_can_change(self.user))
+            self.assertTrue(self.course.user_can_view(self.user))
+            self.course.remove_collaborator(self.user)
+            self.assertFalse(self.course.user_can_view(self.user))
+
+    def test_save_invalidates_cache(self):
+        with permissions_cache():
+            self.assertFalse(self.course.user_can_view(self.user))
+            self.course.access = CourseAccess.PUBLIC.name
+            self.course.save()
+            self.assertTrue(self.course.user_can_view(self.user))
+            self.course.access = CourseAccess.PRIVATE.name
+            self.course.save()
+            self.assertFalse(self.course.user_can_view(self.user))
+
+
+class ResolvePermsTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.user = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.users = [self.author, self.user, AnonymousUser()]
+        self.courses, self.activities, self.resources = list(), list(), list()
+        links = itertools.cycle([None, "student"] + [role.name for role in CollaboratorRole])
+        for access in CourseAccess:
+            for link in (next(links), next(links)):
+                course = Course.objects.create(
+                    name="Course {} {}".format(access.name, link), author=self.author, access=access.name,
+                    state=CourseState.PUBLISHED.name, language="en"
+                )
+                if link == "student":
+                    course.register_student(self.user)
+                elif link is not None:
+                    course.add_collaborator(self.user, CollaboratorRole[link])
+                self.courses.append(course)
+        for index, access in enumerate(ActivityAccess):
+            for link in (next(links), next(links)):
+                activity = Activity.objects.create(
+                    name="Activity {} {}".format(access.name, link), author=self.author, access=access.name,
+                    language="en"
+                )
+                if link in (None, "student"):
+                    self.courses[(len(self.activities) * 3) % len(self.courses)].add_activity(activity)
+                else:
+                    activity.add_collaborator(self.user, CollaboratorRole[link])
+                self.activities.append(activity)
+        for access in ResourceAccess:
+            for link in (next(links), next(links)):
+                resource = Resource.objects.create(
+                    name="Resource {} {}".format(access.name, link), author=self.author, access=access.name,
+                    language="en"
+                )
+                if link in (None, "student"):
+                    self.activities[(len(self.resources) * 3) % len(self.activities)].add_resource(resource)
+                else:
+                    resource.add_collaborator(self.user, CollaboratorRole[link])
+                self.resources.append(resource)
+
+    def test_same_perms_as_get_user_perms(self):
+        for objects, user in itertools.product([self.courses, self.activities, self.resources], self.users):
+            resolved = resolve_perms(objects, user)
+            self.assertEqual(len(objects), len(resolved))
+            for an_object in objects:
+                self.assertEqual(an_object.get_user_perms(user), resolved[an_object], msg="{}, {}".format(an_object, user))
+
+    def test_mixed_types(self):
+        objects = self.resources + self.courses + self.activities
+        resolved = resolve_perms(objects, self.user)
+        for an_object in objects:
+            self.assertEqual(an_object.get_user_perms(self.user), resolved[an_object])
+
+    def test_keeps_order_of_objects(self):
+        objects = self.resources[::-1] + self.courses + self.activities[::-1]
+        with permissions_cache():
+            resolve_perms(self.courses[::2], self.user)
+            self.assertEqual(objects, list(resolve_perms(objects + objects[:3], self.user).keys()))
+
+    def test_constant_number_of_queries(self):
+        # Collaborators roles, then registrations or the links to the courses or activities that grant the view access
+        for objects in (self.courses, self.activities, self.resources):
+            with self.assertNumQueries(2):
+                resolve_perms(objects, self.user)
+
+    def test_anonymous_user_requires_no_query_on_courses(self):
+        with self.assertNumQueries(0):
+            resolve_perms(self.courses, AnonymousUser())
+
+    def test_fills_permissions_cache(self):
+        with permissions_cache():
+            resolved = resolve_perms(self.resources, self.user)
+            with self.assertNumQueries(0):
+                for resource in self.resources:
+                    self.assertEqual(resolved[resource], resource.get_user_perms(self.user))
+
+
+class VisibleToTest(TestCase):
+
+    def setUp(self):
+        rand = random.Random(20210131)
+        self.users = [get_user_model().objects.create_user(username="user-{}".format(i)) for i in range(5)]
+        self.courses = [
+            Course.objects.create(
+                name="Course {}".format(i), author=rand.choice(self.users), access=rand.choice(list(CourseAccess)).name,
+                state=CourseState.PUBLISHED.name, language="en"
+            ) for i in range(16)
+        ]
+        self.activities = [
+            Activity.objects.create(
+                name="Activity {}".format(i), author=rand.choice(self.users),
+                access=rand.choice(list(ActivityAccess)).name, language="en"
+            ) for i in range(16)
+        ]
+        self.resources = [
+            Resource.objects.create(
+                name="Resource {}".format(i), author=rand.choice(self.users),
+                access=rand.choice(list(ResourceAccess)).name, language="en"
+            ) for i in range(16)
+        ]
+        for an_object in self.courses + self.activities + self.resources:
+            for user in rand.sample(self.users, 2):
+                if user != an_object.author:
+                    an_object.add_collaborator(user, rand.choice(list(CollaboratorRole)))
+        for course in self.courses:
+            for user in rand.sample(self.users, 2):
+                if user != course.author and user not in course.collaborators.all():
+                    course.register_student(user)
+            for rank, activity in enumerate(rand.sample(self.activities, 3), start=1):
+                CourseActivity.objects.create(course=course, activity=activity, rank=rank)
+        for activity in self.activities:
+            activity.resources.add(*rand.sample(self.resources, 3))
+
+    def assert_same_visibility(self, model, objects):
+        for user in self.users + [AnonymousUser()]:
+            self.assertEqual(
+                {an_object for an_object in objects if "view" in an_object._get_user_perms(user)},
+                set(model.objects.visible_to(user)),
+                msg="{} visible to {}".format(model.__name__, user)
+            )
+
+    def test_courses_visible_to(self):
+        self.assert_same_visibility(Course, self.courses)
+
+    def test_activities_visible_to(self):
+        self.assert_same_visibility(Activity, self.activities)
+
+    def test_resources_visible_to(self):
+        self.assert_same_visibility(Resource, self.resources)
+
+    def test_visible_to_without_duplicates(self):
+        for model in (Course, Activity, Resource):
+            for user in self.users:
+                visible = model.objects.visible_to(user)
+                self.assertEqual(len(set(visible)), visible.count())
+
+
+class ResourceInActivitiesPermsTest(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="william-shakespeare")
+        self.user = get_user_model().objects.create_user(id=2, username="emily-dickinson")
+        self.resource = Resource.objects.create(
+            name="A shared resource", author=self.author, access=ResourceAccess.EXISTING_ACTIVITIES.name, language="en"
+        )
+        self.course = Course.objects.create(
+            name="A course", author=self.author, access=CourseAccess.STUDENTS_ONLY.name,
+            state=CourseState.PUBLISHED.name, language="en"
+        )
+        for i in range(10):
+            activity = Activity.objects.create(
+                name="Activity {}".format(i), author=self.author, access=ActivityAccess.EXISTING_COURSES.name,
+                language="en"
+            )
+            activity.resources.add(self.resource)
+            CourseActivity.objects.create(course=self.course, activity=activity, rank=i + 1)
+
+    def test_single_existence_query(self):
+        with self.assertNumQueries(2):
+            self.assertNotIn("view", self.resource._get_user_perms(self.user))
+        RegistrationOnCourse.objects.create(course=self.course, student=self.user)
+        with self.assertNumQueries(2):
+            self.assertIn("view", self.resource._get_user_perms(self.user))
+
+    def test_anonymous_user(self):
+        self.assertNotIn("view", self.resource._get_user_perms(AnonymousUser()))
+        self.course.access = CourseAccess.PUBLIC.name
+        self.course.save()
+        self.assertIn("view", self.resource._get_user_perms(AnonymousUser()))
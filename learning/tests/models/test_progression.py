@@ -0,0 +1,325 @@
+#
+# Copyright (C) 2020 Louis Barbier <louis.barbier@outlook.fr>
+#
+# This file is part of Koala LMS (Learning Management system)
+
+# Koala LMS is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# We make an extensive use of the Django framework, https://www.djangoproject.com/
+
+import random
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from learning.models import Objective, Course, CourseAccess, CourseState, TaxonomyLevel, Activity, Resource, \
+    CourseActivity, CourseObjective, ActivityObjective, ResourceObjective, get_progression_on_course_for_user, \
+    get_progression_matrix, ProgressionSnapshot, get_taxonomy_level_name, change_validations, \
+    ActivityObjectiveValidator
+
+
+def reference_progression(course: Course, student: get_user_model()) -> dict:
+    """
+    The progression as it was computed with one query per objective and per entity objective, used as a reference
+    for the set-based computation.
+    """
+    objective_taxonomy_total = 0
+    objectives_in_course_information = []
+    objective_taxonomy_information = dict()
+    for objective in course.get_all_objectives().order_by("pk"):
+        objective_basic_information = {"objective_ability": objective.ability}
+        objective_on_course = CourseObjective.objects.filter(objective=objective, course=course).order_by("pk")
+        objective_on_activity = ActivityObjective.objects.filter(
+            objective=objective, activity__course_activities__course=course
+        ).order_by("pk")
+        objective_on_resource = ResourceObjective.objects.filter(
+            objective=objective, resource__activities__course_activities__course=course
+        ).order_by("pk")
+        if objective_on_course.exists():
+            objective_basic_information["on_course"] = list(objective_on_course.all())
+        if objective_on_activity.exists():
+            objective_basic_information["on_activity"] = list(objective_on_activity.all())
+        if objective_on_resource.exists():
+            objective_basic_information["on_resource"] = list(objective_on_resource.all())
+        objective_basic_information["validated"] = \
+            any(student in obj.validators.all() for obj in objective_on_resource) or \
+            any(student in obj.validators.all() for obj in objective_on_activity) or \
+            any(student in obj.validators.all() for obj in objective_on_course)
+        objectives_in_course_information.append(objective_basic_information)
+        for all_objectives in [objective_on_course, objective_on_activity, objective_on_resource]:
+            for obj in all_objectives:
+                if obj.taxonomy_level not in objective_taxonomy_information:
+                    objective_taxonomy_information[obj.taxonomy_level] = {"number_validation": 0, "total": 0}
+                if student in obj.validators.all():
+                    objective_taxonomy_information[obj.taxonomy_level]["number_validation"] += 1
+                objective_taxonomy_information[obj.taxonomy_level]["total"] += 1
+        objective_taxonomy_total += len(objective_on_course) + len(objective_on_activity) + len(objective_on_resource)
+    for level in objective_taxonomy_information:
+        level_information = objective_taxonomy_information[level]
+        level_information["progress_dimension"] = int(
+            level_information["total"] / objective_taxonomy_total * 100
+            * level_information["number_validation"] / level_information["total"]
+        )
+        level_information["progress_total"] = int(
+            100 * level_information["number_validation"] / level_information["total"]
+        )
+    return {
+        "objective_taxonomy_total": objective_taxonomy_total,
+        "objectives_in_course_information": objectives_in_course_information,
+        "objective_taxonomy_information": objective_taxonomy_information,
+    }
+
+
+class ProgressionTestCase(TestCase):
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(id=1, username="isaac-newton")
+        self.students = [
+            get_user_model().objects.create_user(id=2 + i, username="student-{}".format(i)) for i in range(3)
+        ]
+        self.course = Course.objects.create(
+            name="A course", author=self.author, access=CourseAccess.PUBLIC.name, state=CourseState.PUBLISHED.name
+        )
+        for student in self.students:
+            self.course.register_student(student)
+
+    def create_course_content(self, nb_activities: int, nb_resources: int, nb_objectives: int, seed: int) -> None:
+        rand = random.Random(seed)
+        levels = list(TaxonomyLevel)
+        objectives = [
+            Objective.objects.create(ability="Ability {} {}".format(seed, i), language="en", author=self.author)
+            for i in range(nb_objectives)
+        ]
+        resources = [Resource.objects.create(name="Resource {}".format(i), author=self.author)
+                     for i in range(nb_resources)]
+        entities = [self.course] + resources
+        for rank in range(nb_activities):
+            activity = Activity.objects.create(name="Activity {}".format(rank), author=self.author)
+            CourseActivity.objects.create(course=self.course, activity=activity, rank=rank)
+            # Resources may be shared by several activities of the course
+            activity.resources.add(*rand.sample(resources, k=min(len(resources), 2)))
+            entities.append(activity)
+        for entity in entities:
+            for objective in rand.sample(objectives, k=rand.randint(0, min(3, nb_objectives))):
+                entity.add_objective(objective, taxonomy_level=rand.choice(levels), objective_reusable=False)
+        for model in (CourseObjective, ActivityObjective, ResourceObjective):
+            for entity_objective in model.objects.all():
+                for student in self.students:
+                    if rand.random() < 0.4 and student not in entity_objective.validators.all():
+                        entity_objective.add_validator(student)
+
+
+class ProgressionTest(ProgressionTestCase):
+
+    def assert_same_progression(self, student: get_user_model()) -> None:
+        progression = get_progression_on_course_for_user(self.course, student)
+        self.assertEqual(reference_progression(self.course, student), progression)
+
+    def test_empty_course(self):
+        self.assert_same_progression(self.students[0])
+
+    def test_same_progression_as_reference(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.create_course_content(nb_activities=4, nb_resources=5, nb_objectives=6, seed=seed)
+                for student in self.students:
+                    self.assert_same_progression(student)
+                CourseActivity.objects.filter(course=self.course).delete()
+                for model in (Activity, Resource, Objective):
+                    model.objects.all().delete()
+
+    def test_constant_number_of_queries(self):
+        for size in (1, 3, 6):
+            self.create_course_content(nb_activities=size, nb_resources=size, nb_objectives=size, seed=size)
+            with self.assertNumQueries(3):
+                get_progression_on_course_for_user(self.course, self.students[0])
+
+
+class ProgressionMatrixTest(ProgressionTestCase):
+
+    def test_matrix_and_rates(self):
+        activity = Activity.objects.create(name="An activity", author=self.author)
+        resource = Resource.objects.create(name="A resource", author=self.author)
+        self.course.add_activity(activity)
+        activity.add_resource(resource)
+        first, second = (
+            Objective.objects.create(ability=ability, language="en", author=self.author) for ability in ("A", "B")
+        )
+        self.course.add_objective(first, taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=False)
+        activity.add_objective(first, taxonomy_level=TaxonomyLevel.APPLICATION, objective_reusable=False)
+        resource.add_objective(second, taxonomy_level=TaxonomyLevel.APPLICATION, objective_reusable=False)
+        # First student validates the first objective on the activity, second student validates both objectives
+        ActivityObjective.objects.get(objective=first).add_validator(self.students[0])
+        CourseObjective.objects.get(objective=first).add_validator(self.students[1])
+        ResourceObjective.objects.get(objective=second).add_validator(self.students[1])
+
+        with self.assertNumQueries(5):
+            matrix = get_progression_matrix(self.course)
+        self.assertEqual(self.students, matrix.students)
+        self.assertEqual([first, second], matrix.objectives)
+        self.assertEqual([[True, False], [True, True], [False, False]], matrix.validated)
+        self.assertEqual([0.5, 1.0, 0.0], matrix.student_rates())
+        self.assertEqual([2 / 3, 1 / 3], matrix.objective_rates())
+        # Levels count entity objectives: validating the first objective on the activity does not validate it on the
+        # course, at the knowledge level
+        self.assertEqual({TaxonomyLevel.KNOWLEDGE.name: 1 / 3, TaxonomyLevel.APPLICATION.name: 1 / 3},
+                         matrix.taxonomy_level_rates())
+        self.assertEqual([0.5, 1.0, 0.0], [rate for student, validations, rate in matrix.rows()])
+
+    def test_matrix_agrees_with_progression(self):
+        self.create_course_content(nb_activities=4, nb_resources=5, nb_objectives=6, seed=42)
+        matrix = get_progression_matrix(self.course)
+        for student, validations in zip(matrix.students, matrix.validated):
+            progression = get_progression_on_course_for_user(self.course, student)
+            self.assertEqual(
+                [information["validated"] for information in progression["objectives_in_course_information"]],
+                [validations[matrix.objectives.index(objective)] for objective in sorted(
+                    matrix.objectives, key=lambda objective: objective.pk
+                )]
+            )
+
+    def test_level_rates_agree_with_progression(self):
+        self.create_course_content(nb_activities=4, nb_resources=5, nb_objectives=6, seed=42)
+        matrix = get_progression_matrix(self.course)
+        levels = dict()
+        for student in matrix.students:
+            progression = get_progression_on_course_for_user(self.course, student)
+            for level, information in progression["objective_taxonomy_information"].items():
+                counts = levels.setdefault(get_taxonomy_level_name(level), [0, 0])
+                counts[0] += information["number_validation"]
+                counts[1] += information["total"]
+        self.assertTrue(levels)
+        self.assertEqual({level: nb_validated / total for level, (nb_validated, total) in levels.items()},
+                         matrix.taxonomy_level_rates())
+
+    def test_empty_matrix(self):
+        self.course.registrations.all().delete()
+        matrix = get_progression_matrix(self.course)
+        self.assertEqual([], matrix.students)
+        self.assertEqual([], matrix.objectives)
+        self.assertEqual({}, matrix.taxonomy_level_rates())
+
+
+class ProgressionSnapshotTest(ProgressionTestCase):
+
+    def assert_snapshots_are_current(self) -> None:
+        self.assertEqual(len(self.students), ProgressionSnapshot.objects.filter(course=self.course).count())
+        for student in self.students:
+            information = get_progression_on_course_for_user(self.course, student)["objective_taxonomy_information"]
+            self.assertEqual(
+                {get_taxonomy_level_name(level): [counts["number_validation"], counts["total"]]
+                 for level, counts in information.items()},
+                ProgressionSnapshot.objects.get(course=self.course, student=student).levels
+            )
+
+    def test_snapshot_created_on_registration(self):
+        self.assert_snapshots_are_current()
+        self.assertEqual(0, ProgressionSnapshot.objects.get(course=self.course, student=self.students[0]).progress)
+
+    def test_snapshot_deleted_on_unregistration(self):
+        self.course.unsubscribe_student(self.students[0])
+        self.assertFalse(ProgressionSnapshot.objects.filter(course=self.course, student=self.students[0]).exists())
+
+    def test_snapshots_follow_course_changes(self):
+        self.create_course_content(nb_activities=4, nb_resources=5, nb_objectives=6, seed=7)
+        self.assert_snapshots_are_current()
+        for model in (CourseObjective, ActivityObjective, ResourceObjective):
+            entity_objective = model.objects.filter(validators=self.students[0]).first()
+            if entity_objective is not None:
+                entity_objective.remove_validator(self.students[0])
+        self.assert_snapshots_are_current()
+        Resource.objects.filter(resource_objectives__isnull=False).first().delete()
+        self.assert_snapshots_are_current()
+        activity = Activity.objects.filter(resources__resource_objectives__isnull=False).first()
+        activity.resources.clear()
+        self.assert_snapshots_are_current()
+        CourseActivity.objects.filter(course=self.course).first().delete()
+        self.assert_snapshots_are_current()
+        CourseObjective.objects.filter(course=self.course).delete()
+        self.assert_snapshots_are_current()
+
+    def test_snapshots_follow_reusable_validations(self):
+        self.create_course_content(nb_activities=3, nb_resources=4, nb_objectives=2, seed=11)
+        objective = Objective.objects.create(ability="A reusable ability", language="en", author=self.author)
+        self.course.add_objective(objective, taxonomy_level=TaxonomyLevel.KNOWLEDGE, objective_reusable=True)
+        for entity in list(Activity.objects.all()) + list(Resource.objects.all()):
+            entity.add_objective(objective, taxonomy_level=TaxonomyLevel.ANALYSIS, objective_reusable=True)
+        course_objective = CourseObjective.objects.get(objective=objective)
+        course_objective.change_validation(self.students[0])
+        self.assert_snapshots_are_current()
+        course_objective.change_validation(self.students[0])
+        self.assert_snapshots_are_current()
+
+    def test_snapshots_follow_concurrent_change_validations(self):
+        self.create_course_content(nb_activities=4, nb_resources=3, nb_objectives=4, seed=13)
+        student = self.students[0]
+        activity_objectives = list(ActivityObjective.objects.order_by("pk")[:4])
+        self.assertEqual(4, len(activity_objectives))
+        not_validated, validated = activity_objectives[:2], activity_objectives[2:]
+        for entity_objective in not_validated:
+            if entity_objective.has_validator(student):
+                entity_objective.remove_validator(student)
+        for entity_objective in validated:
+            if not entity_objective.has_validator(student):
+                entity_objective.add_validator(student)
+        real_filter = ActivityObjectiveValidator.objects.filter
+
+        def change_validations_concurrently(concurrent_change, validations):
+            # Another request changes a validation once change_validations read the validations
+            def filter_concurrently(*args, **kwargs):
+                already_validated = list(real_filter(*args, **kwargs).values_list("activity_objective_id", flat=True))
+                filter_mock.side_effect = real_filter
+                concurrent_change()
+                return mock.Mock(values_list=mock.Mock(return_value=already_validated))
+
+            with mock.patch.object(ActivityObjectiveValidator.objects, "filter", side_effect=filter_concurrently) \
+                    as filter_mock:
+                change_validations(student, validations)
+
+        def validate_first():
+            ActivityObjectiveValidator.objects.bulk_create([
+                ActivityObjectiveValidator(student=student, activity_objective=not_validated[0])
+            ])
+            ProgressionSnapshot.objects.record_validation(not_validated[0], student.pk, 1)
+
+        def disclaim_first():
+            real_filter(student=student, activity_objective=validated[0]).delete()
+            ProgressionSnapshot.objects.record_validation(validated[0], student.pk, -1)
+
+        change_validations_concurrently(validate_first, {entity_objective: True for entity_objective in not_validated})
+        self.assert_snapshots_are_current()
+        change_validations_concurrently(disclaim_first, {entity_objective: False for entity_objective in validated})
+        self.assert_snapshots_are_current()
+
+    def test_snapshots_deleted_with_course(self):
+        self.create_course_content(nb_activities=2, nb_resources=2, nb_objectives=3, seed=3)
+        self.course.delete()
+        self.assertFalse(ProgressionSnapshot.objects.exists())
+
+    def test_rebuild_command_reports_and_repairs_drift(self):
+        self.create_course_content(nb_activities=2, nb_resources=3, nb_objectives=4, seed=5)
+        call_command("rebuild_progression_snapshots", verify=True, stdout=StringIO(), stderr=StringIO())
+        ProgressionSnapshot.objects.filter(student=self.students[0]).update(levels={})
+        ProgressionSnapshot.objects.filter(student=self.students[1]).delete()
+        Course.objects.create(name="Another course", author=self.author)
+        with self.assertRaises(CommandError) as context:
+            call_command("rebuild_progression_snapshots", verify=True, stdout=StringIO(), stderr=StringIO())
+        self.assertIn("drifted in 1 of 2 courses checked", str(context.exception))
+        stdout = StringIO()
+        call_command("rebuild_progression_snapshots", batch_size=1, stdout=stdout, stderr=StringIO())
+        self.assertIn("repaired in 1 of 2 courses checked", stdout.getvalue())
+        self.assert_snapshots_are_current()
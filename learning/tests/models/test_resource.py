@@ -208,6 +208,41 @@ class ResourceTest(ResourceTestCase):
         self.assertEqual(resource.duration, Duration.NOT_SPECIFIED.name)
         self.assertEqual(resource.slug, "a-sample-name-to-test-the-slug-generator")
 
+    """
+    Ordinal columns
+    """
+
+    def test_levels_follow_access_and_reuse(self):
+        self.assertEqual(ResourceAccess.PUBLIC.weight, self.resource1.access_level)
+        self.assertEqual(ResourceReuse.ONLY_AUTHOR.weight, self.resource1.reuse_level)
+        for access, reuse in zip(ResourceAccess, ResourceReuse):
+            self.resource1.access, self.resource1.reuse = access.name, reuse.name
+            self.resource1.save()
+            self.resource1.refresh_from_db()
+            self.assertEqual(access.weight, self.resource1.access_level)
+            self.assertEqual(reuse.weight, self.resource1.reuse_level)
+
+    def test_levels_saved_with_update_fields(self):
+        self.resource1.access = ResourceAccess.PRIVATE.name
+        self.resource1.save(update_fields=["access"])
+        self.resource1.refresh_from_db()
+        self.assertEqual(ResourceAccess.PRIVATE.weight, self.resource1.access_level)
+
+    def test_reusable_resources_filtered_by_level(self):
+        author, other = get_user_model().objects.get(pk=2), get_user_model().objects.get(pk=3)
+        for reuse in ResourceReuse:
+            Resource.objects.create(name=reuse.name, author=author, reuse=reuse.name, language="en")
+        self.assertEqual(
+            {ResourceReuse.NO_RESTRICTION.name, ResourceReuse.ONLY_AUTHOR.name},
+            set(Resource.objects.reusable(self.activity1, author).exclude(pk=self.resource1.pk).values_list(
+                "name", flat=True
+            ))
+        )
+        self.assertEqual(
+            {ResourceReuse.NO_RESTRICTION.name},
+            set(Resource.objects.reusable(self.activity1, other).values_list("name", flat=True))
+        )
+
     """
     Property object_collaborators
     """
@@ -21,7 +21,9 @@
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from learning.forms import BasicSearchForm
@@ -165,6 +167,37 @@ class CourseViews(TestCase):
         self.assertIn("id_tags", content)
         self.assertIn("id_description", content)
 
+    def _add_listed_courses(self, number):
+        for _ in range(number):
+            course = Course.objects.create(
+                name="A listed course", description="A simple description", author=self.ed, tags="simple, listed",
+                access=CourseAccess.PUBLIC.name, state=CourseState.PUBLISHED.name, registration_enabled=True,
+                language="en"
+            )
+            course.add_collaborator(self.acd, CollaboratorRole.TEACHER)
+            course.register_student(self.lt)
+            course.favourite_for.add(self.ed, self.lt)
+            course.add_activity(Activity.objects.create(name="A listed activity", author=self.ed, language="en"))
+
+    def _count_list_queries(self):
+        counts = []
+        for username, url in [("ed", reverse("learning:course/teaching")), ("acd", reverse("learning:course/teaching")),
+                              ("lt", reverse("learning:course/my")), ("lt", reverse("learning:index"))]:
+            client = ClientFactory.get_client_for_user(username)
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(200, client.get(url).status_code)
+            counts.append(len(context.captured_queries))
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(200, Client().get(reverse("learning:index")).status_code)
+        counts.append(len(context.captured_queries))
+        return counts
+
+    def test_course_list_views_run_a_constant_number_of_queries(self):
+        self._add_listed_courses(1)
+        counts = self._count_list_queries()
+        self._add_listed_courses(3)
+        self.assertEqual(counts, self._count_list_queries())
+
     def test_course_update_view_has_permission_because_author(self):
         for course in (
         self.public_course, self.students_only_course, self.collaborators_only_course, self.private_course):
@@ -615,8 +648,7 @@ class CourseViews(TestCase):
             status_code=302, target_status_code=200,
             expected_url=reverse("learning:course/detail", kwargs={'slug': self.public_course.slug})
         )
-        self.assertEqual(self.activity3, self.public_course.course_activities.filter(rank=2).get().activity)
-        self.assertEqual(self.activity2, self.public_course.course_activities.filter(rank=3).get().activity)
+        self.assertEqual([self.activity1, self.activity3, self.activity2], list(self.public_course.activities))
 
     def test_post_course_up_view(self):
         self.public_course.course_activities.all().delete()
@@ -633,8 +665,7 @@ class CourseViews(TestCase):
             status_code=302, target_status_code=200,
             expected_url=reverse("learning:course/detail", kwargs={'slug': self.public_course.slug})
         )
-        self.assertEqual(self.activity2, self.public_course.course_activities.filter(rank=1).get().activity)
-        self.assertEqual(self.activity1, self.public_course.course_activities.filter(rank=2).get().activity)
+        self.assertEqual([self.activity2, self.activity1, self.activity3], list(self.public_course.activities))
 
     def test_post_course_up_view_forbidden(self):
         self.assertFalse(self.public_course.user_can_change(self.lt))
@@ -644,6 +675,60 @@ class CourseViews(TestCase):
         )
         self.assertEqual(403, response.status_code)
 
+    """
+    activities_on_course_order_view
+    """
+
+    def test_get_course_order_view(self):
+        response = ClientFactory.get_client_for_user("ws").get(
+            reverse("learning:course/detail/activities/order", kwargs={'slug': self.public_course.slug}),
+            {'activities': [1]}
+        )
+        self.assertEqual(405, response.status_code)
+
+    def test_post_course_order_view(self):
+        self.public_course.course_activities.all().delete()
+        for activity in (self.activity1, self.activity2, self.activity3):
+            self.public_course.add_activity(activity)
+        response = ClientFactory.get_client_for_user("ws").post(
+            reverse("learning:course/detail/activities/order", kwargs={'slug': self.public_course.slug}),
+            {'activities': [self.activity3.id, self.activity1.id, self.activity2.id]}
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"course": self.public_course.slug, "activities": [self.activity3.id, self.activity1.id, self.activity2.id]},
+            response.json()
+        )
+        self.assertEqual([self.activity3, self.activity1, self.activity2], list(self.public_course.activities))
+
+    def test_post_course_order_view_pk_as_string(self):
+        response = ClientFactory.get_client_for_user("ws").post(
+            reverse("learning:course/detail/activities/order", kwargs={'slug': self.public_course.slug}),
+            {'activities': ["Test"]}
+        )
+        self.assertEqual(400, response.status_code)
+        self.assertIn("activities", response.json()["errors"])
+
+    def test_post_course_order_view_incomplete_list(self):
+        self.public_course.course_activities.all().delete()
+        for activity in (self.activity1, self.activity2, self.activity3):
+            self.public_course.add_activity(activity)
+        response = ClientFactory.get_client_for_user("ws").post(
+            reverse("learning:course/detail/activities/order", kwargs={'slug': self.public_course.slug}),
+            {'activities': [self.activity3.id, self.activity1.id]}
+        )
+        self.assertEqual(400, response.status_code)
+        self.assertIn("activities", response.json()["errors"])
+        self.assertEqual([self.activity1, self.activity2, self.activity3], list(self.public_course.activities))
+
+    def test_post_course_order_view_forbidden(self):
+        self.assertFalse(self.public_course.user_can_change(self.lt))
+        response = ClientFactory.get_client_for_user("lt").post(
+            reverse("learning:course/detail/activities/order", kwargs={'slug': self.public_course.slug}),
+            {'activities': [self.activity1.id]}
+        )
+        self.assertEqual(403, response.status_code)
+
     """
     activity_on_course_unlink_view
     """
@@ -910,6 +995,17 @@ class CourseViews(TestCase):
         self.assertEqual(self.activity1, response.context.get('activity'))
         self.assertEqual(r1, response.context.get('resource'))
 
+    def test_course_detail_activity_resource_view_follows_course_changes(self):
+        r1 = Resource.objects.create(name="A sample resource", author=self.ws, language="en")
+        self.activity1.resources.add(r1)
+        url = reverse(
+            "learning:course/detail/activities/resource",
+            kwargs={'slug': self.public_course.slug, 'activity_slug': self.activity1.slug, 'resource_slug': r1.slug}
+        )
+        self.assertEqual(200, ClientFactory.get_client_for_user("lt").get(url).status_code)
+        self.activity1.resources.remove(r1)
+        self.assertEqual(404, ClientFactory.get_client_for_user("lt").get(url).status_code)
+
     def test_course_detail_activity_resource_view_no_resource(self):
         self.public_course.user_can_view(self.lt)
 
@@ -18,6 +18,7 @@
 #
 # We make an extensive use of the Django framework, https://www.djangoproject.com/
 from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
 from django.test import TestCase, Client
 from django.urls import reverse
 
@@ -372,6 +373,64 @@ class CourseValidateObjectiveTest(ObjectiveViews):
         self.assertEquals(response.status_code, 302)
         self.assertNotIn(get_user_model().objects.filter(pk=1).get(), course_objective.validators.all())
 
+    def test_course_objective_validations(self):
+        course_objective = CourseObjective.objects.get(objective=self.objective, course=self.public_course)
+        self.public_course.add_objective(objective=self.objective_1,
+                                         objective_reusable=False,
+                                         taxonomy_level=TaxonomyLevel.EVALUATION)
+        course_objective_1 = CourseObjective.objects.get(objective=self.objective_1, course=self.public_course)
+        student = get_user_model().objects.get(username="blase-pascal")
+        url = reverse("learning:course/detail/objective/validations/change", kwargs={'slug': self.public_course.slug})
+
+        response = ClientFactory.get_client_for_user("blase-pascal").post(
+            url, {"validated": [course_objective.id, course_objective_1.id]}
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"validated": sorted([course_objective.id, course_objective_1.id]),
+             "progression": {"validated": 2, "total": 2}},
+            response.json()
+        )
+        self.assertIn(student, self.objective.validators.all())
+
+        response = ClientFactory.get_client_for_user("blase-pascal").post(
+            url, {"validated": [course_objective_1.id], "not_validated": [course_objective.id]}
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {"validated": [course_objective_1.id], "progression": {"validated": 1, "total": 2}}, response.json()
+        )
+        self.assertNotIn(student, course_objective.validators.all())
+        self.assertNotIn(student, self.objective.validators.all())
+
+    def test_course_objective_validations_wrong_data(self):
+        course_objective = CourseObjective.objects.get(objective=self.objective, course=self.public_course)
+        url = reverse("learning:course/detail/objective/validations/change", kwargs={'slug': self.public_course.slug})
+        client = ClientFactory.get_client_for_user("blase-pascal")
+        for data in ({}, {"validated": ["Test"]}, {"validated": [course_objective.id], "not_validated": [
+            course_objective.id
+        ]}, {"validated": [course_objective.id + 100]}):
+            with self.subTest(data=data):
+                response = client.post(url, data)
+                self.assertEqual(400, response.status_code)
+                self.assertIn("errors", response.json())
+        self.assertFalse(course_objective.validators.exists())
+        self.assertEqual(405, client.get(url).status_code)
+
+    def test_course_objective_validations_forbidden(self):
+        self.public_course.access = CourseAccess.PRIVATE.name
+        self.public_course.state = CourseState.DRAFT.name
+        self.public_course.save()
+        course_objective = CourseObjective.objects.get(objective=self.objective, course=self.public_course)
+        response = ClientFactory.get_client_for_user("blase-pascal").post(
+            reverse("learning:course/detail/objective/validations/change", kwargs={'slug': self.public_course.slug}),
+            {"validated": [course_objective.id]}
+        )
+        self.assertEqual(403, response.status_code)
+        self.assertIn("__all__", response.json()["errors"])
+        self.assertFalse(course_objective.validators.exists())
+        self.assertEqual(0, len(list(get_messages(response.wsgi_request))))
+
 
 class CourseViewObjectiveListTest(ObjectiveViews):
     def test_course_detail_objective_list_as_visitor(self):
@@ -717,3 +776,47 @@ class CourseProgression(ObjectiveViews):
             "active-student-{}-list".format(get_user_model().objects.filter(username="jules-ferry").get().id), content)
         self.assertIn("alert-any-user-registered", content)
 
+    def test_students_progression_for_teacher_owner(self):
+        student = get_user_model().objects.filter(username="jules-ferry").get()
+        self.public_course.register(student)
+        CourseObjective.objects.get(objective=self.objective, course=self.public_course).add_validator(student)
+        response = ClientFactory.get_client_for_user("isaac-newton").get(
+            reverse("learning:course/detail/students/progression", kwargs={'slug': self.public_course.slug}))
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "learning/course/details/students_progression.html")
+        content = response.content.decode("utf-8")
+        self.assertIn("students-progression-table", content)
+        self.assertIn(self.objective.ability, content)
+        self.assertEqual([[True]], response.context["progression_matrix"].validated)
+
+    def test_students_progression_for_student(self):
+        self.public_course.register(get_user_model().objects.filter(username="louis-xiv").get())
+        response = ClientFactory.get_client_for_user("louis-xiv").get(
+            reverse("learning:course/detail/students/progression", kwargs={'slug': self.public_course.slug}))
+        self.assertEquals(response.status_code, 403)
+
+    def test_students_list_shows_progression_snapshots(self):
+        student = get_user_model().objects.filter(username="jules-ferry").get()
+        self.public_course.register(student)
+        CourseObjective.objects.get(objective=self.objective, course=self.public_course).add_validator(student)
+        response = ClientFactory.get_client_for_user("isaac-newton").get(
+            reverse("learning:course/detail/students", kwargs={'slug': self.public_course.slug}))
+        self.assertEquals(response.status_code, 200)
+        self.assertEqual(100, response.context["progressions"][student.id].progress)
+        self.assertIn("progression-student-{}".format(student.id), response.content.decode("utf-8"))
+
+
+class ObjectiveDetailViewTest(ObjectiveViews):
+    def test_detail_lists_visible_courses(self):
+        private_course = Course.objects.create(
+            name="A private course", description="A private description", author=get_user_model().objects.get(pk=2),
+            access=CourseAccess.PRIVATE.name, state=CourseState.PUBLISHED.name
+        )
+        private_course.add_objective(objective=self.objective, objective_reusable=True,
+                                     taxonomy_level=TaxonomyLevel.COMPREHENSION)
+        url = reverse("learning:objective/detail", kwargs={"slug": self.objective.slug})
+        response = ClientFactory.get_client_for_user("isaac-newton").get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([self.public_course], list(response.context["page_obj"].object_list))
+        response = ClientFactory.get_client_for_user("blase-pascal").get(url)
+        self.assertEqual({self.public_course, private_course}, set(response.context["page_obj"].object_list))
@@ -62,6 +62,7 @@ course_details_urlpatterns = [
         name="course/detail/activities/resource"
     ),
     path("activity/up", course_views.activity_on_course_up_view, name="course/detail/activity/up"),
+    path("activities/order", course_views.activities_on_course_order_view, name="course/detail/activities/order"),
     path("activity/add", course_views.ActivityCreateOnCourseView.as_view(), name="course/detail/activity/add"),
     path("activity/attach", course_views.ActivityAttachOnCourseView.as_view(), name="course/detail/activity/attach"),
     path("activity/unlink", course_views.activity_on_course_unlink_view, name="course/detail/activity/unlink"),
@@ -78,6 +79,8 @@ course_details_urlpatterns = [
 
     # Students: view, add and delete from a course
     path("students/", course_views.CourseDetailStudentsView.as_view(), name="course/detail/students"),
+    path("students/progression", course_views.CourseDetailStudentsProgressionView.as_view(),
+         name="course/detail/students/progression"),
     path("students/add", course_views.CourseDetailStudentsAddView.as_view(), name="course/detail/students/add"),
     path("students/update/<int:registration_pk>", course_views.CourseDetailStudentChangeView.as_view(),
          name="course/detail/students/change"),
@@ -107,6 +110,9 @@ course_details_urlpatterns = [
     path('objective/validation/change', course_views.CourseObjectiveUpdateValidationView.as_view(),
          name="course/detail/objective/validation/change"),
 
+    path('objective/validations/change', course_views.CourseObjectiveUpdateValidationsView.as_view(),
+         name="course/detail/objective/validations/change"),
+
     # Progression
 
     path('progression/student', course_views.StudentCourseProgressionMixin.as_view(),
@@ -188,6 +194,9 @@ activity_details_urlpatterns = [
     path('objective/validation/change', activity_views.ActivityObjectiveUpdateValidationView.as_view(),
          name="activity/detail/objective/validation/change"),
 
+    path('objective/validations/change', activity_views.ActivityObjectiveUpdateValidationsView.as_view(),
+         name="activity/detail/objective/validations/change"),
+
 
 ]
 
@@ -243,6 +252,9 @@ resource_details_urlpatterns = [
 
     path('objective/validation/change', resource_views.ResourceObjectiveUpdateValidationView.as_view(),
          name="resource/detail/objective/validation/change"),
+
+    path('objective/validations/change', resource_views.ResourceObjectiveUpdateValidationsView.as_view(),
+         name="resource/detail/objective/validations/change"),
 ]
 
 resource_urlpatterns = [
@@ -23,6 +23,7 @@
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.db.models import Count
 from django.forms import ModelForm
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy
@@ -41,7 +42,8 @@ from learning.views.includes.collaborators import BasicModelDetailCollaboratorsL
     BasicModelDetailCollaboratorsAddView, BasicModelDetailCollaboratorsChangeView, \
     BasicModelDetailCollaboratorsDeleteView
 from learning.views.objective import ObjectObjectiveDetailMixin, BasicModelDetailObjectiveAddView, \
-    ObjectObjectiveUpdateValidationView, BasicModelDetailObjectiveRemoveView, BasicModelDetailObjectiveUpdateView
+    ObjectObjectiveUpdateValidationView, ObjectObjectiveUpdateValidationsView, BasicModelDetailObjectiveRemoveView, \
+    BasicModelDetailObjectiveUpdateView
 
 
 class ActivityDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
@@ -68,7 +70,7 @@ class ActivityDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
 
         # Add user specific elements in the context
         if self.request.user.is_authenticated:
-            if self.request.user in self.object.collaborators.all():
+            if self.object.has_collaborator(self.request.user):
                 context["contribution"] = ActivityCollaborator.objects \
                     .get(collaborator=self.request.user, activity=self.object)
         return context
@@ -98,7 +100,7 @@ class ActivityDetailView(ActivityDetailMixin, PermissionRequiredMixin, DetailVie
                                                                                 activity=self.object,
                                                                                 role=CollaboratorRole.TEACHER.name).exists()
         context["user_is_author_of_object"] = self.request.user == self.object.author
-        context["user_contribute"] = self.request.user in self.object.collaborators.all()
+        context["user_contribute"] = self.object.has_collaborator(self.request.user)
         if self.request.user != self.object.author:
             context["auth_user"] = self.request.user
         return context
@@ -341,10 +343,11 @@ class ActivityDetailSimilarView(ActivityDetailSimilarViewMixin):
         context = super().get_context_data(**kwargs)
         # noinspection PyBroadException
         try:
-            similar_list = [
-                similar for similar in self.object.tags.similar_objects()
-                if isinstance(similar, Activity) and similar.user_can_view(self.request.user)
-            ]
+            similar_list = Activity.objects.visible_to(self.request.user) \
+                .exclude(pk=self.object.pk) \
+                .filter(tags__in=self.object.tags.all()) \
+                .annotate(same_tags=Count("pk")) \
+                .order_by("-same_tags", "-updated", "name")
             context.update(PaginatorFactory.get_paginator_as_context(similar_list, self.request.GET, nb_per_page=9))
         # django-taggit similar tags can have weird behaviour sometimes: https://github.com/jazzband/django-taggit/issues/80
         except Exception:
@@ -430,7 +433,7 @@ class ResourceOnActivityDetailView(ResourceOnActivityDetailViewMixin):
             collaborator=self.request.user, resource=self.resource, role=CollaboratorRole.TEACHER.name
         ).exists()
         context["user_is_author_of_object"] = self.request.user == self.resource.author
-        context["user_contribute"] = self.request.user in self.object.collaborators.all()
+        context["user_contribute"] = self.object.has_collaborator(self.request.user)
         if self.request.user != self.object.author:
             context["auth_user"] = self.request.user
         return context
@@ -671,3 +674,9 @@ class ActivityObjectiveUpdateValidationView(ObjectObjectiveUpdateValidationView,
     """
     Handle the ActivityObjectiveValidation
     """
+
+
+class ActivityObjectiveUpdateValidationsView(ObjectObjectiveUpdateValidationsView, ActivityDetailMixin):
+    """
+    Handle several ActivityObjective validations at once
+    """
@@ -32,10 +32,12 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.db.models import Count, Prefetch
 from django.forms import Form, ModelForm
-from django.http import HttpResponseNotAllowed, HttpResponseNotFound, HttpRequest
+from django.http import Http404, HttpResponseNotAllowed, HttpResponseNotFound, HttpRequest, JsonResponse
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy
+from django.utils.functional import SimpleLazyObject, cached_property
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
 from django.views.generic import CreateView, UpdateView, DetailView, DeleteView, TemplateView
@@ -43,20 +45,21 @@ from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.edit import ProcessFormView, FormView
 
 from learning.exc import LearningError, ChangeActivityOnCourseError, UserIsAlreadyCollaborator, UserIsAlreadyAuthor, \
-    UserIsAlreadyStudent
+    UserIsAlreadyStudent, CourseActivitiesOrderError, \
+    ActivityIsNotLinkedWithThisCourseError
 from learning.forms import CourseCreateForm, CourseUpdateFormForOwner, CourseUpdateForm, \
     ActivityCreateForm, AddStudentOnCourseForm, BasicSearchForm, \
-    UserPKForm, ActivityPKForm
+    UserPKForm, ActivityPKForm, ActivityPKListForm
 from learning.models import CourseCollaborator, Course, Activity, Resource, \
-    CourseActivity, RegistrationOnCourse, CourseObjective, ActivityObjective, \
-    ResourceObjective, get_progression_on_course_for_user, CollaboratorRole
+    CourseActivity, RegistrationOnCourse, CourseObjective, ProgressionSnapshot, get_progression_on_course_for_user, \
+    get_progression_matrix, CollaboratorRole, CourseTree, get_course_tree
 from learning.views.helpers import PaginatorFactory, SearchQuery, InvalidFormHandlerMixin
 from learning.views.includes.collaborators import BasicModelDetailCollaboratorsListView, \
     BasicModelDetailCollaboratorsAddView, BasicModelDetailCollaboratorsDeleteView, \
     BasicModelDetailCollaboratorsChangeView
 from learning.views.objective import ObjectObjectiveDetailMixin, \
-    BasicModelDetailObjectiveAddView, ObjectObjectiveUpdateValidationView, BasicModelDetailObjectiveRemoveView, \
-    BasicModelDetailObjectiveUpdateView, CourseObjectiveUpdateForm
+    BasicModelDetailObjectiveAddView, ObjectObjectiveUpdateValidationView, ObjectObjectiveUpdateValidationsView, \
+    BasicModelDetailObjectiveRemoveView, BasicModelDetailObjectiveUpdateView, CourseObjectiveUpdateForm
 
 
 class CourseDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
@@ -76,16 +79,24 @@ class CourseDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
     def has_permission(self) -> bool:
         return self.object.user_can_view(self.request.user)
 
+    @cached_property
+    def course_tree(self) -> CourseTree:
+        """
+        :return: the content tree of the course, from its snapshot when the content did not change since it was taken
+        :rtype: CourseTree
+        """
+        return get_course_tree(self.object)
+
     # noinspection PyUnresolvedReferences
     def __user_can_register(self) -> bool:
         return self.request.user != self.object.author and \
-               self.request.user not in self.object.collaborators.all() and \
+               not self.object.has_collaborator(self.request.user) and \
                self.object.can_register
 
     # noinspection PyUnresolvedReferences
     def __user_is_teacher(self) -> bool:
         return self.request.user == self.object.author or \
-               self.request.user in self.object.collaborators.all()
+               self.object.has_collaborator(self.request.user)
 
     # noinspection PyUnresolvedReferences,PyMissingOrEmptyDocstring
     def get_context_data(self, **kwargs):
@@ -99,8 +110,10 @@ class CourseDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
             self.request.GET,
             nb_per_page=6
         )
+        # The course content is loaded at once, only if the template uses it
+        context["course_tree"] = SimpleLazyObject(lambda: self.course_tree)
         if self.request.user.is_authenticated:
-            if self.request.user in self.object.collaborators.all():
+            if self.object.has_collaborator(self.request.user):
                 context["contribution"] = CourseCollaborator.objects \
                     .get(collaborator=self.request.user, course=self.object)
             registration = self.object.registrations.filter(student=self.request.user)
@@ -114,7 +127,7 @@ class CourseDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
             context["user_is_teacher_editor"] = CourseCollaborator.objects.filter(
                 collaborator=self.request.user, course=self.object, role=CollaboratorRole.TEACHER.name
             ).exists()
-            context["user_contribute"] = self.request.user in self.object.collaborators.all()
+            context["user_contribute"] = self.object.has_collaborator(self.request.user)
             context["user_is_author_of_object"] = self.request.user == self.object.author
             if self.request.user != self.object.author:
                 context["auth_user"] = self.request.user
@@ -251,20 +264,23 @@ class CourseAsTeacherListView(LoginRequiredMixin, FormView):
         # Add the paginator on favourite courses of the user where he is author.
         # Prefix is “favourite”: so object are “favourite_has_obj…”
         context.update(PaginatorFactory.get_paginator_as_context(
-            Course.objects.teacher_favourites_for(self.request.user),
-            self.request.GET, prefix="favourite", nb_per_page=6)
+            Course.objects.teacher_favourites_for(self.request.user).with_user_context(self.request.user)
+            .select_related("author").prefetch_related("tags"), self.request.GET, prefix="favourite", nb_per_page=6)
         )
 
         # Add the paginator on courses where user is author. Prefix is “author”: so object are “author_has_obj…”
         context.update(PaginatorFactory.get_paginator_as_context(
-            Course.objects.written_by(self.request.user), self.request.GET, prefix="author", nb_per_page=6)
+            Course.objects.written_by(self.request.user).with_user_context(self.request.user)
+            .select_related("author").prefetch_related("tags"), self.request.GET, prefix="author", nb_per_page=6)
         )
 
         # Add the paginator on courses where user is a collaborator. Prefix is “contributor”.
         # FIXME: this should exclude favourite courses where the user contribute
         context.update(PaginatorFactory.get_paginator_as_context(
-            CourseCollaborator.objects.filter(collaborator=self.request.user), self.request.GET, prefix="contributor",
-            nb_per_page=6)
+            CourseCollaborator.objects.filter(collaborator=self.request.user).prefetch_related(Prefetch(
+                "course", queryset=Course.objects.with_user_context(self.request.user)
+                .select_related("author").prefetch_related("tags")
+            )), self.request.GET, prefix="contributor", nb_per_page=6)
         )
 
         # Execute the user query and add the paginator on query
@@ -272,7 +288,8 @@ class CourseAsTeacherListView(LoginRequiredMixin, FormView):
         if form.is_valid() and form.cleaned_data.get("query", str()):
             context.update(PaginatorFactory.get_paginator_as_context(Course.objects.taught_by(
                 self.request.user, query=form.cleaned_data.get("query", str())
-            ).all(), self.request.GET, prefix="search"))
+            ).with_user_context(self.request.user).select_related("author").prefetch_related("tags"),
+                self.request.GET, prefix="search"))
 
         # Add the query form in the view
         context["form"] = form
@@ -293,14 +310,14 @@ class CourseAsStudentListView(LoginRequiredMixin, FormView):
         # Add the paginator on favourite courses of the user where he is student.
         # Prefix is “favourite”: so object are “favourite_has_obj…”
         context.update(PaginatorFactory.get_paginator_as_context(
-            Course.objects.student_favourites_for(self.request.user),
-            self.request.GET, prefix="favourite", nb_per_page=6)
+            Course.objects.student_favourites_for(self.request.user).with_user_context(self.request.user)
+            .select_related("author").prefetch_related("tags"), self.request.GET, prefix="favourite", nb_per_page=6)
         )
 
         # Add the paginator on courses where user is student. Prefix is “follow”: so object are “follow_has_obj…”
         context.update(PaginatorFactory.get_paginator_as_context(
-            Course.objects.followed_by_without_favorites(self.request.user),
-            self.request.GET, prefix="follow", nb_per_page=6)
+            Course.objects.followed_by_without_favorites(self.request.user).with_user_context(self.request.user)
+            .select_related("author").prefetch_related("tags"), self.request.GET, prefix="follow", nb_per_page=6)
         )
 
         # Execute the user query and add the paginator on query
@@ -308,7 +325,13 @@ class CourseAsStudentListView(LoginRequiredMixin, FormView):
         if form.is_valid() and form.cleaned_data.get("query", str()):
             context.update(PaginatorFactory.get_paginator_as_context(Course.objects.followed_by(
                 self.request.user, query=form.cleaned_data.get("query", str())
-            ).all(), self.request.GET, prefix="search"))
+            ).with_user_context(self.request.user).select_related("author").prefetch_related("tags"),
+                self.request.GET, prefix="search"))
+
+        # The progressions of the user on the courses, read from snapshots rather than computed
+        context["progressions"] = {
+            snapshot.course_id: snapshot for snapshot in ProgressionSnapshot.objects.filter(student=self.request.user)
+        }
 
         # Add the query form in the view
         context["form"] = form
@@ -368,7 +391,7 @@ class CourseDetailActivitiesView(CourseDetailView):
     # noinspection PyAttributeOutsideInit,PyMissingOrEmptyDocstring
     def dispatch(self, request, *args, **kwargs):
         self.object = self.get_object()
-        if self.object.course_activities.count() > 0:
+        if self.course_tree.activities:
             return super().dispatch(request, *args, **kwargs)
         messages.warning(request, _("This course does not have any activity yet."))
         return redirect("learning:course/detail", slug=self.object.slug)
@@ -378,15 +401,17 @@ class CourseDetailActivitiesView(CourseDetailView):
         context = super().get_context_data(**kwargs)
 
         # Add the current course activity into the context
+        activity_nodes = self.course_tree.activities
         if "activity_slug" in self.kwargs.keys():
-            course_activity = get_object_or_404(
-                CourseActivity, activity__slug=self.kwargs.get("activity_slug"), course=self.object
-            )
+            activity_node = self.course_tree.get_activity_node(self.kwargs.get("activity_slug"))
+            if activity_node is None:
+                raise Http404()
         else:
-            course_activity = self.object.course_activities.first()
-        context["current_course_activity"] = course_activity
+            activity_node = activity_nodes[0]
+        index = activity_nodes.index(activity_node)
+        context["current_course_activity"] = activity_node.course_activity
         context["current_course_activity_objective"] = PaginatorFactory.get_paginator_as_context(
-            ActivityObjective.objects.filter(activity=course_activity.activity).order_by("created").reverse(),
+            sorted(activity_node.objectives, key=lambda activity_objective: activity_objective.created, reverse=True),
             self.request.GET,
             nb_per_page=6
         )
@@ -394,12 +419,9 @@ class CourseDetailActivitiesView(CourseDetailView):
             context["auth_user"] = self.request.user
 
         # Add previous and next activities in the context
-        context["next_course_activity"] = CourseActivity.objects.filter(
-            course=self.object, rank=course_activity.rank + 1
-        ).first()
-        context["previous_course_activity"] = CourseActivity.objects.filter(
-            course=self.object, rank=course_activity.rank - 1
-        ).first()
+        context["next_course_activity"] = activity_nodes[index + 1].course_activity \
+            if index + 1 < len(activity_nodes) else None
+        context["previous_course_activity"] = activity_nodes[index - 1].course_activity if index > 0 else None
         return context
 
 
@@ -412,11 +434,17 @@ class CourseDetailActivityResourceView(CourseDetailView):
     # noinspection PyAttributeOutsideInit,PyMissingOrEmptyDocstring
     def dispatch(self, request, *args, **kwargs):
         self.object = self.get_object()
-        self.activity = get_object_or_404(Activity, slug=self.kwargs.get("activity_slug"))
-        self.resource = get_object_or_404(Resource, slug=self.kwargs.get("resource_slug"))
-        if self.object.course_activities.filter(activity=self.activity).exists() and \
-            self.activity.resources.filter(id=self.resource.id).exists():
+        activity_node = self.course_tree.get_activity_node(self.kwargs.get("activity_slug"))
+        resource_node = next((
+            node for node in activity_node.resources if node.resource.slug == self.kwargs.get("resource_slug")
+        ), None) if activity_node is not None else None
+        if resource_node is not None:
+            self.activity, self.resource = activity_node.activity, resource_node.resource
+            self.resource_objectives = resource_node.objectives
             return self.get(request, args, kwargs)
+        # Unknown objects are not found, like objects that are not included in the course
+        get_object_or_404(Activity, slug=self.kwargs.get("activity_slug"))
+        get_object_or_404(Resource, slug=self.kwargs.get("resource_slug"))
         return HttpResponseNotFound()
 
     # noinspection PyMissingOrEmptyDocstring
@@ -424,10 +452,8 @@ class CourseDetailActivityResourceView(CourseDetailView):
         context = super().get_context_data()
         context["activity"] = self.activity
         context["resource"] = self.resource
-        context["activity"] = self.activity
-        context["resource"] = self.resource
         context["current_course_activity_resource_objective"] = PaginatorFactory.get_paginator_as_context(
-            ResourceObjective.objects.filter(resource=self.resource).order_by("created").reverse(),
+            sorted(self.resource_objectives, key=lambda resource_objective: resource_objective.created, reverse=True),
             self.request.GET,
             nb_per_page=6
         )
@@ -495,6 +521,24 @@ class CourseDetailStudentsView(CourseDetailStudentViewMixin, FormView):
                 self.request.GET, nb_per_page=10)
         )
         context["number_student"] = self.object.registrations.count()
+        context["progressions"] = {
+            snapshot.student_id: snapshot for snapshot in ProgressionSnapshot.objects.filter(
+                course=self.object, student__in=[registration.student_id for registration in context["page_obj"]]
+            )
+        }
+        return context
+
+
+class CourseDetailStudentsProgressionView(CourseDetailStudentViewMixin):
+    """
+    View the progression of all students registered on a course in a HTML page.
+    """
+    template_name = "learning/course/details/students_progression.html"
+
+    # noinspection PyMissingOrEmptyDocstring
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["progression_matrix"] = get_progression_matrix(self.object)
         return context
 
 
@@ -670,10 +714,11 @@ class CourseDetailSimilarView(CourseDetailSimilarViewMixin):
         context = super().get_context_data(**kwargs)
         # noinspection PyBroadException
         try:
-            similar_list = [
-                similar for similar in self.object.tags.similar_objects()
-                if isinstance(similar, Course) and similar.user_can_view(self.request.user)
-            ]
+            similar_list = Course.objects.visible_to(self.request.user) \
+                .exclude(pk=self.object.pk) \
+                .filter(tags__in=self.object.tags.all()) \
+                .annotate(same_tags=Count("pk")) \
+                .order_by("-same_tags", "-updated", "name")
             context.update(PaginatorFactory.get_paginator_as_context(similar_list, self.request.GET, nb_per_page=9))
         # django-taggit similar tags can have weird behaviour sometimes: https://github.com/jazzband/django-taggit/issues/80
         except Exception:
@@ -886,7 +931,7 @@ def activity_on_course_up_view(request: HttpRequest, slug: str):
     """
     Increase by 1 point the rank of the activity on the course.
 
-    .. caution:: Changing the order or activities in a course requires the **change_course** permission.
+    .. caution:: Changing the order of activities in a course requires the **change_course** permission.
     .. important:: The activity to change is given as a POST parameter called **activity** and contains the resource
     primary key.
 
@@ -904,23 +949,18 @@ def activity_on_course_up_view(request: HttpRequest, slug: str):
         activity_pk_form = ActivityPKForm(request.POST or None)
         if activity_pk_form.is_valid():
             activity = get_object_or_404(Activity, pk=activity_pk_form.cleaned_data.get("activity"))
-            course_activity = get_object_or_404(CourseActivity, course=course, activity=activity)
-            previous_course_activity = get_object_or_404(
-                CourseActivity, course=course, rank=course_activity.rank - 1
-            )
-
-            # Switch course activity ranks
-            course_activity.rank = previous_course_activity.rank
-            previous_course_activity.rank += 1
-
-            # Save objects
-            course_activity.save()
-            previous_course_activity.save()
+            try:
+                # Move the activity before the previous one, only its rank changes
+                position = course.move_activity_up(activity)
+            except ActivityIsNotLinkedWithThisCourseError:
+                raise Http404()
+            if position is None:
+                raise Http404()
 
             messages.success(
                 request,
                 _("Activity “%(activity)s” was repositioned and is now the activity n°%(rank)d on this course.")
-                % {"activity": activity, "rank": course_activity.rank}
+                % {"activity": activity, "rank": position}
             )
             return redirect("learning:course/detail", slug=course.slug)
         return HttpResponseNotFound(activity_pk_form.errors.get("activity"))
@@ -930,6 +970,37 @@ def activity_on_course_up_view(request: HttpRequest, slug: str):
     raise PermissionDenied()
 
 
+@login_required
+@require_http_methods(["POST"])
+def activities_on_course_order_view(request: HttpRequest, slug: str):
+    """
+    Set the order of all the activities of the course at once.
+
+    .. caution:: Changing the order of activities in a course requires the **change_course** permission.
+    .. important:: The new order is given as POST parameters called **activities**, one for each activity of the
+    course, that contain the activity primary keys.
+
+    :param request: django request object
+    :type request: django.http.HttpRequest
+    :param slug: course slug
+    :type slug: str
+    :return: a JSON acknowledgement with the ordered activity primary keys, or the errors with a 400 status code
+    """
+    course = get_object_or_404(Course, slug=slug)
+    if not course.user_can_change(request.user):
+        raise PermissionDenied()
+
+    activity_pk_list_form = ActivityPKListForm(request.POST or None)
+    if not activity_pk_list_form.is_valid():
+        return JsonResponse({"errors": activity_pk_list_form.errors}, status=400)
+    activity_ids = activity_pk_list_form.cleaned_data.get("activities")
+    try:
+        course.order_activities(activity_ids)
+    except (ChangeActivityOnCourseError, CourseActivitiesOrderError) as ex:
+        return JsonResponse({"errors": {"activities": [str(ex)]}}, status=400)
+    return JsonResponse({"course": course.slug, "activities": activity_ids})
+
+
 # noinspection PyUnresolvedReferences
 @login_required
 @require_http_methods(["POST"])
@@ -1056,6 +1127,12 @@ class CourseObjectiveUpdateValidationView(ObjectObjectiveUpdateValidationView, C
     """
 
 
+class CourseObjectiveUpdateValidationsView(ObjectObjectiveUpdateValidationsView, CourseDetailMixin):
+    """
+    Handle several CourseObjective validations at once
+    """
+
+
 class StudentCourseProgressionMixin(CourseDetailMixin, LoginRequiredMixin, DetailView):
     """
     The progression of a student from the student
@@ -1079,7 +1156,7 @@ class TeacherCourseProgressionMixin(CourseDetailMixin, LoginRequiredMixin, Detai
     template_name = "learning/course/details/progression.html"
 
     def has_permission(self) -> bool:
-        return self.request.user == self.object.author or self.request.user in self.object.collaborators.all()
+        return self.request.user == self.object.author or self.object.has_collaborator(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data()
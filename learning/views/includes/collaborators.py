@@ -31,7 +31,7 @@ from django.views.generic.edit import ProcessFormView, FormMixin
 from learning.exc import UserIsAlreadyStudent, UserIsAlreadyCollaborator, UserIsAlreadyAuthor, LearningError
 from learning.forms import AddCollaboratorOnBasicModelMixin, UserPKForm, CourseCollaboratorUpdateRoleForm, \
     ActivityCollaboratorUpdateRoleForm, ResourceCollaboratorUpdateRoleForm
-from learning.models import extract_all_included_objects, CollaboratorRole, Course, Activity, Resource
+from learning.models import extract_all_included_objects, CollaboratorRole, Course, Activity, Resource, CourseTree
 from learning.views.helpers import PaginatorFactory, InvalidFormHandlerMixin
 
 
@@ -117,9 +117,22 @@ class BasicModelDetailCollaboratorsAddView(BasicModelCollaboratorsAddViewMixin,
 
             # Propagate to all the included objects on which the user in request has add_collaborator permission
             if propagate:
-                for included_object in set(extract_all_included_objects(self.object)):
-                    if included_object.user_can("add_collaborator", self.request.user) and \
-                            user not in included_object.object_collaborators.all():
+                if isinstance(self.object, Course):
+                    # The course tree gives the included objects and their collaborators at once
+                    course_tree = CourseTree.load(self.object)
+                    included_objects = [
+                        (included_object, course_tree.get_collaborator_ids(included_object))
+                        for included_object in course_tree.included_objects
+                    ]
+                else:
+                    included_objects = [
+                        (included_object, set(included_object.object_collaborators.values_list(
+                            "collaborator", flat=True
+                        ))) for included_object in set(extract_all_included_objects(self.object))
+                    ]
+                for included_object, collaborator_ids in included_objects:
+                    if user.pk not in collaborator_ids and \
+                            included_object.user_can("add_collaborator", self.request.user):
                         included_object.add_collaborator(user, role)
 
             messages.success(
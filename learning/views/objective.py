@@ -23,7 +23,7 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.exceptions import PermissionDenied
 from django.forms import Form
-from django.http import HttpResponseNotAllowed
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
@@ -32,8 +32,9 @@ from django.views.generic.detail import SingleObjectMixin
 
 from learning.exc import ObjectiveAlreadyInModel, ObjectiveAlreadyExists
 from learning.forms import ObjectiveCreateForm, AddObjectiveForm, CourseObjectiveUpdateForm, \
-    ActivityObjectiveUpdateForm, ResourceObjectiveUpdateForm
-from learning.models import Objective, Course, Resource, Activity
+    ActivityObjectiveUpdateForm, ResourceObjectiveUpdateForm, ObjectiveValidationsForm
+from learning.models import Objective, Course, Resource, Activity, change_validations
+from learning.permissions import resolve_perms
 from learning.views.helpers import InvalidFormHandlerMixin, PaginatorFactory
 
 
@@ -125,11 +126,13 @@ class ObjectiveDetailView(ObjectiveDetailMixin, DetailView):
         context = super().get_context_data()
         context.update(
             PaginatorFactory.get_paginator_as_context(
-                [course for course in Course.objects.all() if self.object in course.get_all_objectives()],
+                Course.objects.including_objective(self.object, self.request.user),
                 self.request.GET,
                 nb_per_page=6
             )
         )
+        # Resolve permissions on the displayed courses at once, templates then read them from the request cache
+        resolve_perms(context["page_obj"].object_list, self.request.user)
         return context
 
 
@@ -166,11 +169,11 @@ class BasicModelDetailObjectiveAddView(BasicModelDetailObjectiveAddMixin, Invali
 
     def get_form(self, form_class=None):
         form = super().get_form()
-        result = Objective.objects.most_relevant_objective_for_model(self.get_object())
-        if result.count() > 0:
+        result = Objective.objects.suggested_objectives_for_model(self.get_object())
+        if result:
             form.fields["existing_ability"].choices = \
                 [("", _("Recommended objective exists but I create my own new objective"))] \
-                + [(choice.id, choice.ability) for choice in result.all()]
+                + [(choice.id, choice.ability) for choice in result]
         return form
 
     def form_valid(self, form):
@@ -373,13 +376,17 @@ class ObjectiveUpdateValidationMixin(LoginRequiredMixin, PermissionRequiredMixin
     def has_permission(self):
         return self.object.user_can_view(self.request.user) and super().has_permission()
 
+    # Whether the reason of a permission denial is shown as a flash message
+    flash_no_permission = True
+
     # noinspection PyUnresolvedReferences
-    def handle_no_permission(self):
-        messages.error(
-            self.request,
-            _("You do not have the required permissions to validate an objective on this %(object)s.")
+    def get_no_permission_message(self) -> str:
+        return _("You do not have the required permissions to validate an objective on this %(object)s.") \
             % {"object": _(type(self.object).__name__.lower())}
-        )
+
+    def handle_no_permission(self):
+        if self.flash_no_permission:
+            messages.error(self.request, self.get_no_permission_message())
         return super().handle_no_permission()
 
 
@@ -402,7 +409,7 @@ class ObjectObjectiveUpdateValidationView(InvalidFormHandlerMixin, ObjectiveUpda
                 self.object.object_objectives,
                 pk=objective_pk_form.cleaned_data.get("pk_object_objective", None)
             )
-            if self.request.user in objective.validators.all():
+            if objective.has_validator(self.request.user):
                 objective.change_validation(self.request.user)
                 messages.info(
                     self.request,
@@ -432,3 +439,49 @@ class ObjectObjectiveUpdateValidationView(InvalidFormHandlerMixin, ObjectiveUpda
 
     def get(self, request, *args, **kwargs):
         return HttpResponseNotAllowed(["POST"])
+
+
+class ObjectObjectiveUpdateValidationsView(ObjectiveUpdateValidationMixin):
+    """
+    Validate several EntityObjective, and remove the validation of others, at once. The view permission on the object
+    is checked once, and the answer is a JSON document with the progression of the student on the object objectives.
+    """
+    form_class = ObjectiveValidationsForm
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponseNotAllowed(["POST"])
+
+    # No flash message: it would only be displayed on the next page loaded by the user
+    flash_no_permission = False
+
+    # noinspection PyMissingOrEmptyDocstring
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        return JsonResponse({"errors": {"__all__": [self.get_no_permission_message()]}}, status=403)
+
+    def form_valid(self, form):
+        validated = set(form.cleaned_data.get("validated"))
+        entity_objectives = self.object.object_objectives.in_bulk(
+            list(validated) + form.cleaned_data.get("not_validated")
+        )
+        unknown = validated.union(form.cleaned_data.get("not_validated")).difference(entity_objectives)
+        if unknown:
+            return JsonResponse({"errors": {"__all__": [
+                _("There is no objective with the primary keys %(pks)s on this %(object)s.") % {
+                    "pks": ", ".join(str(pk) for pk in sorted(unknown)), "object": _(type(self.object).__name__.lower())
+                }
+            ]}}, status=400)
+        change_validations(self.request.user, {
+            entity_objective: pk in validated for pk, entity_objective in entity_objectives.items()
+        })
+        validated_pks = sorted(
+            self.object.object_objectives.filter(validators=self.request.user).values_list("pk", flat=True)
+        )
+        return JsonResponse({
+            "validated": validated_pks,
+            "progression": {"validated": len(validated_pks), "total": self.object.object_objectives.count()}
+        })
+
+    def form_invalid(self, form):
+        return JsonResponse({"errors": form.errors}, status=400)
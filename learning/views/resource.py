@@ -23,6 +23,7 @@
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.db.models import Count
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
@@ -37,7 +38,8 @@ from learning.views.includes.collaborators import BasicModelDetailCollaboratorsL
     BasicModelDetailCollaboratorsChangeView, BasicModelDetailCollaboratorsAddView, \
     BasicModelDetailCollaboratorsDeleteView
 from learning.views.objective import ObjectObjectiveDetailMixin, BasicModelDetailObjectiveAddView, \
-    ObjectObjectiveUpdateValidationView, BasicModelDetailObjectiveRemoveView, BasicModelDetailObjectiveUpdateView
+    ObjectObjectiveUpdateValidationView, ObjectObjectiveUpdateValidationsView, BasicModelDetailObjectiveRemoveView, \
+    BasicModelDetailObjectiveUpdateView
 
 
 class ResourceDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
@@ -65,7 +67,7 @@ class ResourceDetailMixin(PermissionRequiredMixin, SingleObjectMixin):
 
         # Add user specific elements in the context
         if self.request.user.is_authenticated:
-            if self.request.user in self.object.collaborators.all():
+            if self.object.has_collaborator(self.request.user):
                 context["contribution"] = ResourceCollaborator.objects \
                     .get(collaborator=self.request.user, resource=self.object)
         return context
@@ -95,7 +97,7 @@ class ResourceDetailView(ResourceDetailMixin, PermissionRequiredMixin, DetailVie
         context["user_is_teacher_editor"] = ResourceCollaborator.objects.filter(
             collaborator=self.request.user, resource=self.object, role=CollaboratorRole.TEACHER.name
         ).exists()
-        context["user_contribute"] = self.request.user in self.object.collaborators.all()
+        context["user_contribute"] = self.object.has_collaborator(self.request.user)
         context["user_is_author_of_object"] = self.request.user == self.object.author
         if self.request.user != self.object.author:
             context["auth_user"] = self.request.user
@@ -374,10 +376,11 @@ class ResourceDetailSimilarView(ResourceDetailSimilarViewMixin):
         context = super().get_context_data(**kwargs)
         # noinspection PyBroadException
         try:
-            similar_list = [
-                similar for similar in self.object.tags.similar_objects()
-                if isinstance(similar, Resource) and similar.user_can_view(self.request.user)
-            ]
+            similar_list = Resource.objects.visible_to(self.request.user) \
+                .exclude(pk=self.object.pk) \
+                .filter(tags__in=self.object.tags.all()) \
+                .annotate(same_tags=Count("pk")) \
+                .order_by("-same_tags", "-updated", "name")
             context.update(PaginatorFactory.get_paginator_as_context(similar_list, self.request.GET, nb_per_page=9))
         # django-taggit similar tags can have weird behaviour sometimes: https://github.com/jazzband/django-taggit/issues/80
         except Exception:
@@ -436,3 +439,9 @@ class ResourceObjectiveUpdateValidationView(ObjectObjectiveUpdateValidationView,
     """
     Handle the resourceObjectiveValidation
     """
+
+
+class ResourceObjectiveUpdateValidationsView(ObjectObjectiveUpdateValidationsView, ResourceDetailMixin):
+    """
+    Handle several ResourceObjective validations at once
+    """
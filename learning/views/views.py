@@ -36,14 +36,16 @@ class WelcomePageView(TemplateView):
         if self.request.user.is_authenticated:
             context.update(
                 PaginatorFactory.get_paginator_as_context(
-                    Course.objects.followed_by(self.request.user).all(),
+                    Course.objects.followed_by(self.request.user).with_user_context(self.request.user)
+                    .select_related("author").prefetch_related("tags"),
                     self.request.GET, nb_per_page=6
                 )
             )
         else:
             context.update(
                 PaginatorFactory.get_paginator_as_context(
-                    Course.objects.public().all(),
+                    Course.objects.public().with_user_context(self.request.user)
+                    .select_related("author").prefetch_related("tags"),
                     self.request.GET, nb_per_page=6
                 )
             )